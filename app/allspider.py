@@ -5,6 +5,7 @@ from qfluentwidgets import (SmoothScrollArea, FlowLayout, PushButton, SearchLine
                             PushButton, LineEdit, BodyLabel, InfoBar, InfoBarPosition, MessageBoxBase, 
                             RoundMenu, Action, MenuAnimationType, TogglePushButton)
 from .databaseapi import DatabaseAPI
+from .queryexecutor import QueryExecutor
 from qfluentwidgets import FluentIcon as FIF
 from .deletemessagebox import DeleteConfirmMessageBox
 
@@ -72,10 +73,9 @@ class SubSpiderPage(QWidget):
         super().__init__(parent)
         self.setObjectName("SubSpiderPage")
         self.per_page = 60
-        self.spiders_status_total = DatabaseAPI.get_all_spiders_and_status(1, self.per_page)
-        self.total_items = self.spiders_status_total['total']
-        self.spiders_status = self.spiders_status_total['spiders_and_status']
-        self.spiders = [spider['name'] for spider in self.spiders_status]
+        self.total_items = 0
+        self.spiders_status = []
+        self.spiders = []
         self.current_text = ""
         
         # 主布局
@@ -118,14 +118,13 @@ class SubSpiderPage(QWidget):
         self.page_edit.returnPressed.connect(self.jump_to_page)
         
         # 总页数标签
-        self.total_pages = (self.total_items + self.per_page - 1) // self.per_page
+        self.total_pages = 1
         self.total_label = BodyLabel(f"/ {self.total_pages}", self)
         self.current_page = 1
         self.page_edit.setText(str(self.current_page))
 
         self.next_btn = PushButton(">", self)
-        if self.current_page == self.total_pages:
-            self.next_btn.setEnabled(False)
+        self.next_btn.setEnabled(False)
         self.next_btn.clicked.connect(self.next_page)
         
         page_layout.addStretch()
@@ -138,30 +137,18 @@ class SubSpiderPage(QWidget):
         self.main_layout.addWidget(self.page_widget)
         
         self.spider_buttons = []
-        for spider in self.spiders_status:
-            spider_text = spider['name']
-            status = spider['status']
-            btn = SpiderPushButton(spider_text, status)
-            btn.delete_signal.connect(self.delete_spider)
-            btn.pause_signal.connect(self.pause_spider)
-            btn.resume_signal.connect(self.resume_spider)
-            self.flow_layout.addWidget(btn)
-            self.spider_buttons.append(btn)
+        self.search_results()
 
-    def init_start(self):
-        for spider in self.spiders_status:
-            spider_text = spider['name']
-            status = spider['status']
-            if status == "active":
-                _main_window = self.window()
-                li_str = DatabaseAPI.get_spider_para(spider_text)
-                li = eval(li_str)
-                li = [str(i) for i in li]
-                _main_window.start_add_single_source_process(li, spider_text)
-                
     def search_results(self):
-        """处理搜索事件"""
-        self.spiders_status_total = DatabaseAPI.get_all_spiders_and_status(self.current_page, self.per_page)
+        """处理搜索事件，查询在后台执行"""
+        QueryExecutor.instance().submit(
+            self, 'search', DatabaseAPI.get_all_spiders_and_status, self.current_page, self.per_page,
+            on_result=self.on_search_finished
+        )
+
+    def on_search_finished(self, spiders_status_total):
+        """后台查询完成，刷新爬虫按钮"""
+        self.spiders_status_total = spiders_status_total
         self.spiders_status = self.spiders_status_total['spiders_and_status']
         self.spiders = [spider['name'] for spider in self.spiders_status]
         self.total_items = self.spiders_status_total['total']
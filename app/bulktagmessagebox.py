@@ -0,0 +1,44 @@
+from PySide6.QtCore import Signal
+from qfluentwidgets import MessageBoxBase, SubtitleLabel, BodyLabel
+from .tagadder import TagAdder
+
+class BulkTagMessageBox(MessageBoxBase):
+    """批量编辑标签对话框"""
+    yesSignal = Signal(list, list)  # (要添加的标签, 要删除的标签)
+    cancelSignal = Signal()
+
+    def __init__(self, tagtype, target_text, parent=None):
+        super().__init__(parent)
+        self.titleLabel = SubtitleLabel("批量编辑标签", self)
+        self.targetLabel = BodyLabel(target_text, self)
+
+        self.addLabel = BodyLabel("添加标签", self)
+        self.tagadder_add = TagAdder(tagtype)
+        self.tagadder_add.setMinimumSize(400, 160)
+        self.removeLabel = BodyLabel("删除标签", self)
+        self.tagadder_remove = TagAdder(tagtype)
+        self.tagadder_remove.setMinimumSize(400, 160)
+
+        self.viewLayout.addWidget(self.titleLabel)
+        self.viewLayout.addWidget(self.targetLabel)
+        self.viewLayout.addWidget(self.addLabel)
+        self.viewLayout.addWidget(self.tagadder_add)
+        self.viewLayout.addWidget(self.removeLabel)
+        self.viewLayout.addWidget(self.tagadder_remove)
+
+        self.cancelButton.setText('取消')
+        self.yesButton.setText('确定')
+        self.yesButton.clicked.connect(self.__onYesButtonClicked)
+        self.cancelButton.clicked.connect(self.__onCancelButtonClicked)
+
+        # 设置对话框样式
+        self.widget.setMinimumWidth(450)
+
+    def __onYesButtonClicked(self):
+        self.accept()
+        self.yesSignal.emit(list(self.tagadder_add.selected_tags.keys()),
+                            list(self.tagadder_remove.selected_tags.keys()))
+
+    def __onCancelButtonClicked(self):
+        self.reject()
+        self.cancelSignal.emit()
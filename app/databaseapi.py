@@ -1,21 +1,331 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, bindparam, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from datetime import datetime
 import os
+import json
+import base64
+import threading
+import time
+from contextlib import contextmanager
 from typing import Any, Optional
 from sqlalchemy.engine import Result
+from .querycache import QueryCache, cached, invalidates
+from .tagindex import TagIndex, TagNameIndex
+from .searchprojection import CARD_TABLES, CARD_ROWS, create_card_tables, rebuild_cards, refresh_cards
+from .dialect import MYSQL, SQLITE, TRIGRAM_SIZE, FTS_TABLES, TAG_FTS_TABLES, DETECT_TYPES, tag_index_statements, SqliteCursor, apply_pragmas, translate
+
+# 图片列表查询所用的表结构，键为imgtype（1表示角色，2表示作品）
+# 搜索只读投影表RoleCard/SourceCard（见searchprojection.py），标签条件仍走关系表
+# orders中每种排序方式为 (排序键列表, 是否降序)，排序键为 (列, 是否可能为NULL)
+_IMAGE_QUERY = {
+    1: {
+        'columns': "c.role_id, c.image_url, c.name, c.snippet, c.is_downloaded, c.local_path",
+        'row': CARD_ROWS[1],
+        'tables': "RoleCard c",
+        'image_table': "RoleCard",
+        'id': "c.role_id",
+        'name': "c.name",
+        'fts': FTS_TABLES[1],
+        'tag_ids': """
+            SELECT rtr.role_id
+            FROM RoleTagRelation rtr
+            JOIN RoleTag t ON rtr.tag_id = t.tag_id
+        """,
+        'tag_pairs': """
+            SELECT rtr.role_id, t.tag
+            FROM RoleTagRelation rtr
+            JOIN RoleTag t ON rtr.tag_id = t.tag_id
+        """,
+        'image_counts': "SELECT role_id, COUNT(*) FROM RoleImage GROUP BY role_id",
+        'orders': {
+            'default': ([("c.role_id", False), ("c.image_id", False)], False),
+        },
+    },
+    2: {
+        'columns': "c.source_id, c.url, c.name, c.snippet, c.source_type, c.is_downloaded, c.local_path",
+        'row': CARD_ROWS[2],
+        'tables': "SourceCard c",
+        'image_table': "SourceCard",
+        'id': "c.source_id",
+        'name': "c.name",
+        'fts': FTS_TABLES[2],
+        'tag_ids': """
+            SELECT str.source_id
+            FROM SourceTagRelation str
+            JOIN SourceTag t ON str.tag_id = t.tag_id
+        """,
+        'tag_pairs': """
+            SELECT str.source_id, t.tag
+            FROM SourceTagRelation str
+            JOIN SourceTag t ON str.tag_id = t.tag_id
+        """,
+        'image_counts': "SELECT source_id, COUNT(*) FROM SourceImage GROUP BY source_id",
+        'orders': {
+            'default': ([("c.source_id", False), ("c.image_id", False)], False),
+            'time': ([("c.release_date", True), ("c.source_id", False), ("c.image_id", False)], True),
+        },
+    },
+}
+
+# 标签页浏览所用的表结构，键为imgtype，字段含义同_IMAGE_QUERY
+# 按 (num, tag) 索引倒序排列，名称过滤走标签名全文索引（MySQL为ngram，SQLite为FTS5 trigram）
+_TAG_QUERY = {
+    t: {
+        'table': table,
+        'id': "tag_id",
+        'name': "tag",
+        'fts': TAG_FTS_TABLES[t],
+        'keys': [("num", False), ("tag", False)],
+    }
+    for t, table in ((1, "RoleTag"), (2, "SourceTag"))
+}
+
+# 读方法的结果缓存，写方法按表淘汰；爬虫等外部进程的写入靠过期时间兜底
+_query_cache = QueryCache(maxsize=512, ttl=300)
+
+# 每种imgtype/tagtype（1表示角色，2表示作品）涉及的表，key为实体ID列名
+_TYPE_TABLES = {
+    1: {'entity': "Role", 'image': "RoleImage", 'tag': "RoleTag", 'relation': "RoleTagRelation", 'key': "role_id",
+        'card': CARD_TABLES[1]},
+    2: {'entity': "Source", 'image': "SourceImage", 'tag': "SourceTag", 'relation': "SourceTagRelation", 'key': "source_id",
+        'card': CARD_TABLES[2]},
+}
+
+# 内存中的标签倒排索引，调用DatabaseAPI.build_tag_index()后才启用，未启用时走SQL
+_tag_indexes = {1: TagIndex(), 2: TagIndex()}
+# 内存中的标签名补全索引，与倒排索引一起构建，未构建时补全走SQL前缀查询
+_tag_name_indexes = {1: TagNameIndex(), 2: TagNameIndex()}
+# 标签补全默认返回的数量
+TAG_COMPLETION_LIMIT = 20
+# 由倒排索引算出的实体ID不超过该数量时，直接作为IN条件交给数据库
+_INDEX_IN_LIMIT = 10000
+
+
+def _tables_of(*kinds, extra=()):
+    """返回一个按调用参数中的imgtype/tagtype取表名的函数，供缓存装饰器使用"""
+    def resolve(imgtype=None, tagtype=None, **_):
+        names = _TYPE_TABLES[imgtype or tagtype]
+        return tuple(names[kind] for kind in kinds) + tuple(extra)
+    return resolve
+
+
+# 未过滤列表的总数超过该值时改用information_schema中的估算行数
+_ESTIMATE_THRESHOLD = 200000
+
+
+def _encode_cursor(values, direction):
+    """把边界行的排序键编码成不透明的翻页令牌"""
+    payload = json.dumps({'k': values, 'd': direction}, default=str, ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    """解析翻页令牌，返回 (排序键, 方向)"""
+    payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    return payload['k'], payload['d']
+
+
+def _seek_condition(keys, values, descending):
+    """构造keyset翻页条件：只保留排序位置在values之后的行
+    MySQL排序时NULL视为最小值，这里按同样的规则比较
+    返回 (SQL条件, 参数字典)
+    """
+    params = {}
+    clauses = []
+    for i, (column, nullable) in enumerate(keys):
+        parts = []
+        for j in range(i):
+            prev_column = keys[j][0]
+            if values[j] is None:
+                parts.append(f"{prev_column} IS NULL")
+            else:
+                parts.append(f"{prev_column} = :seek{j}")
+                params[f"seek{j}"] = values[j]
+
+        value = values[i]
+        if descending:
+            if value is None:
+                continue  # 没有比NULL更小的值
+            if nullable:
+                parts.append(f"({column} < :seek{i} OR {column} IS NULL)")
+            else:
+                parts.append(f"{column} < :seek{i}")
+            params[f"seek{i}"] = value
+        else:
+            if value is None:
+                parts.append(f"{column} IS NOT NULL")
+            else:
+                parts.append(f"{column} > :seek{i}")
+                params[f"seek{i}"] = value
+        clauses.append("(" + " AND ".join(parts) + ")")
+
+    if not clauses:
+        return "1 = 0", params
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+class _TimedQueuePool(QueuePool):
+    """记录等待时间的连接池，用于区分延迟来自连接池还是MySQL"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_lock = threading.Lock()
+        self.waits = 0          # 取连接的次数
+        self.wait_time = 0.0    # 取连接累计耗时（秒）
+        self.max_wait = 0.0
+        self.timeouts = 0       # 等待超时的次数
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self.stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.stats_lock:
+                self.waits += 1
+                self.wait_time += elapsed
+                self.max_wait = max(self.max_wait, elapsed)
+
 
 # 模拟数据库接口
 class DatabaseAPI:
     _engine = None
     _Session = None
+    _ngram_token_size = None
+    _backend = MYSQL  # MYSQL或SQLITE，见dialect.py
+
+    _query_stats = {'queries': 0, 'query_time': 0.0, 'max_query_time': 0.0}
+    _query_stats_lock = threading.Lock()
+    _local = threading.local()  # 当前线程的查询超时设置
 
     @classmethod
-    def initialize(cls, connection_string):
-        """初始化数据库连接"""
-        cls._engine = create_engine(connection_string)
+    def initialize(cls, connection_string, pool_size=5, max_overflow=10, pool_timeout=30,
+                   pool_recycle=3600, pre_ping=True, connect_timeout=10, read_timeout=0):
+        """初始化数据库连接
+        参数：
+        - connection_string: 数据库URL（字符串或sqlalchemy的URL对象）
+        - pool_size: 连接池常驻连接数
+        - max_overflow: 允许临时超出pool_size的连接数
+        - pool_timeout: 等待空闲连接的最长时间（秒）
+        - pool_recycle: 连接使用多久后重建（秒）
+        - pre_ping: 取出连接前是否先检测连接可用
+        - connect_timeout: 建立连接的超时（秒）
+        - read_timeout: 读取结果的超时（秒），0表示不限制
+        其余参数一般来自init.load_pool_config()；SQLite数据库（sqlite:///文件路径）不使用两个超时参数
+        """
+        url = make_url(connection_string)
+        cls._backend = SQLITE if url.get_backend_name() == 'sqlite' else MYSQL
+        connect_args = {}
+        if url.get_driver_name() == 'mysqlconnector':
+            connect_args['connection_timeout'] = connect_timeout
+            if read_timeout:
+                connect_args['read_timeout'] = read_timeout
+        elif url.get_backend_name() == 'mysql':
+            connect_args['connect_timeout'] = connect_timeout
+            if read_timeout:
+                connect_args['read_timeout'] = read_timeout
+        elif cls._backend == SQLITE:
+            connect_args['detect_types'] = DETECT_TYPES
+
+        cls._engine = create_engine(
+            url,
+            poolclass=_TimedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pre_ping,
+            connect_args=connect_args
+        )
         cls._Session = sessionmaker(bind=cls._engine)
 
+        if cls._backend == SQLITE:
+            @event.listens_for(cls._engine, "connect")
+            def _set_pragmas(dbapi_connection, connection_record):
+                apply_pragmas(dbapi_connection)
+
+            # 语句按MySQL写法编写，发给SQLite前转换
+            @event.listens_for(cls._engine, "before_cursor_execute", retval=True)
+            def _translate(conn, cursor, statement, parameters, context, executemany):
+                return translate(statement), parameters
+
+        if url.get_backend_name() == 'mysql':
+            # 取出连接时按当前线程的设置调整MAX_EXECUTION_TIME，只在值变化时执行SET
+            @event.listens_for(cls._engine, "checkout")
+            def _apply_timeout(dbapi_connection, connection_record, connection_proxy):
+                timeout_ms = getattr(cls._local, 'timeout_ms', 0)
+                if connection_record.info.get('max_execution_time', 0) != timeout_ms:
+                    cursor = dbapi_connection.cursor()
+                    try:
+                        cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {int(timeout_ms)}")
+                    finally:
+                        cursor.close()
+                    connection_record.info['max_execution_time'] = timeout_ms
+
+        # 统计SQL执行耗时
+        @event.listens_for(cls._engine, "before_cursor_execute")
+        def _before_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+        @event.listens_for(cls._engine, "after_cursor_execute")
+        def _after_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info['query_start'].pop()
+            with cls._query_stats_lock:
+                cls._query_stats['queries'] += 1
+                cls._query_stats['query_time'] += elapsed
+                cls._query_stats['max_query_time'] = max(cls._query_stats['max_query_time'], elapsed)
+
+    @classmethod
+    @contextmanager
+    def statement_timeout(cls, timeout_ms):
+        """在with块内，当前线程执行的每条SELECT最多运行timeout_ms毫秒（MySQL的MAX_EXECUTION_TIME）
+        timeout_ms为0表示不限制
+        """
+        previous = getattr(cls._local, 'timeout_ms', 0)
+        cls._local.timeout_ms = timeout_ms or 0
+        try:
+            yield
+        finally:
+            cls._local.timeout_ms = previous
+
+    @classmethod
+    def get_pool_status(cls):
+        """连接池的实时状态
+        返回格式: {
+            'size': 常驻连接数, 'checked_in': 空闲连接数, 'checked_out': 正在使用的连接数,
+            'overflow': 超出pool_size的连接数,
+            'waits': 取连接次数, 'avg_wait': 平均等待时间（秒）, 'max_wait': 最长等待时间（秒）,
+            'timeouts': 等待超时次数,
+            'queries': 已执行的SQL数, 'avg_query_time': SQL平均耗时（秒）, 'max_query_time': SQL最长耗时（秒）
+        }
+        """
+        if not cls._engine:
+            raise Exception("Database not initialized. Call initialize() first.")
+        pool = cls._engine.pool
+        with pool.stats_lock:
+            waits, wait_time, max_wait, timeouts = pool.waits, pool.wait_time, pool.max_wait, pool.timeouts
+        with cls._query_stats_lock:
+            query_stats = dict(cls._query_stats)
+        return {
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+            'waits': waits,
+            'avg_wait': wait_time / waits if waits else 0.0,
+            'max_wait': max_wait,
+            'timeouts': timeouts,
+            'queries': query_stats['queries'],
+            'avg_query_time': query_stats['query_time'] / query_stats['queries'] if query_stats['queries'] else 0.0,
+            'max_query_time': query_stats['max_query_time']
+        }
+
     @classmethod
     def get_session(cls):
         """获取数据库会话"""
@@ -24,294 +334,451 @@ class DatabaseAPI:
         return cls._Session()
 
     @staticmethod
-    def search_images_by_name(name, imgtype=1, page=1, per_page=100):
-        """用角色/作品名搜图片
+    def cache_stats():
+        """查询缓存的命中统计"""
+        return _query_cache.stats()
+
+    @staticmethod
+    def invalidate_cache(*tables):
+        """淘汰读取过这些表的缓存，不传参数时清空全部缓存
+        爬虫等外部进程写入数据后调用
+        """
+        _query_cache.invalidate(tables)
+
+    @staticmethod
+    def _count_all_images(session, spec):
+        """未过滤列表的总数
+        表很大时直接用information_schema中的估算行数，避免全表COUNT；SQLite没有估算值，直接COUNT
+        """
+        if DatabaseAPI._backend == SQLITE:
+            return session.execute(text(f"SELECT COUNT(*) FROM {spec['tables']}")).scalar()
+        estimate = session.execute(text("""
+            SELECT TABLE_ROWS
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND LOWER(TABLE_NAME) = LOWER(:table)
+        """), {"table": spec['image_table']}).scalar()
+        if estimate is not None and estimate > _ESTIMATE_THRESHOLD:
+            return int(estimate)
+        return session.execute(text(f"SELECT COUNT(*) FROM {spec['tables']}")).scalar()
+
+    @classmethod
+    def _get_ngram_token_size(cls):
+        """ngram全文解析器的分词长度，查询一次后缓存；SQLite为trigram的长度"""
+        if cls._backend == SQLITE:
+            return TRIGRAM_SIZE
+        if cls._ngram_token_size is None:
+            session = cls.get_session()
+            try:
+                cls._ngram_token_size = int(session.execute(text("SELECT @@ngram_token_size")).scalar())
+            except Exception as e:
+                print(f"获取ngram_token_size失败，使用默认值2: {str(e)}")
+                cls._ngram_token_size = 2
+            finally:
+                session.close()
+        return cls._ngram_token_size
+
+    @staticmethod
+    def _append_name_condition(spec, conditions, params, name):
+        """添加名称条件，走全文索引时返回相关度表达式，否则返回None"""
+        if not name:
+            return None
+        token_size = DatabaseAPI._get_ngram_token_size()
+        phrase = name.replace('"', ' ').strip()
+        if len(phrase) >= token_size and DatabaseAPI._backend == SQLITE:
+            # 走FTS5 trigram索引，只匹配名称列；bm25越小越相关，取反后与MySQL一样越大越相关
+            fts = spec['fts']
+            conditions.append(f"{spec['id']} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH :name_match)")
+            params['name_match'] = f'{spec["name"].split(".")[-1]} : "{phrase}"'
+            return f"""(SELECT -bm25({fts}) FROM {fts}
+                        WHERE {fts} MATCH :name_match AND rowid = {spec['id']})"""
+        if len(phrase) >= token_size:
+            # 走ngram全文索引，整个关键字作为短语匹配
+            score = f"MATCH({spec['name']}) AGAINST(:name_match IN BOOLEAN MODE)"
+            conditions.append(score)
+            params['name_match'] = f'"{phrase}"'
+            return score
+        # 关键字比分词长度还短，全文索引查不到，只能用LIKE
+        conditions.append(f"{spec['name']} LIKE :name")
+        params['name'] = f"%{name}%"
+        return None
+
+    @staticmethod
+    def _append_tag_conditions(spec, conditions, params, tagli, mode, exclude_tags):
+        """没有倒排索引可用时，用SQL子查询表达标签条件"""
+        if tagli:
+            if mode == 'all':
+                conditions.append(f"""{spec['id']} IN (
+                    {spec['tag_ids']}
+                    WHERE t.tag IN :tags
+                    GROUP BY 1
+                    HAVING COUNT(DISTINCT t.tag_id) = :tag_count
+                )""")
+                params['tag_count'] = len(set(tagli))
+            else:
+                conditions.append(f"{spec['id']} IN ({spec['tag_ids']} WHERE t.tag IN :tags)")
+            params['tags'] = list(tagli)
+        if exclude_tags:
+            conditions.append(f"{spec['id']} NOT IN ({spec['tag_ids']} WHERE t.tag IN :exclude_tags)")
+            params['exclude_tags'] = list(exclude_tags)
+
+    @staticmethod
+    def _expand_lists(query, params):
+        """参数中的列表按IN列表展开"""
+        names = [key for key, value in params.items() if isinstance(value, list)]
+        if names:
+            query = query.bindparams(*[bindparam(key, expanding=True) for key in names])
+        return query
+
+    @staticmethod
+    def build_tag_index(imgtype=None):
+        """从标签关系表构建内存中的标签倒排索引和标签名补全索引，imgtype为空时两种都构建
+        启动时和爬虫写入数据后调用
+        """
+        session = DatabaseAPI.get_session()
+        try:
+            for t in ([imgtype] if imgtype else [1, 2]):
+                spec = _IMAGE_QUERY[t]
+                tag_pairs = session.execute(text(spec['tag_pairs'])).fetchall()
+                image_counts = session.execute(text(spec['image_counts'])).fetchall()
+                _tag_indexes[t].build(tag_pairs, image_counts)
+                print(f"标签索引构建完成: imgtype={t}, {_tag_indexes[t].stats()}")
+                tag_nums = session.execute(text(f"SELECT tag, num FROM {_TYPE_TABLES[t]['tag']}")).fetchall()
+                _tag_name_indexes[t].build(tag_nums)
+                print(f"标签补全索引构建完成: imgtype={t}, {_tag_name_indexes[t].stats()}")
+        except Exception as e:
+            print(f"构建标签索引失败: {str(e)}")
+        finally:
+            session.close()
+
+    @classmethod
+    def _raw_cursor(cls, dbapi_connection):
+        """DBAPI游标，SQLite时包装成SqliteCursor，供searchprojection中按MySQL写法的语句使用"""
+        cursor = dbapi_connection.cursor()
+        if cls._backend == SQLITE:
+            return SqliteCursor(cursor)
+        return cursor
+
+    @staticmethod
+    def _refresh_cards(session, imgtype, ids):
+        """重新生成这些角色/作品在投影表中的卡片，在调用方的事务中执行"""
+        cursor = DatabaseAPI._raw_cursor(session.connection().connection)
+        try:
+            refresh_cards(cursor, imgtype, ids)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def ensure_search_cards():
+        """投影表不存在时（旧数据库）创建并从基础表生成，启动时调用"""
+        if DatabaseAPI._backend == SQLITE:
+            query = text("""
+                SELECT COUNT(*)
+                FROM sqlite_master
+                WHERE type = 'table' AND LOWER(name) IN :tables
+            """)
+        else:
+            query = text("""
+                SELECT COUNT(*)
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE() AND LOWER(TABLE_NAME) IN :tables
+            """)
+        session = DatabaseAPI.get_session()
+        try:
+            existing = session.execute(query.bindparams(bindparam("tables", expanding=True)),
+                {"tables": [table.lower() for table in CARD_TABLES.values()]}).scalar()
+        finally:
+            session.close()
+        if existing < len(CARD_TABLES):
+            print("投影表不存在，开始生成")
+            DatabaseAPI.rebuild_search_cards()
+
+    @staticmethod
+    def ensure_tag_indexes():
+        """标签表缺少 (num, tag) 索引或标签名全文索引时（旧数据库）补建，启动时调用"""
+        session = DatabaseAPI.get_session()
+        try:
+            if DatabaseAPI._backend == SQLITE:
+                for t, spec in _TAG_QUERY.items():
+                    exists = session.execute(text(
+                        "SELECT COUNT(*) FROM sqlite_master WHERE name = :name"), {"name": spec['fts']}).scalar()
+                    for statement in tag_index_statements(t):
+                        session.execute(text(statement))
+                    if not exists:
+                        print(f"补建标签索引: {spec['table']}")
+                        session.execute(text(f"INSERT INTO {spec['fts']} ({spec['fts']}) VALUES ('rebuild')"))
+                session.commit()
+                return
+            query = text("""
+                SELECT DISTINCT LOWER(INDEX_NAME)
+                FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table
+            """)
+            for spec in _TAG_QUERY.values():
+                table = spec['table']
+                existing = {row[0] for row in session.execute(query, {"table": table})}
+                if f"idx_{table.lower()}_num" not in existing:
+                    print(f"补建标签索引: idx_{table.lower()}_num")
+                    session.execute(text(f"CREATE INDEX idx_{table.lower()}_num ON {table}(num, tag)"))
+                if f"idx_{table.lower()}_tag_ft" not in existing:
+                    print(f"补建标签索引: idx_{table.lower()}_tag_ft")
+                    session.execute(text(
+                        f"CREATE FULLTEXT INDEX idx_{table.lower()}_tag_ft ON {table}(tag) WITH PARSER ngram"))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"补建标签索引失败: {str(e)}")
+        finally:
+            session.close()
+
+    @staticmethod
+    @invalidates(_query_cache, tuple(CARD_TABLES.values()))
+    def rebuild_search_cards(imgtype=None):
+        """从基础表重新生成搜索投影表，imgtype为空时两种都重建
+        返回 {imgtype: 行数}，失败时返回空字典
+        """
+        connection = DatabaseAPI._engine.raw_connection()
+        try:
+            cursor = DatabaseAPI._raw_cursor(connection)
+            create_card_tables(cursor)
+            counts = rebuild_cards(cursor, imgtype)
+            connection.commit()
+            cursor.close()
+            return counts
+        except Exception as e:
+            connection.rollback()
+            print(f"重建投影表失败: {str(e)}")
+            return {}
+        finally:
+            connection.close()
+
+    @staticmethod
+    def tag_index_stats():
+        """标签倒排索引的统计信息"""
+        return {t: index.stats() for t, index in _tag_indexes.items()}
+
+    @staticmethod
+    @cached(_query_cache, _tables_of('card', 'tag', 'relation'))
+    def _search_images(imgtype, name=None, tagli=None, order='default', page=1, per_page=100, cursor=None,
+                       mode='any', exclude_tags=None):
+        """所有图片列表查询的公共实现
         参数：
-        - name: 角色/作品名
         - imgtype: 1表示角色图片，2表示作品图片
-        - page: 页码
+        - name: 名称关键字，为空表示不按名称过滤
+        - tagli: 标签列表，为空表示不按标签过滤
+        - order: 排序方式，'default'按ID，'time'按发布日期（仅作品），'relevance'按名称相关度
+        - page: 页码，仅在没有cursor时使用（OFFSET翻页）
         - per_page: 每页数量
-        返回格式: {
-            'total': 总结果数,
-            'images': [
-                {'id': 图片ID, 'url': 图片URL, 'name': 标题, 'description': 描述},
-                ...
-            ]
+        - cursor: 上一次结果中的next_cursor/prev_cursor，给出时使用keyset翻页
+        - mode: 'any'表示包含任一标签，'all'表示包含全部标签
+        - exclude_tags: 不能包含的标签列表
+        返回格式同search_images_by_name
+        """
+        spec = _IMAGE_QUERY[imgtype]
+        tag_index = _tag_indexes[imgtype]
+
+        conditions = []
+        params = {}
+        score = DatabaseAPI._append_name_condition(spec, conditions, params, name)
+
+        if order == 'relevance':
+            if score is None:
+                order = 'default'
+            else:
+                default_keys = spec['orders']['default'][0]
+                keys, descending = [(score, False)] + default_keys, True
+        if order != 'relevance':
+            keys, descending = spec['orders'][order]
+        direction = 'next'
+        values = None
+        if cursor:
+            values, direction = _decode_cursor(cursor)
+        scan_descending = descending != (direction == 'prev')
+        offset = (page - 1) * per_page
+
+        total = None
+        total_cached = True
+        if tagli or exclude_tags:
+            if tag_index.ready:
+                # 标签条件由倒排索引求出实体ID，数据库只负责按ID取图片
+                ids = tag_index.query(tagli, mode, exclude_tags)
+                if not name:
+                    total = tag_index.count_images(ids)
+                if order == 'default' and not name:
+                    # 默认排序就是实体ID顺序，只把覆盖当前页的ID交给数据库
+                    ids, offset = tag_index.page_window(
+                        ids, per_page, page=page,
+                        cursor_id=values[0] if cursor else None, direction=direction)
+                if len(ids) <= _INDEX_IN_LIMIT:
+                    conditions.append(f"{spec['id']} IN :tag_ids")
+                    params['tag_ids'] = list(ids)
+                    if not ids:
+                        return {'total': total or 0, 'images': [], 'next_cursor': None, 'prev_cursor': None}
+                else:
+                    DatabaseAPI._append_tag_conditions(spec, conditions, params, tagli, mode, exclude_tags)
+            else:
+                DatabaseAPI._append_tag_conditions(spec, conditions, params, tagli, mode, exclude_tags)
+
+        if total is None:
+            # 总数：未过滤时取缓存/估算值；过滤时若缓存中没有，
+            # 在第一页查询中用窗口函数一并算出，不再单独执行COUNT
+            count_key = ('_search_total', imgtype, name or "", tuple(sorted(tagli or ())),
+                         mode, tuple(sorted(exclude_tags or ())))
+            total_cached, total = _query_cache.get(count_key)
+            count_tables = _tables_of('card', 'tag', 'relation')(imgtype=imgtype)
+            count_generations = _query_cache.generations(count_tables)
+        with_count = total is None and bool(conditions) and not cursor
+
+        page_conditions = list(conditions)
+        page_params = dict(params)
+        if cursor:
+            # 向前翻页时反向扫描，取到结果后再倒序
+            seek_sql, seek_params = _seek_condition(keys, values, scan_descending)
+            page_conditions.append(seek_sql)
+            page_params.update(seek_params)
+
+        where = f"WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+        order_by = ", ".join(f"{column} {'DESC' if scan_descending else 'ASC'}" for column, _ in keys)
+        key_columns = ", ".join(column for column, _ in keys)
+        count_column = ", COUNT(*) OVER() AS total" if with_count else ""
+        page_params['limit'] = per_page
+        if cursor:
+            limit = "LIMIT :limit"
+        else:
+            limit = "LIMIT :limit OFFSET :offset"
+            page_params['offset'] = offset
+
+        query = DatabaseAPI._expand_lists(text(f"""
+            SELECT {spec['columns']}, {key_columns}{count_column}
+            FROM {spec['tables']}
+            {where}
+            ORDER BY {order_by}
+            {limit}
+        """), params)
+
+        session = DatabaseAPI.get_session()
+        try:
+            rows = session.execute(query, page_params).fetchall()
+            if with_count and rows:
+                total = rows[0][-1]
+                rows = [row[:-1] for row in rows]
+            if total is None:
+                if conditions:
+                    # 页码超出范围或者按令牌翻页时缓存已过期，才会走到这里
+                    count_query = DatabaseAPI._expand_lists(text(f"""
+                        SELECT COUNT(*)
+                        FROM {spec['tables']}
+                        WHERE {' AND '.join(conditions)}
+                    """), params)
+                    total = session.execute(count_query, params).scalar()
+                else:
+                    total = DatabaseAPI._count_all_images(session, spec)
+            if not total_cached:
+                _query_cache.set(count_key, total, count_tables, generations=count_generations)
+        finally:
+            session.close()
+
+        if direction == 'prev':
+            rows = list(reversed(rows))
+
+        row_type = spec['row']
+        n = len(row_type._fields)
+        image_list = [row_type._make(row[:n]) for row in rows]
+        next_cursor = _encode_cursor(list(rows[-1][n:]), 'next') if rows else None
+        prev_cursor = _encode_cursor(list(rows[0][n:]), 'prev') if rows else None
+
+        return {
+            'total': total,
+            'images': image_list,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor
         }
+
+    @staticmethod
+    @cached(_query_cache, _tables_of('card', 'tag', 'relation'))
+    def search_entity_ids(imgtype, name=None, tagli=None, mode='any', exclude_tags=None):
+        """取出整个搜索结果涉及的角色或作品ID（不分页），用于对全部结果做批量操作
+        参数同_search_images
+        返回：按ID升序的ID列表
         """
-        print(f"搜索图片: name={name}, imgtype={imgtype}, page={page}, per_page={per_page}")
+        print(f"获取搜索结果的全部ID: imgtype={imgtype}, name={name}, tagli={tagli}, mode={mode}")
+        spec = _IMAGE_QUERY[imgtype]
+        tag_index = _tag_indexes[imgtype]
+        if not name and tag_index.ready:
+            return list(tag_index.query(tagli, mode, exclude_tags))
+
+        conditions = []
+        params = {}
+        DatabaseAPI._append_name_condition(spec, conditions, params, name)
+        DatabaseAPI._append_tag_conditions(spec, conditions, params, tagli, mode, exclude_tags)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = DatabaseAPI._expand_lists(text(f"""
+            SELECT DISTINCT {spec['id']}
+            FROM {spec['tables']}
+            {where}
+            ORDER BY {spec['id']}
+        """), params)
         session = DatabaseAPI.get_session()
         try:
-            offset = (page - 1) * per_page
-            
-            if imgtype == 1:  # 角色图片
-                query = text("""
-                    SELECT ri.role_id, ri.image_url, r.name, r.description, ri.is_downloaded, ri.local_path
-                    FROM RoleImage ri
-                    JOIN Role r ON ri.role_id = r.role_id
-                    WHERE r.name LIKE :name
-                    LIMIT :limit OFFSET :offset
-                """)
-                images = session.execute(query, {
-                    "name": f"%{name}%",
-                    "limit": per_page,
-                    "offset": offset
-                }).fetchall()
-                
-                count_query = text("""
-                    SELECT COUNT(*) 
-                    FROM RoleImage ri
-                    JOIN Role r ON ri.role_id = r.role_id
-                    WHERE r.name LIKE :name
-                """)
-                total = session.execute(count_query, {"name": f"%{name}%"}).scalar()
-                
-                image_list = []
-                for img in images:
-                    image_list.append({
-                        'id': img[0],
-                        'url': img[1],
-                        'name': img[2],
-                        'description': img[3],
-                        'is_downloaded': img[4],
-                        'local_path': img[5]
-                    })
-                
-            else:  # 作品图片
-                query = text("""
-                    SELECT si.source_id, si.url, s.name, s.description, s.source_type, si.is_downloaded, si.local_path
-                    FROM SourceImage si
-                    JOIN Source s ON si.source_id = s.source_id
-                    WHERE s.name LIKE :name
-                    LIMIT :limit OFFSET :offset
-                """)
-                images = session.execute(query, {
-                    "name": f"%{name}%",
-                    "limit": per_page,
-                    "offset": offset
-                }).fetchall()
-                
-                count_query = text("""
-                    SELECT COUNT(*) 
-                    FROM SourceImage si
-                    JOIN Source s ON si.source_id = s.source_id
-                    WHERE s.name LIKE :name
-                """)
-                total = session.execute(count_query, {"name": f"%{name}%"}).scalar()
-                
-                image_list = []
-                for img in images:
-                    image_list.append({
-                        'id': img[0],
-                        'url': img[1],
-                        'name': img[2],
-                        'description': img[3],
-                        'source_type': img[4],
-                        'is_downloaded': img[5],
-                        'local_path': img[6]
-                    })
-            
-            return {
-                'total': total,
-                'images': image_list
-            }
+            return [row[0] for row in session.execute(query, params).fetchall()]
         finally:
             session.close()
-    
+
     @staticmethod
-    def fetch_all_images(imgtype=1, page=1, per_page=100):
-        """获取所有图片
+    def search_images_by_name(name, imgtype=1, page=1, per_page=100, cursor=None, order='default'):
+        """用角色/作品名搜图片
         参数：
+        - name: 角色/作品名
         - imgtype: 1表示角色图片，2表示作品图片
         - page: 页码
         - per_page: 每页数量
+        - cursor: 翻页令牌（上一次结果的next_cursor/prev_cursor），给出时忽略page
+        - order: 'default'按ID排序，'relevance'按名称相关度排序
         返回格式: {
             'total': 总结果数,
             'images': [
-                {'id': 图片ID, 'url': 图片URL, 'name': 标题, 'description': 描述},
+                RoleCardRow/SourceCardRow(id, url, name, snippet, ...)，snippet为截断后的简介,
                 ...
-            ]
+            ],
+            'next_cursor': 下一页令牌,
+            'prev_cursor': 上一页令牌
         }
         """
+        print(f"搜索图片: name={name}, imgtype={imgtype}, page={page}, per_page={per_page}")
+        return DatabaseAPI._search_images(imgtype, name=name, order=order, page=page, per_page=per_page, cursor=cursor)
+
+    @staticmethod
+    def fetch_all_images(imgtype=1, page=1, per_page=100, cursor=None):
+        """获取所有图片
+        参数：
+        - imgtype: 1表示角色图片，2表示作品图片
+        - page: 页码
+        - per_page: 每页数量
+        - cursor: 翻页令牌，给出时忽略page
+        返回格式同search_images_by_name
+        """
         print(f"获取所有图片: imgtype={imgtype}, page={page}, per_page={per_page}")
-        session = DatabaseAPI.get_session()
-        try:
-            offset = (page - 1) * per_page
-            
-            if imgtype == 1:  # 角色图片
-                query = text("""
-                    SELECT ri.role_id, ri.image_url, r.name, r.description, ri.is_downloaded, ri.local_path
-                    FROM RoleImage ri
-                    JOIN Role r ON ri.role_id = r.role_id
-                    LIMIT :limit OFFSET :offset
-                """)
-                images = session.execute(query, {
-                    "limit": per_page,
-                    "offset": offset
-                }).fetchall()
-                
-                count_query = text("SELECT COUNT(*) FROM RoleImage")
-                total = session.execute(count_query).scalar()
-                
-                image_list = []
-                for img in images:
-                    image_list.append({
-                        'id': img[0],
-                        'url': img[1],
-                        'name': img[2],
-                        'description': img[3],
-                        'is_downloaded': img[4],
-                        'local_path': img[5]
-                    })
-            
-            else:  # 作品图片
-                query = text("""
-                    SELECT si.source_id, si.url, s.name, s.description, s.source_type, si.is_downloaded, si.local_path
-                    FROM SourceImage si
-                    JOIN Source s ON si.source_id = s.source_id
-                    LIMIT :limit OFFSET :offset
-                """)
-                images = session.execute(query, {
-                    "limit": per_page,
-                    "offset": offset
-                }).fetchall()
-                
-                count_query = text("SELECT COUNT(*) FROM SourceImage")
-                total = session.execute(count_query).scalar()
-
-                image_list = []
-                for img in images:
-                    image_list.append({
-                        'id': img[0],
-                        'url': img[1],
-                        'name': img[2],
-                        'description': img[3],
-                        'source_type': img[4],
-                        'is_downloaded': img[5],
-                        'local_path': img[6]
-                    })
-            
-            return {
-                'total': total,
-                'images': image_list
-            }
-        finally:
-            session.close()
-    
+        return DatabaseAPI._search_images(imgtype, page=page, per_page=per_page, cursor=cursor)
+
     @staticmethod
-    def search_images_by_tags(tagli, imgtype=1, page=1, per_page=100):
+    def search_images_by_tags(tagli, imgtype=1, page=1, per_page=100, cursor=None, mode='any', exclude_tags=None):
         """用标签搜索图片
         参数：
         - tagli: 标签列表
         - imgtype: 1表示角色图片，2表示作品图片
         - page: 页码
         - per_page: 每页数量
-        返回格式: {
-            'total': 总结果数,
-            'images': [
-                {'id': 图片ID, 'url': 图片URL, 'name': 标题, 'description': 描述},
-                ...
-            ]
-        }
+        - cursor: 翻页令牌，给出时忽略page
+        - mode: 'any'表示包含任一标签，'all'表示包含全部标签
+        - exclude_tags: 不能包含的标签列表
+        返回格式同search_images_by_name
         """
         print(f"根据标签搜索图片: tagli={tagli}, imgtype={imgtype}, page={page}, per_page={per_page}")
-        session = DatabaseAPI.get_session()
-        try:
-            offset = (page - 1) * per_page
-            
-            if imgtype == 1:  # 角色图片
-                # 构建标签条件
-                tag_conditions = " OR ".join([f"t.tag = :tag{i}" for i in range(len(tagli))])
-                tag_params = {f"tag{i}": tag for i, tag in enumerate(tagli)}
-                
-                query = text(f"""
-                    SELECT DISTINCT ri.role_id, ri.image_url, r.name, r.description, ri.is_downloaded, ri.local_path
-                    FROM RoleImage ri
-                    JOIN Role r ON ri.role_id = r.role_id
-                    JOIN RoleTagRelation rtr ON r.role_id = rtr.role_id
-                    JOIN RoleTag t ON rtr.tag_id = t.tag_id
-                    WHERE {tag_conditions}
-                    LIMIT :limit OFFSET :offset
-                """)
-                
-                images = session.execute(query, {
-                    **tag_params,
-                    "limit": per_page,
-                    "offset": offset
-                }).fetchall()
-                
-                count_query = text(f"""
-                    SELECT COUNT(DISTINCT ri.role_id)
-                    FROM RoleImage ri
-                    JOIN Role r ON ri.role_id = r.role_id
-                    JOIN RoleTagRelation rtr ON r.role_id = rtr.role_id
-                    JOIN RoleTag t ON rtr.tag_id = t.tag_id
-                    WHERE {tag_conditions}
-                """)
-                total = session.execute(count_query, tag_params).scalar()
-
-                image_list = []
-                for img in images:
-                    image_list.append({
-                        'id': img[0],
-                        'url': img[1],
-                        'name': img[2],
-                        'description': img[3],
-                        'is_downloaded': img[4],
-                        'local_path': img[5]
-                    })
-                
-            else:  # 作品图片
-                # 构建标签条件
-                tag_conditions = " OR ".join([f"t.tag = :tag{i}" for i in range(len(tagli))])
-                tag_params = {f"tag{i}": tag for i, tag in enumerate(tagli)}
-                
-                query = text(f"""
-                    SELECT DISTINCT si.source_id, si.url, s.name, s.description, s.source_type, si.is_downloaded, si.local_path
-                    FROM SourceImage si
-                    JOIN Source s ON si.source_id = s.source_id
-                    JOIN SourceTagRelation str ON s.source_id = str.source_id
-                    JOIN SourceTag t ON str.tag_id = t.tag_id
-                    WHERE {tag_conditions}
-                    LIMIT :limit OFFSET :offset
-                """)
-                
-                images = session.execute(query, {
-                    **tag_params,
-                    "limit": per_page,
-                    "offset": offset
-                }).fetchall()
-                
-                count_query = text(f"""
-                    SELECT COUNT(DISTINCT si.source_id)
-                    FROM SourceImage si
-                    JOIN Source s ON si.source_id = s.source_id
-                    JOIN SourceTagRelation str ON s.source_id = str.source_id
-                    JOIN SourceTag t ON str.tag_id = t.tag_id
-                    WHERE {tag_conditions}
-                """)
-                total = session.execute(count_query, tag_params).scalar()
-
-                image_list = []
-                for img in images:
-                    image_list.append({
-                        'id': img[0],
-                        'url': img[1],
-                        'name': img[2],
-                        'description': img[3],
-                        'source_type': img[4],
-                        'is_downloaded': img[5],
-                    })
-            
-            return {
-                'total': total,
-                'images': image_list
-            }
-        finally:
-            session.close()
-    
+        return DatabaseAPI._search_images(imgtype, tagli=tagli, page=page, per_page=per_page, cursor=cursor,
+                                          mode=mode, exclude_tags=exclude_tags)
+
     @staticmethod
-    def search_images_by_name_and_tags(name, tagli, imgtype=1, page=1, per_page=100):
+    def search_images_by_name_and_tags(name, tagli, imgtype=1, page=1, per_page=100, cursor=None, order='default',
+                                       mode='any', exclude_tags=None):
         """根据名称和标签搜索图片
         参数：
         - name: 名称
@@ -319,120 +786,18 @@ class DatabaseAPI:
         - imgtype: 1表示角色图片，2表示作品图片
         - page: 页码
         - per_page: 每页数量
-        返回格式: {
-            'total': 总结果数,
-            'images': [
-                {'id': 图片ID, 'url': 图片URL, 'name': 标题, 'description': 描述},
-                ...
-            ]
-        }
+        - cursor: 翻页令牌，给出时忽略page
+        - order: 'default'按ID排序，'relevance'按名称相关度排序
+        - mode: 'any'表示包含任一标签，'all'表示包含全部标签
+        - exclude_tags: 不能包含的标签列表
+        返回格式同search_images_by_name
         """
         print(f"根据名称和标签搜索图片: name={name}, tagli={tagli}, imgtype={imgtype}, page={page}, per_page={per_page}")
-        session = DatabaseAPI.get_session()
-        try:
-            offset = (page - 1) * per_page
-            
-            if imgtype == 1:  # 角色图片
-                # 构建标签条件
-                tag_conditions = " OR ".join([f"t.tag = :tag{i}" for i in range(len(tagli))])
-                tag_params = {f"tag{i}": tag for i, tag in enumerate(tagli)}
-                
-                query = text(f"""
-                    SELECT DISTINCT ri.role_id, ri.image_url, r.name, r.description, ri.is_downloaded, ri.local_path
-                    FROM RoleImage ri
-                    JOIN Role r ON ri.role_id = r.role_id
-                    JOIN RoleTagRelation rtr ON r.role_id = rtr.role_id
-                    JOIN RoleTag t ON rtr.tag_id = t.tag_id
-                    WHERE r.name LIKE :name AND ({tag_conditions})
-                    LIMIT :limit OFFSET :offset
-                """)
-                
-                images = session.execute(query, {
-                    "name": f"%{name}%",
-                    **tag_params,
-                    "limit": per_page,
-                    "offset": offset
-                }).fetchall()
-                
-                count_query = text(f"""
-                    SELECT COUNT(DISTINCT ri.role_id)
-                    FROM RoleImage ri
-                    JOIN Role r ON ri.role_id = r.role_id
-                    JOIN RoleTagRelation rtr ON r.role_id = rtr.role_id
-                    JOIN RoleTag t ON rtr.tag_id = t.tag_id
-                    WHERE r.name LIKE :name AND ({tag_conditions})
-                """)
-                total = session.execute(count_query, {
-                    "name": f"%{name}%",
-                    **tag_params
-                }).scalar()
-                
-                image_list = []
-                for img in images:
-                    image_list.append({
-                        'id': img[0],
-                        'url': img[1],
-                        'name': img[2],
-                        'description': img[3],
-                        'is_downloaded': img[4],
-                        'local_path': img[5]
-                    })
-            
-            else:  # 作品图片
-                # 构建标签条件
-                tag_conditions = " OR ".join([f"t.tag = :tag{i}" for i in range(len(tagli))])
-                tag_params = {f"tag{i}": tag for i, tag in enumerate(tagli)}
-                
-                query = text(f"""
-                    SELECT DISTINCT si.source_id, si.url, s.name, s.description, s.source_type, si.is_downloaded, si.local_path
-                    FROM SourceImage si
-                    JOIN Source s ON si.source_id = s.source_id
-                    JOIN SourceTagRelation str ON s.source_id = str.source_id
-                    JOIN SourceTag t ON str.tag_id = t.tag_id
-                    WHERE s.name LIKE :name AND ({tag_conditions})
-                    LIMIT :limit OFFSET :offset
-                """)
-                
-                images = session.execute(query, {
-                    "name": f"%{name}%",
-                    **tag_params,
-                    "limit": per_page,
-                    "offset": offset
-                }).fetchall()
-                
-                count_query = text(f"""
-                    SELECT COUNT(DISTINCT si.source_id)
-                    FROM SourceImage si
-                    JOIN Source s ON si.source_id = s.source_id
-                    JOIN SourceTagRelation str ON s.source_id = str.source_id
-                    JOIN SourceTag t ON str.tag_id = t.tag_id
-                    WHERE s.name LIKE :name AND ({tag_conditions})
-                """)
-                total = session.execute(count_query, {
-                    "name": f"%{name}%",
-                    **tag_params
-                }).scalar()
-                
-                image_list = []
-                for img in images:
-                    image_list.append({
-                        'id': img[0],
-                        'url': img[1],
-                        'name': img[2],
-                        'description': img[3],
-                        'source_type': img[4],
-                        'is_downloaded': img[5],
-                        'local_path': img[6]
-                    })
-            
-            return {
-                'total': total,
-                'images': image_list
-            }
-        finally:
-            session.close()
+        return DatabaseAPI._search_images(imgtype, name=name, tagli=tagli, order=order, page=page, per_page=per_page,
+                                          cursor=cursor, mode=mode, exclude_tags=exclude_tags)
     
     @staticmethod
+    @cached(_query_cache, ("Role",))
     def get_image_details_role(role_id):
         """获取角色图片详情
         参数：
@@ -464,6 +829,7 @@ class DatabaseAPI:
             session.close()
     
     @staticmethod
+    @cached(_query_cache, ("Role", "RoleImage"))
     def get_image_list_role(role_id):
         """角色id搜角色图片
         参数：
@@ -494,6 +860,7 @@ class DatabaseAPI:
             session.close()
     
     @staticmethod
+    @cached(_query_cache, ("Source",))
     def get_image_details_source(source_id):
         """获取作品详情
         参数：
@@ -527,6 +894,7 @@ class DatabaseAPI:
             session.close()
     
     @staticmethod
+    @cached(_query_cache, ("Source", "SourceImage"))
     def get_image_list_source(source_id):
         """获取作品的所有图片
         参数：
@@ -557,6 +925,7 @@ class DatabaseAPI:
             session.close()
     
     @staticmethod
+    @cached(_query_cache, _tables_of('tag'))
     def get_tags_list(tagtype:int):
         """获取标签列表
         参数：
@@ -577,6 +946,34 @@ class DatabaseAPI:
             session.close()
     
     @staticmethod
+    def complete_tags(tagtype, keyword, limit=TAG_COMPLETION_LIMIT):
+        """标签补全
+        参数：
+        - tagtype: 1表示角色标签，2表示来源标签
+        - keyword: 输入的关键字，为空时返回使用次数最多的标签
+        - limit: 最多返回的数量
+        返回：标签列表；补全索引已构建时返回包含关键字的标签，否则用标签列上的索引返回以关键字开头的标签
+        """
+        name_index = _tag_name_indexes[tagtype]
+        if name_index.ready:
+            return name_index.complete(keyword, limit)
+
+        print(f"标签补全: tagtype={tagtype}, keyword={keyword}")
+        session = DatabaseAPI.get_session()
+        try:
+            query = text(f"""
+                SELECT tag FROM {_TYPE_TABLES[tagtype]['tag']}
+                WHERE tag LIKE :prefix
+                ORDER BY num DESC, tag
+                LIMIT :limit
+            """)
+            tags = session.execute(query, {"prefix": f"{keyword.strip()}%", "limit": limit}).fetchall()
+            return [tag[0] for tag in tags]
+        finally:
+            session.close()
+
+    @staticmethod
+    @cached(_query_cache, _tables_of('tag', 'relation'))
     def get_tags_list_by_id(tagtype, id):
         """获取某个角色或者作品的标签列表
         参数：
@@ -608,6 +1005,7 @@ class DatabaseAPI:
             session.close()
     
     @staticmethod
+    @cached(_query_cache, ("ExternalLinks", "LinksOnPage"))
     def get_external_link_list(source_id):
         """获取外部链接列表
         参数：
@@ -637,6 +1035,7 @@ class DatabaseAPI:
             session.close()
     
     @staticmethod
+    @cached(_query_cache, ("Source", "Role", "RoleSourceRelation"))
     def get_source_of_role(role_id):
         """获取角色的来源作品
         参数：
@@ -667,6 +1066,7 @@ class DatabaseAPI:
             session.close()
     
     @staticmethod
+    @cached(_query_cache, ("Role", "RoleSourceRelation"))
     def get_role_list(source_id):
         """获取作品中的角色
         参数：
@@ -696,6 +1096,117 @@ class DatabaseAPI:
             session.close()
 
     @staticmethod
+    def _json_list(value):
+        """解析JSON_ARRAYAGG的结果，没有匹配行时为NULL"""
+        if value is None:
+            return []
+        return json.loads(value)
+
+    @staticmethod
+    @cached(_query_cache, _tables_of('entity', 'image', 'tag', 'relation',
+                                     extra=("Source", "Role", "RoleSourceRelation", "ExternalLinks", "LinksOnPage")))
+    def get_detail_bundle(ids, imgtype):
+        """一次查询取出详情标签页需要的全部数据
+        图片、标签、关联的作品/角色、外部链接用JSON_ARRAYAGG子查询聚合到同一行
+        参数：
+        - ids: 角色或者作品的ID，也可以是ID列表（同时加载多个标签页）
+        - imgtype: 1表示角色，2表示作品
+        返回：传入单个ID时返回该ID的数据（不存在时返回None）；传入列表时返回 {ID: 数据}，不存在的ID不在其中
+        每份数据包含details、image_li、tags，角色还有sourceli，作品还有external_link_li和roleli
+        """
+        print(f"获取详情数据: ids={ids}, imgtype={imgtype}")
+        single = not isinstance(ids, (list, tuple, set))
+        id_list = [ids] if single else list(ids)
+        if not id_list:
+            return {}
+        session = DatabaseAPI.get_session()
+        try:
+            if imgtype == 1:
+                query = text("""
+                    SELECT r.role_id, r.name, r.gender, r.birthday, r.voice_actor, r.description,
+                        (SELECT JSON_ARRAYAGG(JSON_ARRAY(ri.image_url, ri.is_downloaded, ri.local_path))
+                         FROM RoleImage ri WHERE ri.role_id = r.role_id) AS images,
+                        (SELECT JSON_ARRAYAGG(t.tag)
+                         FROM RoleTag t
+                         JOIN RoleTagRelation rtr ON t.tag_id = rtr.tag_id
+                         WHERE rtr.role_id = r.role_id) AS tags,
+                        (SELECT JSON_ARRAYAGG(JSON_ARRAY(s.source_id, s.name))
+                         FROM Source s
+                         JOIN RoleSourceRelation rsr ON s.source_id = rsr.source_id
+                         WHERE rsr.role_id = r.role_id) AS sources
+                    FROM Role r
+                    WHERE r.role_id IN :ids
+                """)
+            else:
+                query = text("""
+                    SELECT s.source_id, s.name, s.source_type, s.author, s.studio, s.release_date, s.status, s.description,
+                        (SELECT JSON_ARRAYAGG(JSON_ARRAY(si.url, si.is_downloaded, si.local_path))
+                         FROM SourceImage si WHERE si.source_id = s.source_id) AS images,
+                        (SELECT JSON_ARRAYAGG(t.tag)
+                         FROM SourceTag t
+                         JOIN SourceTagRelation str ON t.tag_id = str.tag_id
+                         WHERE str.source_id = s.source_id) AS tags,
+                        (SELECT JSON_ARRAYAGG(JSON_ARRAY(el.title, el.original_url))
+                         FROM ExternalLinks el
+                         JOIN LinksOnPage lop ON el.link_id = lop.link_id
+                         WHERE lop.source_id = s.source_id) AS links,
+                        (SELECT JSON_ARRAYAGG(JSON_ARRAY(r.role_id, r.name))
+                         FROM Role r
+                         JOIN RoleSourceRelation rsr ON r.role_id = rsr.role_id
+                         WHERE rsr.source_id = s.source_id) AS roles
+                    FROM Source s
+                    WHERE s.source_id IN :ids
+                """)
+            query = query.bindparams(bindparam("ids", expanding=True))
+            rows = session.execute(query, {"ids": id_list}).fetchall()
+
+            bundles = {}
+            for row in rows:
+                if imgtype == 1:
+                    bundle = {
+                        'details': {
+                            'id': row[0],
+                            'name': row[1],
+                            'gender': row[2],
+                            'birthday': row[3],
+                            'voice_actor': row[4],
+                            'description': row[5]
+                        },
+                        'sourceli': [{'source_id': source_id, 'name': name}
+                                     for source_id, name in DatabaseAPI._json_list(row[8])]
+                    }
+                    images, tags = row[6], row[7]
+                else:
+                    bundle = {
+                        'details': {
+                            'id': row[0],
+                            'name': row[1],
+                            'source_type': row[2],
+                            'author': row[3],
+                            'studio': row[4],
+                            'release_date': row[5],
+                            'status': row[6],
+                            'description': row[7]
+                        },
+                        'external_link_li': [{'title': title, 'original_url': url}
+                                             for title, url in DatabaseAPI._json_list(row[10])],
+                        'roleli': [{'role_id': role_id, 'name': name}
+                                   for role_id, name in DatabaseAPI._json_list(row[11])]
+                    }
+                    images, tags = row[8], row[9]
+                bundle['image_li'] = [{'url': url, 'is_downloaded': is_downloaded, 'local_path': local_path}
+                                      for url, is_downloaded, local_path in DatabaseAPI._json_list(images)]
+                bundle['tags'] = DatabaseAPI._json_list(tags)
+                bundles[row[0]] = bundle
+
+            if single:
+                return bundles.get(ids)
+            return bundles
+        finally:
+            session.close()
+
+    @staticmethod
+    @invalidates(_query_cache, _tables_of('entity', 'card'))
     def save_details_to_database(details, imgtype):
         """保存数据详情到数据库
         参数：
@@ -708,28 +1219,29 @@ class DatabaseAPI:
         try:
             if imgtype == 1:  # 角色
                 query = text("""
-                    UPDATE Role r
-                    SET r.name = :name,
-                        r.gender = :gender,
-                        r.birthday = :birthday,
-                        r.voice_actor = :voice_actor,
-                        r.description = :description
-                    WHERE r.role_id = :id
+                    UPDATE Role
+                    SET name = :name,
+                        gender = :gender,
+                        birthday = :birthday,
+                        voice_actor = :voice_actor,
+                        description = :description
+                    WHERE role_id = :id
                 """)
             else:  # 作品
                 query = text("""
-                    UPDATE Source s
-                    SET s.name = :name,
-                        s.source_type = :source_type,
-                        s.author = :author,
-                        s.studio = :studio,
-                        s.release_date = :release_date,
-                        s.status = :status,
-                        s.description = :description
-                    WHERE s.source_id = :id
+                    UPDATE Source
+                    SET name = :name,
+                        source_type = :source_type,
+                        author = :author,
+                        studio = :studio,
+                        release_date = :release_date,
+                        status = :status,
+                        description = :description
+                    WHERE source_id = :id
                 """)
             
             result = session.execute(query, details)
+            DatabaseAPI._refresh_cards(session, imgtype, [details['id']])
             session.commit()
             return result.rowcount
         except Exception as e:
@@ -749,133 +1261,246 @@ class DatabaseAPI:
         返回：删除的标签数量
         """
         print(f"删除标签: tags={tags}, id={id}, imgtype={imgtype}")
+        return DatabaseAPI.delete_tags_by_ids(tags, [id], imgtype)
+
+    @staticmethod
+    def add_tags_by_id(tags, id, imgtype):
+        """添加标签
+        参数：
+        - tags: 要添加的标签列表
+        - id: 角色或作品ID
+        - imgtype: 1表示角色图片，2表示作品图片
+        返回：添加的标签数量
+        """
+        print(f"添加图片标签: tags={tags}, id={id}, imgtype={imgtype}")
+        return DatabaseAPI.add_tags_by_ids(tags, [id], imgtype)
+
+    @staticmethod
+    @invalidates(_query_cache, _tables_of('tag', 'relation'))
+    def delete_tags_by_ids(tags, ids, imgtype):
+        """批量删除标签，在一个事务中从所有给出的角色或作品上删除这些标签
+        参数：
+        - tags: 要删除的标签列表
+        - ids: 角色或作品ID列表
+        - imgtype: 1表示角色图片，2表示作品图片
+        返回：删除的关系数量
+        """
+        print(f"批量删除标签: tags={tags}, ids={len(ids)}个, imgtype={imgtype}")
+        ids = list(dict.fromkeys(ids))
+        if not tags or not ids:
+            return 0
+        names = _TYPE_TABLES[imgtype]
         session = DatabaseAPI.get_session()
         try:
-            if imgtype == 1:  # 角色
-                delete_query = text("""
-                    DELETE rtr FROM RoleTagRelation rtr
-                    JOIN RoleTag t ON rtr.tag_id = t.tag_id
-                    WHERE rtr.role_id = :role_id AND t.tag IN :tags
-                """)
-                result = session.execute(delete_query, {
-                    "role_id": id,
-                    "tags": tuple(tags)
-                })
-                
-                # 更新标签数量
-                update_query = text("""
-                    UPDATE RoleTag t
-                    SET t.num = (
-                        SELECT COUNT(*) 
-                        FROM RoleTagRelation rtr 
-                        WHERE rtr.tag_id = t.tag_id
-                    )
-                    WHERE t.tag IN :tags
-                """)
-                session.execute(update_query, {"tags": tuple(tags)})
-                
-            else:  # 作品
-                delete_query = text("""
-                    DELETE str FROM SourceTagRelation str
-                    JOIN SourceTag t ON str.tag_id = t.tag_id
-                    WHERE str.source_id = :source_id AND t.tag IN :tags
-                """)
-                result = session.execute(delete_query, {
-                    "source_id": id,
-                    "tags": tuple(tags)
-                })
-                
-                # 更新标签数量
-                update_query = text("""
-                    UPDATE SourceTag t
-                    SET t.num = (
-                        SELECT COUNT(*) 
-                        FROM SourceTagRelation str 
-                        WHERE str.tag_id = t.tag_id
-                    )
-                    WHERE t.tag IN :tags
-                """)
-                session.execute(update_query, {"tags": tuple(tags)})
-            
+            # 锁住实际存在的关系和对应的标签行，同一标签的计数更新串行执行
+            select_query = text(f"""
+                SELECT rel.{names['key']}, t.tag_id, t.tag
+                FROM {names['tag']} t
+                JOIN {names['relation']} rel ON t.tag_id = rel.tag_id
+                WHERE rel.{names['key']} IN :ids AND t.tag IN :tags
+                FOR UPDATE
+            """).bindparams(bindparam("ids", expanding=True), bindparam("tags", expanding=True))
+            pairs = []
+            for chunk in DatabaseAPI._chunks(ids):
+                pairs += session.execute(select_query, {"ids": chunk, "tags": list(tags)}).fetchall()
+            if not pairs:
+                session.rollback()
+                return 0
+
+            tag_ids = list({tag_id for _, tag_id, _ in pairs})
+            delete_query = text(f"""
+                DELETE FROM {names['relation']}
+                WHERE {names['key']} IN :ids AND tag_id IN :tag_ids
+            """).bindparams(bindparam("ids", expanding=True), bindparam("tag_ids", expanding=True))
+            deleted = 0
+            for chunk in DatabaseAPI._chunks(ids):
+                deleted += session.execute(delete_query, {"ids": chunk, "tag_ids": tag_ids}).rowcount
+
+            # 每个标签按真正删除的关系数减计数
+            deltas = {}
+            for _, tag_id, _ in pairs:
+                deltas[tag_id] = deltas.get(tag_id, 0) - 1
+            DatabaseAPI._apply_tag_deltas(session, imgtype, deltas)
+
+            session.commit()
+            for entity_id, _, tag in pairs:
+                _tag_indexes[imgtype].remove_tags(entity_id, [tag])
+            tag_names = {tag_id: tag for _, tag_id, tag in pairs}
+            DatabaseAPI._adjust_name_index(imgtype, {tag_names[tag_id]: delta for tag_id, delta in deltas.items()})
+            return deleted
+        except Exception as e:
+            session.rollback()
+            print(f"批量删除标签失败: {str(e)}")
+            return 0
+        finally:
+            session.close()
+
+    @staticmethod
+    @invalidates(_query_cache, _tables_of('tag', 'relation'))
+    def add_tags_by_ids(tags, ids, imgtype):
+        """批量添加标签，在一个事务中给所有给出的角色或作品加上这些标签
+        参数：
+        - tags: 要添加的标签列表
+        - ids: 角色或作品ID列表
+        - imgtype: 1表示角色图片，2表示作品图片
+        返回：添加的关系数量
+        """
+        print(f"批量添加标签: tags={tags}, ids={len(ids)}个, imgtype={imgtype}")
+        ids = list(dict.fromkeys(ids))
+        if not tags or not ids:
+            return 0
+        names = _TYPE_TABLES[imgtype]
+        session = DatabaseAPI.get_session()
+        try:
+            # 锁住标签行，同一标签的计数更新串行执行
+            lock_query = text(f"""
+                SELECT tag_id, tag FROM {names['tag']}
+                WHERE tag IN :tags
+                FOR UPDATE
+            """).bindparams(bindparam("tags", expanding=True))
+            tag_rows = session.execute(lock_query, {"tags": list(tags)}).fetchall()
+            if not tag_rows:
+                session.rollback()
+                return 0
+            tag_names = dict(tag_rows)
+            tag_ids = list(tag_names)
+
+            # 找出还没有这些标签的实体（不存在的实体不会被选出）
+            missing_query = text(f"""
+                SELECT e.{names['key']}, t.tag_id
+                FROM {names['entity']} e
+                JOIN {names['tag']} t ON t.tag_id IN :tag_ids
+                WHERE e.{names['key']} IN :ids
+                AND NOT EXISTS (
+                    SELECT 1 FROM {names['relation']} rel
+                    WHERE rel.{names['key']} = e.{names['key']} AND rel.tag_id = t.tag_id
+                )
+            """).bindparams(bindparam("ids", expanding=True), bindparam("tag_ids", expanding=True))
+            pairs = []
+            for chunk in DatabaseAPI._chunks(ids):
+                pairs += session.execute(missing_query, {"ids": chunk, "tag_ids": tag_ids}).fetchall()
+            if not pairs:
+                session.rollback()
+                return 0
+
+            insert_query = text(f"""
+                INSERT INTO {names['relation']} ({names['key']}, tag_id)
+                VALUES (:id, :tag_id)
+            """)
+            session.execute(insert_query, [{"id": entity_id, "tag_id": tag_id} for entity_id, tag_id in pairs])
+
+            # 每个标签按真正插入的关系数加计数
+            deltas = {}
+            for _, tag_id in pairs:
+                deltas[tag_id] = deltas.get(tag_id, 0) + 1
+            DatabaseAPI._apply_tag_deltas(session, imgtype, deltas)
+
             session.commit()
-            return result.rowcount
+            for entity_id, tag_id in pairs:
+                _tag_indexes[imgtype].add_tags(entity_id, [tag_names[tag_id]])
+            DatabaseAPI._adjust_name_index(imgtype, {tag_names[tag_id]: delta for tag_id, delta in deltas.items()})
+            return len(pairs)
         except Exception as e:
             session.rollback()
-            print(f"删除标签失败: {str(e)}")
+            print(f"批量添加标签失败: {str(e)}")
             return 0
         finally:
             session.close()
 
     @staticmethod
-    def add_tags_by_id(tags, id, imgtype):
-        """添加标签
-        参数：
-        - tags: 要添加的标签列表
-        - id: 角色或作品ID
-        - imgtype: 1表示角色图片，2表示作品图片
-        返回：添加的标签数量
+    def _chunks(ids, size=1000):
+        """把很长的ID列表拆成多段，避免单条语句的IN列表过长"""
+        for i in range(0, len(ids), size):
+            yield ids[i:i + size]
+
+    @staticmethod
+    def _adjust_tag_counts(session, imgtype, tag_ids, delta):
+        """按差值更新标签计数，在调用方的事务中执行
+        tag_ids中的每个标签都加上delta
         """
-        print(f"添加图片标签: tags={tags}, id={id}, imgtype={imgtype}")
+        if not tag_ids:
+            return
+        query = text(f"""
+            UPDATE {_TYPE_TABLES[imgtype]['tag']}
+            SET num = num + :delta
+            WHERE tag_id IN :tag_ids
+        """).bindparams(bindparam("tag_ids", expanding=True))
+        session.execute(query, {"delta": delta, "tag_ids": list(tag_ids)})
+
+    @staticmethod
+    def _apply_tag_deltas(session, imgtype, deltas):
+        """按 {标签ID: 差值} 更新标签计数，差值相同的标签合并成一条UPDATE"""
+        by_delta = {}
+        for tag_id, delta in deltas.items():
+            if delta:
+                by_delta.setdefault(delta, []).append(tag_id)
+        for delta, tag_ids in by_delta.items():
+            DatabaseAPI._adjust_tag_counts(session, imgtype, tag_ids, delta)
+
+    @staticmethod
+    def _adjust_name_index(imgtype, deltas):
+        """事务提交后，按 {标签: 差值} 更新标签补全索引中的使用次数"""
+        for tag, delta in deltas.items():
+            _tag_name_indexes[imgtype].adjust(tag, delta)
+
+    @staticmethod
+    def _sync_name_index(session, imgtype, tag_ids):
+        """事务提交后，从标签表读取这些标签的计数写入标签补全索引（重新计数之后调用）"""
+        query = text(f"""
+            SELECT tag, num FROM {_TYPE_TABLES[imgtype]['tag']}
+            WHERE tag_id IN :tag_ids
+        """).bindparams(bindparam("tag_ids", expanding=True))
+        for chunk in DatabaseAPI._chunks(list(tag_ids)):
+            _tag_name_indexes[imgtype].set_nums(session.execute(query, {"tag_ids": chunk}).fetchall())
+
+    @staticmethod
+    def reconcile_tag_counts(imgtype=None):
+        """用关系表一次性校正所有标签计数，imgtype为空时两种都校正
+        返回 {imgtype: {'checked': 标签数, 'fixed': 校正的标签数, 'drift': 计数偏差总和, 'samples': 前10个偏差}}
+        """
+        report = {}
         session = DatabaseAPI.get_session()
         try:
-            if imgtype == 1:  # 角色图片
-                insert_query = text("""
-                    INSERT IGNORE INTO RoleTagRelation (role_id, tag_id)
-                    SELECT :role_id, t.tag_id
-                    FROM RoleTag t
-                    WHERE t.tag IN :tags
-                """)
-                result = session.execute(insert_query, {
-                    "role_id": id,
-                    "tags": tuple(tags)
-                })
-                
-                # 更新标签数量
-                update_query = text("""
-                    UPDATE RoleTag t
-                    SET t.num = (
-                        SELECT COUNT(*) 
-                        FROM RoleTagRelation rtr 
-                        WHERE rtr.tag_id = t.tag_id
-                    )
-                    WHERE t.tag IN :tags
-                """)
-                session.execute(update_query, {"tags": tuple(tags)})
-                
-            else:  # 作品图片
-                insert_query = text("""
-                    INSERT IGNORE INTO SourceTagRelation (source_id, tag_id)
-                    SELECT :source_id, t.tag_id
-                    FROM SourceTag t
-                    WHERE t.tag IN :tags
-                """)
-                result = session.execute(insert_query, {
-                    "source_id": id,
-                    "tags": tuple(tags)
-                })
-                
-                # 更新标签数量
-                update_query = text("""
-                    UPDATE SourceTag t
-                    SET t.num = (
-                        SELECT COUNT(*) 
-                        FROM SourceTagRelation str 
-                        WHERE str.tag_id = t.tag_id
-                    )
-                    WHERE t.tag IN :tags
-                """)
-                session.execute(update_query, {"tags": tuple(tags)})
-            
-            session.commit()
-            return result.rowcount
+            for t in ([imgtype] if imgtype else [1, 2]):
+                names = _TYPE_TABLES[t]
+                actual_counts = f"""
+                    LEFT JOIN (
+                        SELECT tag_id, COUNT(*) AS cnt
+                        FROM {names['relation']}
+                        GROUP BY tag_id
+                    ) c ON t.tag_id = c.tag_id
+                """
+                checked = session.execute(text(f"SELECT COUNT(*) FROM {names['tag']}")).scalar()
+                drifted = session.execute(text(f"""
+                    SELECT t.tag_id, t.tag, t.num, COALESCE(c.cnt, 0) AS actual
+                    FROM {names['tag']} t
+                    {actual_counts}
+                    WHERE t.num <> COALESCE(c.cnt, 0)
+                    ORDER BY ABS(t.num - COALESCE(c.cnt, 0)) DESC
+                """)).fetchall()
+                if drifted:
+                    DatabaseAPI._recount_tags(session, t, [tag_id for tag_id, _, _, _ in drifted])
+                session.commit()
+                _tag_name_indexes[t].set_nums([(tag, actual) for _, tag, _, actual in drifted])
+                report[t] = {
+                    'checked': checked,
+                    'fixed': len(drifted),
+                    'drift': sum(abs(num - actual) for _, _, num, actual in drifted),
+                    'samples': [(tag, num, actual) for _, tag, num, actual in drifted[:10]]
+                }
+                print(f"标签计数校正: imgtype={t}, {report[t]}")
+            if any(r['fixed'] for r in report.values()):
+                _query_cache.invalidate([_TYPE_TABLES[t]['tag'] for t in report])
+            return report
         except Exception as e:
             session.rollback()
-            print(f"添加标签失败: {str(e)}")
-            return 0
+            print(f"标签计数校正失败: {str(e)}")
+            return report
         finally:
             session.close()
 
     @staticmethod
+    @invalidates(_query_cache, _tables_of('entity', 'image', 'card', 'tag', 'relation', extra=("RoleSourceRelation", "LinksOnPage")))
     def delete_by_id(id, imgtype):
         """删除角色或作品及其关联数据
         参数：
@@ -898,33 +1523,27 @@ class DatabaseAPI:
                 if not role_ids:
                     return []
                 
-                # 获取该角色关联的所有标签ID，用于后续更新标签数量
+                # 获取并锁住该角色关联的所有标签ID，用于后续更新标签数量
                 tag_query = text("""
-                    SELECT DISTINCT t.tag_id
+                    SELECT DISTINCT t.tag_id, t.tag
                     FROM RoleTag t
                     JOIN RoleTagRelation rtr ON t.tag_id = rtr.tag_id
                     WHERE rtr.role_id = :role_id
+                    FOR UPDATE
                 """)
-                tag_ids = [row[0] for row in session.execute(tag_query, {"role_id": id}).fetchall()]
+                tag_rows = session.execute(tag_query, {"role_id": id}).fetchall()
+                tag_ids = [row[0] for row in tag_rows]
                 
                 # 删除角色及其关联数据
                 delete_role = text("DELETE FROM Role WHERE role_id = :role_id")
                 session.execute(delete_role, {"role_id": id})
                 
-                # 更新相关标签的数量
-                if tag_ids:
-                    update_tag_query = text("""
-                        UPDATE RoleTag t
-                        SET t.num = (
-                            SELECT COUNT(*) 
-                            FROM RoleTagRelation rtr 
-                            WHERE rtr.tag_id = t.tag_id
-                        )
-                        WHERE t.tag_id IN :tag_ids
-                    """)
-                    session.execute(update_tag_query, {"tag_ids": tuple(tag_ids)})
+                # 关系随角色级联删除，每个标签恰好少一条关系
+                DatabaseAPI._adjust_tag_counts(session, 1, tag_ids, -1)
                 
                 session.commit()
+                _tag_indexes[imgtype].remove_entity(id)
+                DatabaseAPI._adjust_name_index(imgtype, {tag: -1 for _, tag in tag_rows})
                 return role_ids
                 
             else:  # 作品
@@ -937,33 +1556,27 @@ class DatabaseAPI:
                 """)
                 role_ids = [row[0] for row in session.execute(role_query, {"source_id": id}).fetchall()]
                 
-                # 获取该作品关联的所有标签ID，用于后续更新标签数量
+                # 获取并锁住该作品关联的所有标签ID，用于后续更新标签数量
                 tag_query = text("""
-                    SELECT DISTINCT t.tag_id
+                    SELECT DISTINCT t.tag_id, t.tag
                     FROM SourceTag t
                     JOIN SourceTagRelation str ON t.tag_id = str.tag_id
                     WHERE str.source_id = :source_id
+                    FOR UPDATE
                 """)
-                tag_ids = [row[0] for row in session.execute(tag_query, {"source_id": id}).fetchall()]
+                tag_rows = session.execute(tag_query, {"source_id": id}).fetchall()
+                tag_ids = [row[0] for row in tag_rows]
                 
                 # 删除作品及其关联数据
                 delete_source = text("DELETE FROM Source WHERE source_id = :source_id")
                 session.execute(delete_source, {"source_id": id})
                 
-                # 更新相关标签的数量
-                if tag_ids:
-                    update_tag_query = text("""
-                        UPDATE SourceTag t
-                        SET t.num = (
-                            SELECT COUNT(*) 
-                            FROM SourceTagRelation str 
-                            WHERE str.tag_id = t.tag_id
-                        )
-                        WHERE t.tag_id IN :tag_ids
-                    """)
-                    session.execute(update_tag_query, {"tag_ids": tuple(tag_ids)})
+                # 关系随作品级联删除，每个标签恰好少一条关系
+                DatabaseAPI._adjust_tag_counts(session, 2, tag_ids, -1)
                 
                 session.commit()
+                _tag_indexes[imgtype].remove_entity(id)
+                DatabaseAPI._adjust_name_index(imgtype, {tag: -1 for _, tag in tag_rows})
                 return role_ids
                 
         except Exception as e:
@@ -974,112 +1587,196 @@ class DatabaseAPI:
             session.close()
 
     @staticmethod
-    def get_all_tags_and_num(imgtype, page, per_page):
-        """获取所有标签及其数量
+    @invalidates(_query_cache, _tables_of('entity', 'image', 'card', 'tag', 'relation', extra=("RoleSourceRelation", "LinksOnPage")))
+    def delete_by_ids(ids, imgtype, chunk_size=200):
+        """批量删除角色或作品及其关联数据
+        按chunk_size分批删除，每批一个事务，避免长时间持有大量行锁；
+        全部删除完后对涉及的标签统一重新计数一次
+        参数：
+        - ids: 角色或作品ID列表
+        - imgtype: 1表示角色，2表示作品
+        - chunk_size: 每个事务删除的数量
+        返回：实际删除的角色或作品ID列表
+        """
+        print(f"批量删除条目: ids={len(ids)}个, imgtype={imgtype}")
+        names = _TYPE_TABLES[imgtype]
+        ids = list(dict.fromkeys(ids))
+        removed = []
+        affected_tags = set()
+        session = DatabaseAPI.get_session()
+        try:
+            exist_query = text(f"""
+                SELECT {names['key']} FROM {names['entity']}
+                WHERE {names['key']} IN :ids
+            """).bindparams(bindparam("ids", expanding=True))
+            tag_query = text(f"""
+                SELECT DISTINCT tag_id FROM {names['relation']}
+                WHERE {names['key']} IN :ids
+            """).bindparams(bindparam("ids", expanding=True))
+            delete_query = text(f"""
+                DELETE FROM {names['entity']}
+                WHERE {names['key']} IN :ids
+            """).bindparams(bindparam("ids", expanding=True))
+            for chunk in DatabaseAPI._chunks(ids, chunk_size):
+                try:
+                    chunk_ids = [row[0] for row in session.execute(exist_query, {"ids": chunk}).fetchall()]
+                    if not chunk_ids:
+                        continue
+                    tag_ids = [row[0] for row in session.execute(tag_query, {"ids": chunk_ids}).fetchall()]
+                    # 图片、标签关系、作品角色关系、外部链接关系随外键级联删除
+                    session.execute(delete_query, {"ids": chunk_ids})
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    print(f"批量删除失败: {str(e)}")
+                    break
+                removed += chunk_ids
+                affected_tags.update(tag_ids)
+                for entity_id in chunk_ids:
+                    _tag_indexes[imgtype].remove_entity(entity_id)
+
+            if affected_tags:
+                try:
+                    DatabaseAPI._recount_tags(session, imgtype, list(affected_tags))
+                    session.commit()
+                    DatabaseAPI._sync_name_index(session, imgtype, affected_tags)
+                except Exception as e:
+                    # 计数可以之后用reconcile_tag_counts修复
+                    session.rollback()
+                    print(f"重新计数标签失败: {str(e)}")
+            return removed
+        finally:
+            session.close()
+
+    @staticmethod
+    def _recount_tags(session, imgtype, tag_ids):
+        """按关系表重新计算这些标签的计数，在调用方的事务中执行"""
+        names = _TYPE_TABLES[imgtype]
+        if DatabaseAPI._backend == SQLITE:
+            query = text(f"""
+                UPDATE {names['tag']}
+                SET num = (
+                    SELECT COUNT(*) FROM {names['relation']} rel
+                    WHERE rel.tag_id = {names['tag']}.tag_id
+                )
+                WHERE tag_id IN :tag_ids
+            """).bindparams(bindparam("tag_ids", expanding=True))
+            for chunk in DatabaseAPI._chunks(tag_ids):
+                session.execute(query, {"tag_ids": chunk})
+            return
+        query = text(f"""
+            UPDATE {names['tag']} t
+            LEFT JOIN (
+                SELECT tag_id, COUNT(*) AS cnt
+                FROM {names['relation']}
+                WHERE tag_id IN :tag_ids
+                GROUP BY tag_id
+            ) c ON t.tag_id = c.tag_id
+            SET t.num = COALESCE(c.cnt, 0)
+            WHERE t.tag_id IN :tag_ids
+        """).bindparams(bindparam("tag_ids", expanding=True))
+        for chunk in DatabaseAPI._chunks(tag_ids):
+            session.execute(query, {"tag_ids": chunk})
+
+    @staticmethod
+    def _browse_tags(imgtype, tagname=None, page=1, per_page=60, cursor=None):
+        """标签页的标签列表，按使用次数从多到少排列
         参数：
         - imgtype: 1表示角色标签，2表示来源标签
-        - page: 页码
+        - tagname: 标签名关键字，为空时列出全部标签
+        - page: 页码（没有cursor时使用）
         - per_page: 每页数量
-        返回：标签列表和总数
+        - cursor: 上一次结果中的next_cursor/prev_cursor，给出时使用keyset翻页
+        返回：{'total': 总数, 'tags_and_nums': [{'tag', 'num'}], 'next_cursor', 'prev_cursor'}
         """
-        print(f"获取所有标签: imgtype={imgtype}, page={page}, per_page={per_page}")
+        spec = _TAG_QUERY[imgtype]
+        conditions = []
+        params = {}
+        DatabaseAPI._append_name_condition(spec, conditions, params, tagname)
+
+        keys, descending = spec['keys'], True
+        direction = 'next'
+        values = None
+        if cursor:
+            values, direction = _decode_cursor(cursor)
+        scan_descending = descending != (direction == 'prev')
+
+        page_conditions = list(conditions)
+        page_params = dict(params)
+        if cursor:
+            seek_sql, seek_params = _seek_condition(keys, values, scan_descending)
+            page_conditions.append(seek_sql)
+            page_params.update(seek_params)
+        where = f"WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+        order_by = ", ".join(f"{column} {'DESC' if scan_descending else 'ASC'}" for column, _ in keys)
+        page_params['limit'] = per_page
+        if cursor:
+            limit = "LIMIT :limit"
+        else:
+            limit = "LIMIT :limit OFFSET :offset"
+            page_params['offset'] = (page - 1) * per_page
+
+        # 总数按过滤条件缓存，翻页时不再重复COUNT
+        count_key = ('_tag_total', imgtype, tagname or "")
+        total_cached, total = _query_cache.get(count_key)
+        count_generations = _query_cache.generations((spec['table'],))
+
         session = DatabaseAPI.get_session()
         try:
-            offset = (page - 1) * per_page
-            
-            if imgtype == 1:
-                # 获取角色标签
-                query = text("""
-                    SELECT tag, num
-                    FROM RoleTag
-                    ORDER BY num DESC
-                    LIMIT :limit OFFSET :offset
-                """)
-                count_query = text("SELECT COUNT(*) FROM RoleTag")
-            else:
-                # 获取来源标签
-                query = text("""
-                    SELECT tag, num
-                    FROM SourceTag
-                    ORDER BY num DESC
-                    LIMIT :limit OFFSET :offset
-                """)
-                count_query = text("SELECT COUNT(*) FROM SourceTag")
-            
-            tags = session.execute(query, {
-                "limit": per_page,
-                "offset": offset
-            }).fetchall()
-            
-            total = session.execute(count_query).scalar()
-            
-            return {
-                'total': total,
-                'tags_and_nums': [{'tag': tag[0], 'num': tag[1]} for tag in tags]
-            }
+            rows = session.execute(text(f"""
+                SELECT tag, num
+                FROM {spec['table']}
+                {where}
+                ORDER BY {order_by}
+                {limit}
+            """), page_params).fetchall()
+            if not total_cached:
+                where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                total = session.execute(text(f"SELECT COUNT(*) FROM {spec['table']} {where}"), params).scalar()
+                _query_cache.set(count_key, total, (spec['table'],), generations=count_generations)
         finally:
             session.close()
 
+        if direction == 'prev':
+            rows = list(reversed(rows))
+        return {
+            'total': total,
+            'tags_and_nums': [{'tag': row[0], 'num': row[1]} for row in rows],
+            'next_cursor': _encode_cursor([rows[-1][1], rows[-1][0]], 'next') if rows else None,
+            'prev_cursor': _encode_cursor([rows[0][1], rows[0][0]], 'prev') if rows else None
+        }
+
+    @staticmethod
+    @cached(_query_cache, _tables_of('tag'))
+    def get_all_tags_and_num(imgtype, page, per_page, cursor=None):
+        """获取所有标签及其数量
+        参数：
+        - imgtype: 1表示角色标签，2表示来源标签
+        - page: 页码
+        - per_page: 每页数量
+        - cursor: 相邻页的翻页令牌，给出时按keyset翻页
+        返回：标签列表、总数和相邻页的翻页令牌
+        """
+        print(f"获取所有标签: imgtype={imgtype}, page={page}, per_page={per_page}")
+        return DatabaseAPI._browse_tags(imgtype, page=page, per_page=per_page, cursor=cursor)
+
     @staticmethod
-    def get_all_tags_and_num_by_name(imgtype, tagname, page, per_page):
+    @cached(_query_cache, _tables_of('tag'))
+    def get_all_tags_and_num_by_name(imgtype, tagname, page, per_page, cursor=None):
         """根据名称搜索标签及其数量
         参数：
         - imgtype: 1表示角色标签，2表示来源标签
         - tagname: 标签名称
         - page: 页码
         - per_page: 每页数量
-        返回：标签列表和总数
+        - cursor: 相邻页的翻页令牌，给出时按keyset翻页
+        返回：标签列表、总数和相邻页的翻页令牌
         """
         print(f"搜索标签: imgtype={imgtype}, tagname={tagname}, page={page}, per_page={per_page}")
-        session = DatabaseAPI.get_session()
-        try:
-            offset = (page - 1) * per_page
-            
-            if imgtype == 1:
-                # 搜索角色标签
-                query = text("""
-                    SELECT tag, num
-                    FROM RoleTag
-                    WHERE tag LIKE :tagname
-                    ORDER BY num DESC
-                    LIMIT :limit OFFSET :offset
-                """)
-                count_query = text("""
-                    SELECT COUNT(*)
-                    FROM RoleTag
-                    WHERE tag LIKE :tagname
-                """)
-            else:
-                # 搜索来源标签
-                query = text("""
-                    SELECT tag, num
-                    FROM SourceTag
-                    WHERE tag LIKE :tagname
-                    ORDER BY num DESC
-                    LIMIT :limit OFFSET :offset
-                """)
-                count_query = text("""
-                    SELECT COUNT(*)
-                    FROM SourceTag
-                    WHERE tag LIKE :tagname
-                """)
-            
-            tags = session.execute(query, {
-                "tagname": f"%{tagname}%",
-                "limit": per_page,
-                "offset": offset
-            }).fetchall()
-            
-            total = session.execute(count_query, {"tagname": f"%{tagname}%"}).scalar()
-            
-            return {
-                'total': total,
-                'tags_and_nums': [{'tag': tag[0], 'num': tag[1]} for tag in tags]
-            }
-        finally:
-            session.close()
+        return DatabaseAPI._browse_tags(imgtype, tagname, page=page, per_page=per_page, cursor=cursor)
 
     @staticmethod
+    @cached(_query_cache, _tables_of('tag'))
     def check_tag_exist(imgtype, tagname):
         """检查标签是否存在
         参数：
@@ -1101,6 +1798,7 @@ class DatabaseAPI:
             session.close()
 
     @staticmethod
+    @invalidates(_query_cache, _tables_of('tag'))
     def add_tag(imgtype, tagname):
         """添加标签
         参数：
@@ -1125,6 +1823,8 @@ class DatabaseAPI:
             try:
                 session.execute(query, {"tag": tagname})
                 session.commit()
+                _tag_indexes[imgtype].drop_tag(tagname)
+                _tag_name_indexes[imgtype].add(tagname)
                 return True
             except Exception as e:
                 session.rollback()
@@ -1134,6 +1834,7 @@ class DatabaseAPI:
             session.close()
 
     @staticmethod
+    @invalidates(_query_cache, _tables_of('tag', 'relation'))
     def delete_tag(imgtype, tagname):
         """删除标签
         参数：
@@ -1147,9 +1848,8 @@ class DatabaseAPI:
             if imgtype == 1:
                 # 首先删除所有关联关系
                 delete_relations = text("""
-                    DELETE rtr FROM RoleTagRelation rtr
-                    JOIN RoleTag t ON rtr.tag_id = t.tag_id
-                    WHERE t.tag = :tag
+                    DELETE FROM RoleTagRelation
+                    WHERE tag_id IN (SELECT tag_id FROM RoleTag WHERE tag = :tag)
                 """)
                 session.execute(delete_relations, {"tag": tagname})
                 
@@ -1160,9 +1860,8 @@ class DatabaseAPI:
             else:
                 # 首先删除所有关联关系
                 delete_relations = text("""
-                    DELETE str FROM SourceTagRelation str
-                    JOIN SourceTag t ON str.tag_id = t.tag_id
-                    WHERE t.tag = :tag
+                    DELETE FROM SourceTagRelation
+                    WHERE tag_id IN (SELECT tag_id FROM SourceTag WHERE tag = :tag)
                 """)
                 session.execute(delete_relations, {"tag": tagname})
                 
@@ -1171,6 +1870,8 @@ class DatabaseAPI:
                 result = session.execute(delete_tag, {"tag": tagname})
             
             session.commit()
+            _tag_indexes[imgtype].drop_tag(tagname)
+            _tag_name_indexes[imgtype].remove(tagname)
             return result.rowcount > 0
         except Exception as e:
             session.rollback()
@@ -1180,6 +1881,7 @@ class DatabaseAPI:
             session.close()
 
     @staticmethod
+    @cached(_query_cache, _tables_of('entity'))
     def test_exist_by_id(id, imgtype):
         """检查是否存在
         参数：
@@ -1201,6 +1903,7 @@ class DatabaseAPI:
             session.close()
 
     @staticmethod
+    @invalidates(_query_cache, ("Spider",))
     def add_spider(name, bangumi_idlist, download_to_local):
         """添加爬虫数据
         参数：
@@ -1234,6 +1937,7 @@ class DatabaseAPI:
             session.close()
 
     @staticmethod
+    @cached(_query_cache, ("Spider",))
     def get_all_spiders_and_status(page, per_page):
         """获取爬虫列表
         参数：
@@ -1276,6 +1980,7 @@ class DatabaseAPI:
             session.close()
 
     @staticmethod
+    @invalidates(_query_cache, ("Spider",))
     def expire_spider(name):
         """删除爬虫
         参数：
@@ -1314,6 +2019,7 @@ class DatabaseAPI:
             session.close()
 
     @staticmethod
+    @invalidates(_query_cache, ("Spider",))
     def resume_spider(name):
         """激活爬虫
         参数：
@@ -1352,6 +2058,7 @@ class DatabaseAPI:
             session.close()
 
     @staticmethod
+    @invalidates(_query_cache, ("Spider",))
     def pause_spider(name):
         """暂停爬虫
         参数：
@@ -1390,266 +2097,67 @@ class DatabaseAPI:
             session.close()
 
     @staticmethod
-    def search_images_by_name_order_by_time(name, page=1, per_page=100):
-        """用角色/作品名搜图片
+    def search_images_by_name_order_by_time(name, page=1, per_page=100, cursor=None):
+        """用作品名搜图片，按发布日期倒序
         参数：
-        - name: 角色/作品名
+        - name: 作品名
         - page: 页码
         - per_page: 每页数量
-        返回格式: {
-            'total': 总结果数,
-            'images': [
-                {'id': 图片ID, 'url': 图片URL, 'name': 标题, 'description': 描述},
-                ...
-            ]
-        }
+        - cursor: 翻页令牌，给出时忽略page
+        返回格式同search_images_by_name
         """
         print(f"搜索图片: name={name}, page={page}, per_page={per_page}")
-        session = DatabaseAPI.get_session()
-        try:
-            offset = (page - 1) * per_page
-
-            query = text("""
-                SELECT si.source_id, si.url, s.name, s.description, s.source_type, si.is_downloaded, si.local_path, s.release_date
-                FROM SourceImage si
-                JOIN Source s ON si.source_id = s.source_id
-                WHERE s.name LIKE :name
-                ORDER BY s.release_date DESC
-                LIMIT :limit OFFSET :offset
-                """)
-            images = session.execute(query, {
-                "name": f"%{name}%",
-                "limit": per_page,
-                "offset": offset
-            }).fetchall()
-
-            count_query = text("""
-                SELECT COUNT(*) 
-                FROM SourceImage si
-                JOIN Source s ON si.source_id = s.source_id
-                WHERE s.name LIKE :name
-            """)
-            total = session.execute(count_query, {"name": f"%{name}%"}).scalar()
-
-            image_list = []
-            for img in images:
-                image_list.append({
-                    'id': img[0],
-                    'url': img[1],
-                    'name': img[2],
-                    'description': img[3],
-                    'source_type': img[4],
-                    'is_downloaded': img[5],
-                    'local_path': img[6]
-                })
-
-            return {
-                'total': total,
-                'images': image_list
-            }
-        finally:
-            session.close()
+        return DatabaseAPI._search_images(2, name=name, order='time', page=page, per_page=per_page, cursor=cursor)
 
     @staticmethod
-    def fetch_all_images_order_by_time(page=1, per_page=100):
-        """获取所有图片
+    def fetch_all_images_order_by_time(page=1, per_page=100, cursor=None):
+        """获取所有作品图片，按发布日期倒序
         参数：
         - page: 页码
         - per_page: 每页数量
-        返回格式: {
-            'total': 总结果数,
-            'images': [
-                {'id': 图片ID, 'url': 图片URL, 'name': 标题, 'description': 描述},
-                ...
-            ]
-        }
+        - cursor: 翻页令牌，给出时忽略page
+        返回格式同search_images_by_name
         """
         print(f"获取所有图片: page={page}, per_page={per_page}")
-        session = DatabaseAPI.get_session()
-        try:
-            offset = (page - 1) * per_page
-
-            query = text("""
-                SELECT si.source_id, si.url, s.name, s.description, s.source_type, si.is_downloaded, si.local_path, s.release_date
-                FROM SourceImage si
-                JOIN Source s ON si.source_id = s.source_id
-                ORDER BY s.release_date DESC
-                LIMIT :limit OFFSET :offset
-            """)
-            images = session.execute(query, {
-                "limit": per_page,
-                "offset": offset
-            }).fetchall()
-
-            count_query = text("SELECT COUNT(*) FROM SourceImage")
-            total = session.execute(count_query).scalar()
-
-            image_list = []
-            for img in images:
-                image_list.append({
-                    'id': img[0],
-                    'url': img[1],
-                    'name': img[2],
-                    'description': img[3],
-                    'source_type': img[4],
-                    'is_downloaded': img[5],
-                    'local_path': img[6]
-                })
-
-            return {
-                'total': total,
-                'images': image_list
-            }
-        finally:
-            session.close()
+        return DatabaseAPI._search_images(2, order='time', page=page, per_page=per_page, cursor=cursor)
 
     @staticmethod
-    def search_images_by_tags_order_by_time(tagli, page=1, per_page=100):
-        """用标签搜索图片
+    def search_images_by_tags_order_by_time(tagli, page=1, per_page=100, cursor=None, mode='any', exclude_tags=None):
+        """用标签搜索作品图片，按发布日期倒序
         参数：
         - tagli: 标签列表
         - page: 页码
         - per_page: 每页数量
-        返回格式: {
-            'total': 总结果数,
-            'images': [
-                {'id': 图片ID, 'url': 图片URL, 'name': 标题, 'description': 描述},
-                ...
-            ]
-        }
+        - cursor: 翻页令牌，给出时忽略page
+        - mode: 'any'表示包含任一标签，'all'表示包含全部标签
+        - exclude_tags: 不能包含的标签列表
+        返回格式同search_images_by_name
         """
         print(f"根据标签搜索图片: tagli={tagli}, page={page}, per_page={per_page}")
-        session = DatabaseAPI.get_session()
-        try:
-            offset = (page - 1) * per_page
-
-            # 构建标签条件
-            tag_conditions = " OR ".join([f"t.tag = :tag{i}" for i in range(len(tagli))])
-            tag_params = {f"tag{i}": tag for i, tag in enumerate(tagli)}
-
-            query = text(f"""
-                SELECT si.source_id, si.url, s.name, s.description, s.source_type, si.is_downloaded, si.local_path, s.release_date
-                FROM SourceImage si
-                JOIN Source s ON si.source_id = s.source_id
-                JOIN SourceTagRelation str ON s.source_id = str.source_id
-                JOIN SourceTag t ON str.tag_id = t.tag_id
-                WHERE {tag_conditions}
-                ORDER BY s.release_date DESC
-                LIMIT :limit OFFSET :offset
-            """)
-
-            images = session.execute(query, {
-                **tag_params,
-                "limit": per_page,
-                "offset": offset
-            }).fetchall()
-
-            count_query = text(f"""
-                SELECT COUNT(DISTINCT si.source_id)
-                FROM SourceImage si
-                JOIN Source s ON si.source_id = s.source_id
-                JOIN SourceTagRelation str ON s.source_id = str.source_id
-                JOIN SourceTag t ON str.tag_id = t.tag_id
-                WHERE {tag_conditions}
-            """)
-            total = session.execute(count_query, tag_params).scalar()
-
-            image_list = []
-            for img in images:
-                image_list.append({
-                    'id': img[0],
-                    'url': img[1],
-                    'name': img[2],
-                    'description': img[3],
-                    'source_type': img[4],
-                    'is_downloaded': img[5],
-                    'local_path': img[6]
-                })
-
-            return {
-                'total': total,
-                'images': image_list
-            }
-        finally:
-            session.close()
+        return DatabaseAPI._search_images(2, tagli=tagli, order='time', page=page, per_page=per_page, cursor=cursor,
+                                          mode=mode, exclude_tags=exclude_tags)
 
     @staticmethod
-    def search_images_by_name_and_tags_order_by_time(name, tagli, page=1, per_page=100):
-        """根据名称和标签搜索图片
+    def search_images_by_name_and_tags_order_by_time(name, tagli, page=1, per_page=100, cursor=None,
+                                                     mode='any', exclude_tags=None):
+        """根据名称和标签搜索作品图片，按发布日期倒序
         参数：
         - name: 名称
         - tagli: 标签列表
         - page: 页码
         - per_page: 每页数量
-        返回格式: {
-            'total': 总结果数,
-            'images': [
-                {'id': 图片ID, 'url': 图片URL, 'name': 标题, 'description': 描述},
-                ...
-            ]
-        }
+        - cursor: 翻页令牌，给出时忽略page
+        - mode: 'any'表示包含任一标签，'all'表示包含全部标签
+        - exclude_tags: 不能包含的标签列表
+        返回格式同search_images_by_name
         """
         print(
             f"根据名称和标签搜索图片: name={name}, tagli={tagli}, page={page}, per_page={per_page}")
-        session = DatabaseAPI.get_session()
-        try:
-            offset = (page - 1) * per_page
-
-            # 构建标签条件
-            tag_conditions = " OR ".join([f"t.tag = :tag{i}" for i in range(len(tagli))])
-            tag_params = {f"tag{i}": tag for i, tag in enumerate(tagli)}
-
-            query = text(f"""
-                SELECT si.source_id, si.url, s.name, s.description, s.source_type, si.is_downloaded, si.local_path, s.release_date
-                FROM SourceImage si
-                JOIN Source s ON si.source_id = s.source_id
-                JOIN SourceTagRelation str ON s.source_id = str.source_id
-                JOIN SourceTag t ON str.tag_id = t.tag_id
-                WHERE s.name LIKE :name AND ({tag_conditions})
-                ORDER BY s.release_date DESC
-                LIMIT :limit OFFSET :offset
-            """)
-
-            images = session.execute(query, {
-                "name": f"%{name}%",
-                **tag_params,
-                "limit": per_page,
-                "offset": offset
-            }).fetchall()
-
-            count_query = text(f"""
-                SELECT COUNT(DISTINCT si.source_id)
-                FROM SourceImage si
-                JOIN Source s ON si.source_id = s.source_id
-                JOIN SourceTagRelation str ON s.source_id = str.source_id
-                JOIN SourceTag t ON str.tag_id = t.tag_id
-                WHERE s.name LIKE :name AND ({tag_conditions})
-            """)
-            total = session.execute(count_query, {
-                "name": f"%{name}%",
-                **tag_params
-            }).scalar()
-
-            image_list = []
-            for img in images:
-                image_list.append({
-                    'id': img[0],
-                    'url': img[1],
-                    'name': img[2],
-                    'description': img[3],
-                    'source_type': img[4],
-                    'is_downloaded': img[5],
-                    'local_path': img[6]
-                })
-
-            return {
-                'total': total,
-                'images': image_list
-            }
-        finally:
-            session.close()
+        return DatabaseAPI._search_images(2, name=name, tagli=tagli, order='time', page=page, per_page=per_page,
+                                          cursor=cursor, mode=mode, exclude_tags=exclude_tags)
     
     @staticmethod
+    @cached(_query_cache, ("Spider",))
     def get_spider_para(name):
         """获取爬虫参数列表
         参数：
@@ -1669,8 +2177,30 @@ class DatabaseAPI:
             return para[0]
         finally:
             session.close()
+
+    @staticmethod
+    @cached(_query_cache, ("Spider",))
+    def get_spider_download_to_local(name):
+        """获取爬虫是否需要把图片下载到本地
+        参数：
+        - name: 爬虫名称
+        返回：True/False，爬虫不存在时为False
+        """
+        session = DatabaseAPI.get_session()
+        try:
+            query = text("""
+                        SELECT s.download_to_local
+                        FROM spider s
+                        WHERE s.name = :name
+                    """)
+            row = session.execute(query, {"name": name}).fetchone()
+
+            return bool(row and row[0])
+        finally:
+            session.close()
     
     @staticmethod
+    @invalidates(_query_cache, ("Spider",))
     def delete_extired_spider():
         """每次调用时检查spider表中所有status为expired的爬虫并将这一行删除
         返回：True
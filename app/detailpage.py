@@ -56,8 +56,10 @@ class DetailPage(QWidget):
         layout.addWidget(hintLabel)
         layout.addWidget(self.addButton, 0, Qt.AlignCenter)
     
-    def addTab(self, image_id, imgtype=1):
-        """添加一个新的DetailTab标签页"""
+    def addTab(self, image_id, imgtype=1, data=None):
+        """添加一个新的DetailTab标签页
+        data为已经取好的详情数据，传入时不再单独查询
+        """
         routeKey = f"d{imgtype}_{image_id}"
         
         # 如果已经存在该标签页，则切换到它
@@ -67,19 +69,20 @@ class DetailPage(QWidget):
             return
             
         # 创建新的DetailTab
-        widget = DetailTab(image_id, imgtype)
+        widget = DetailTab(image_id, imgtype, data)
         widget.setObjectName(routeKey)
         
         # 添加到堆叠窗口
         self.stackedWidget.addWidget(widget)
         self.tabs[routeKey] = widget
         
-        # 添加到TabBar
+        # 添加到TabBar，详情在后台加载完成后再设置标题
         self.tabBar.addTab(
             routeKey=routeKey,
-            text=widget.details['name'],
+            text=data['details']['name'] if data else "加载中...",
             onClick=lambda: self.stackedWidget.setCurrentWidget(widget)
         )
+        widget.titleChanged.connect(lambda text: self.setTabTitle(routeKey, text))
         
         # 切换到新标签页
         self.tabBar.setCurrentTab(routeKey)
@@ -88,6 +91,13 @@ class DetailPage(QWidget):
         # 隐藏默认页面
         self.defaultPage.setVisible(False)
     
+    def setTabTitle(self, routeKey, text):
+        """设置标签页标题"""
+        if routeKey not in self.tabs:
+            return
+        item = self.tabBar.tab(routeKey)
+        self.tabBar.setTabText(self.tabBar.items.index(item), text)
+
     def closeTab(self, index):
         """关闭指定标签页"""
         item = self.tabBar.tabItem(index)
@@ -96,8 +106,9 @@ class DetailPage(QWidget):
         if routeKey not in self.tabs:
             return
             
-        # 移除widget
+        # 移除widget，并释放它的图片缓存
         widget = self.tabs[routeKey]
+        widget.release_images()
         self.stackedWidget.removeWidget(widget)
         widget.deleteLater()
         
@@ -1,6 +1,6 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,  
                                QPushButton, QGridLayout)
-from PySide6.QtCore import Qt, QEasingCurve, Signal
+from PySide6.QtCore import Qt, QEasingCurve, Signal, QSize
 from PySide6.QtGui import QPainter, QPainterPath, QIcon
 from qfluentwidgets import (PushButton, ScrollArea, 
                            BodyLabel, TitleLabel, LineEdit, SubtitleLabel, PrimaryPushButton, IconWidget, 
@@ -12,13 +12,17 @@ from qfluentwidgets import (PushButton, ScrollArea,
                            HyperlinkButton)
 from qfluentwidgets import FluentIcon as FIF
 from .databaseapi import DatabaseAPI
-from .imageloader import ImageLoader
+from .imageloader import ImageLoader, ThumbnailLoader, PRIORITY_DETAIL, image_cache
+from .queryexecutor import QueryExecutor
 from bs4 import BeautifulSoup
 from .tagadder import TagAdder
 from .deletemessagebox import *
 import datetime
 import re
 
+# 详情页中图片缩略图的最大尺寸，与ClickableImageLabel.scale_image_to_label的高度上限一致
+DETAIL_IMAGE_SIZE = QSize(960, 360)
+
 class SmoothScrollPix(SmoothScrollArea):
 
     def __init__(self, pmap):
@@ -47,7 +51,17 @@ class ClickableImageLabel(ImageLabel):
         super().__init__(parent)
         self.setCursor(Qt.PointingHandCursor)
         self.setScaledContents(False)
-        self.original_map = None
+        self.source = None  # 原图的地址或本地路径，点击时才加载原图
+        self.is_local = False
+        # 每个标签只用一个原图加载器，加载期间忽略再次点击
+        self.loading = False
+        self.loader = ImageLoader(self)
+        self.loader.loaded.connect(self.on_original_loaded)
+        self.loader.error.connect(self.on_original_failed)
+
+    def set_source(self, source, is_local):
+        self.source = source
+        self.is_local = is_local
         
     def mousePressEvent(self, event):
         """鼠标点击事件"""
@@ -72,7 +86,6 @@ class ClickableImageLabel(ImageLabel):
             return
 
         original_pixmap = self.pixmap()
-        self.original_map = original_pixmap
         
         # 获取原始尺寸
         original_width = original_pixmap.width()
@@ -100,9 +113,34 @@ class ClickableImageLabel(ImageLabel):
         self.setFixedSize(target_width, target_height)
         
     def showOriginalImage(self):
-        """在新窗口中显示原始图像"""
-        height = self.original_map.height()
-        width = self.original_map.width()
+        """在新窗口中显示原始图像，原图在这时才读取或下载"""
+        if self.loading or not self.source:
+            return
+        self.loading = True
+        if self.is_local:
+            self.loader.load_file(self.source)
+        else:
+            self.loader.load(self.source)
+
+    def on_original_loaded(self, pixmap):
+        self.loading = False
+        self.show_viewer(pixmap)
+
+    def on_original_failed(self, error_msg):
+        self.loading = False
+        InfoBar.error(
+            title='Error',
+            content=error_msg,
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.BOTTOM_RIGHT,
+            duration=3000,
+            parent=self.window()
+        )
+
+    def show_viewer(self, pixmap):
+        height = pixmap.height()
+        width = pixmap.width()
         # 创建新窗口
         self.viewer = QWidget()
         self.viewer.setWindowTitle("origin")
@@ -121,7 +159,7 @@ class ClickableImageLabel(ImageLabel):
         # 创建内容页面
         layout = QVBoxLayout(self.viewer)
         layout.setContentsMargins(0, 0, 0, 0)
-        image_label = SmoothScrollPix(self.original_map)
+        image_label = SmoothScrollPix(pixmap)
         image_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(image_label)
         
@@ -176,9 +214,9 @@ class TagAdderMessageBox(MessageBoxBase):
     """标签添加对话框"""
     yesSignal = Signal(list)
     cancelSignal = Signal()
-    def __init__(self, tagli, parent=None):
+    def __init__(self, tagtype, parent=None):
         super().__init__(parent)
-        self.tagadder = TagAdder(tagli)
+        self.tagadder = TagAdder(tagtype)
         self.viewLayout.addWidget(self.tagadder)
         # 隐藏按钮
         self.cancelButton.setText('取消')
@@ -199,30 +237,63 @@ class TagAdderMessageBox(MessageBoxBase):
 
 
 # 图片详情页面
+def load_detail_data(image_id, imgtype):
+    """读取详情页需要的全部数据，在后台线程中执行"""
+    return DatabaseAPI.get_detail_bundle(image_id, imgtype)
+
+
 class DetailTab(QWidget):
-    def __init__(self, image_id, imgtype=1, parent=None):
+    titleChanged = Signal(str)  # 数据加载完成后发出标签页标题
+
+    def __init__(self, image_id, imgtype=1, data=None, parent=None):
+        """data为已经取好的详情数据（get_detail_bundle的结果），为None时在后台加载"""
         super().__init__(parent)
         self.image_type = imgtype
-        if imgtype == 1:
-            self.details = DatabaseAPI.get_image_details_role(image_id)
-            self.image_li = DatabaseAPI.get_image_list_role(image_id)
-            self.image_num = len(self.image_li)
-            self.tags = DatabaseAPI.get_tags_list_by_id(imgtype, image_id)
-            self.sourceli = DatabaseAPI.get_source_of_role(image_id)
-        else:
-            self.details = DatabaseAPI.get_image_details_source(image_id)
-            self.image_li = DatabaseAPI.get_image_list_source(image_id)
-            self.image_num = len(self.image_li)
-            self.tags = DatabaseAPI.get_tags_list_by_id(imgtype, image_id)
-            self.external_link_li = DatabaseAPI.get_external_link_list(image_id)
-            self.roleli = DatabaseAPI.get_role_list(image_id)
-        self.tags = set(self.tags)
+        self.image_id = image_id
+        self.details = None
+        self.image_li = []
 
         # 主布局
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(10, 10, 10, 10)
         self.layout.setSpacing(15)
 
+        # 数据在后台加载，加载完成前显示进度环
+        self.page_loading = IndeterminateProgressRing(self)
+        self.page_loading.setFixedSize(80, 80)
+        self.layout.addWidget(self.page_loading, 0, Qt.AlignCenter)
+        if data is not None:
+            self.setup_ui(data)
+            return
+        QueryExecutor.instance().submit(
+            self, 'load', load_detail_data, image_id, imgtype,
+            on_result=self.setup_ui, on_error=self.on_data_error
+        )
+
+    def on_data_error(self, error):
+        """详情数据加载失败"""
+        self.page_loading.hide()
+        error_label = BodyLabel(f"加载失败: {error}", self)
+        self.layout.addWidget(error_label, 0, Qt.AlignCenter)
+
+    def setup_ui(self, data):
+        """数据加载完成后构建界面"""
+        imgtype = self.image_type
+        if data is None:
+            self.on_data_error("数据不存在")
+            return
+        self.details = data['details']
+        self.image_li = data['image_li']
+        self.image_num = len(self.image_li)
+        self.tags = set(data['tags'])
+        if imgtype == 1:
+            self.sourceli = data['sourceli']
+        else:
+            self.external_link_li = data['external_link_li']
+            self.roleli = data['roleli']
+        self.page_loading.hide()
+        self.layout.removeWidget(self.page_loading)
+
         # 可滚动的区域（占满剩余空间）
         self.scroll_area = SmoothScrollArea(self)
         self.scroll_area.setStyleSheet("background: transparent; border: none;")
@@ -411,19 +482,43 @@ class DetailTab(QWidget):
         # 将滚动区域添加到主布局（stretch=1 使其占满剩余空间）
         self.layout.addWidget(self.scroll_area, 1)
 
+        self.titleChanged.emit(self.details['name'])
+        self.thumbnail_loader = ThumbnailLoader(DETAIL_IMAGE_SIZE, self, PRIORITY_DETAIL)
+        self.thumbnail_loader.loaded.connect(self.on_thumbnail_loaded)
         self.init_loader(self.image_li[0])
     
     def init_loader(self, image_data):
-        """初始化图片加载器"""
-        if image_data['is_downloaded']:
-            self.loading_indicator.hide()
-            self.image_label.setPixmap(image_data['local_path'])
-            self.image_label.scale_image_to_label()
+        """加载详情页大小的缩略图，原图在点击图片时才加载"""
+        is_local = bool(image_data['is_downloaded'])
+        self.image_source = self.thumbnail_loader.source(image_data['url'], image_data['local_path'] if is_local else None)
+        self.image_label.set_source(self.image_source, is_local)
+        # 切换图片后，上一张还没有下载完的不再需要
+        self.thumbnail_loader.retain([self.image_source])
+        pixmap = self.thumbnail_loader.thumbnail(self.image_source, is_local)
+        if pixmap is not None:
+            self.on_image_loaded(pixmap)
+        elif self.thumbnail_loader.has_failed(self.image_source):
+            self.on_load_error(f"图片加载失败: {self.image_source}")
+
+    def release_images(self):
+        """释放这个详情页的图片（详情页大小的缩略图和原图）占用的内存缓存，关闭标签页时调用
+        卡片大小的缩略图仍然保留，搜索结果中还会用到
+        """
+        sources = [self.thumbnail_loader.source(image['url'], image['local_path'] if image['is_downloaded'] else None)
+                   for image in self.image_li]
+        # 原图按补全后的地址缓存，本地文件按路径缓存
+        freed = image_cache.release(sources, [DETAIL_IMAGE_SIZE, None])
+        if freed:
+            print(f"[内存缓存] 关闭详情页，释放 {freed / 1024 / 1024:.1f} MB")
+
+    def on_thumbnail_loaded(self, source):
+        if source != self.image_source:
+            return
+        pixmap = self.thumbnail_loader.thumbnail(source)
+        if pixmap is not None:
+            self.on_image_loaded(pixmap)
         else:
-            self.loader = ImageLoader(self)
-            self.loader.loaded.connect(self.on_image_loaded)
-            self.loader.error.connect(self.on_load_error)
-            self.loader.load(image_data['url'])
+            self.on_load_error(f"图片加载失败: {source}")
         
     def on_image_loaded(self, pixmap):
         """图片加载完成处理"""
@@ -782,9 +877,8 @@ class DetailTab(QWidget):
         """显示标签选择器"""
         # 假设你已经有一个标签选择器widget，名为tag_selector_widget
         # 并且它会发出一个tag_selected信号
-        tags_all = DatabaseAPI.get_tags_list(self.image_type)
         _main_window = self.window()
-        self.tag_selector_widget = TagAdderMessageBox(tags_all, _main_window)
+        self.tag_selector_widget = TagAdderMessageBox(self.image_type, _main_window)
         self.tag_selector_widget.yesSignal.connect(self.add_new_tag_li)
         self.tag_selector_widget.cancelSignal.connect(lambda: None)
         self.tag_selector_widget.show()
@@ -0,0 +1,507 @@
+"""数据库方言：DatabaseAPI、init.py和爬虫既可以连MySQL，也可以直接使用本地SQLite文件
+config.ini的[DATABASE]中 backend = sqlite 时使用sqlite_path指定的数据库文件，不需要MySQL服务
+- SQLite开启WAL，界面读取和爬虫写入可以同时进行
+- 名称/简介检索使用FTS5的trigram分词（需要SQLite 3.34以上）
+- ON DUPLICATE KEY UPDATE转换成不带冲突目标的ON CONFLICT DO UPDATE，需要SQLite 3.35以上
+- 语句仍按MySQL写法编写，发给SQLite前由translate转换（%s占位符、INSERT IGNORE、ON DUPLICATE KEY UPDATE等）
+从MySQL导出文件导入：python -m app.dialect resources/anime.sql
+"""
+
+import re
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+from sqlalchemy.engine import URL
+
+try:
+    import mysql.connector
+    # 两种后端的数据库异常，可以直接用于except
+    Error = (mysql.connector.Error, sqlite3.Error)
+except ImportError:  # 只用SQLite时可以不安装mysql-connector
+    mysql = None
+    Error = (sqlite3.Error,)
+
+MYSQL = 'mysql'
+SQLITE = 'sqlite'
+
+# SQLite连接的设置：WAL让读和写互不阻塞，busy_timeout让写冲突时等待而不是立即报错
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA busy_timeout = 5000",
+)
+
+# trigram分词的长度，比它短的关键字查不到全文索引
+TRIGRAM_SIZE = 3
+
+# 每种imgtype（1表示角色，2表示作品）的FTS5全文索引表，rowid为角色/作品ID
+FTS_TABLES = {1: "RoleFts", 2: "SourceFts"}
+# 每种tagtype的标签名FTS5全文索引表，rowid为标签ID
+TAG_FTS_TABLES = {1: "RoleTagFts", 2: "SourceTagFts"}
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+# 按列声明的类型把DATE/DATETIME列读成date/datetime，与mysql.connector返回的类型一致
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()) if value else None)
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()) if value else None)
+DETECT_TYPES = sqlite3.PARSE_DECLTYPES
+
+_INSERT_IGNORE = re.compile(r"\bINSERT\s+IGNORE\b", re.I)
+_ON_DUPLICATE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I)
+_VALUES_FUNC = re.compile(r"\bVALUES\s*\(\s*([A-Za-z_]\w*)\s*\)", re.I)
+_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\b", re.I)
+_JSON_ARRAYAGG = re.compile(r"\bJSON_ARRAYAGG\s*\(", re.I)
+
+
+@lru_cache(maxsize=1024)
+def translate(sql, format_params=False):
+    """把MySQL写法的语句转换成SQLite写法
+    format_params为True时同时把%s占位符换成?（DBAPI游标直接执行的语句）
+    """
+    sql = _INSERT_IGNORE.sub("INSERT OR IGNORE", sql)
+    match = _ON_DUPLICATE.search(sql)
+    if match:
+        # VALUES(col)表示本次要插入的值，对应SQLite的excluded.col
+        updates = _VALUES_FUNC.sub(r"excluded.\1", sql[match.end():])
+        sql = sql[:match.start()] + "ON CONFLICT DO UPDATE SET" + updates
+    sql = _FOR_UPDATE.sub("", sql)  # SQLite写事务本身是串行的
+    sql = _JSON_ARRAYAGG.sub("json_group_array(", sql)
+    if format_params:
+        sql = sql.replace("%s", "?")
+    return sql
+
+
+def apply_pragmas(connection):
+    """新建的SQLite连接执行SQLITE_PRAGMAS"""
+    for pragma in SQLITE_PRAGMAS:
+        connection.execute(pragma)
+
+
+def backend_of(obj):
+    """连接或游标所属的后端，SqliteConnection/SqliteCursor为SQLITE，其余视为MYSQL"""
+    return getattr(obj, 'backend', MYSQL)
+
+
+class SqliteCursor:
+    """sqlite3游标的包装，执行前把MySQL写法的语句转换成SQLite写法
+    其余属性（fetchone、fetchall、lastrowid、rowcount、close等）直接使用sqlite3游标的
+    """
+    backend = SQLITE
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(translate(sql, True), params or ())
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(translate(sql, True), seq_of_params)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SqliteConnection:
+    """sqlite3连接的包装，接口与mysql.connector的连接一致，爬虫代码不用区分后端"""
+    backend = SQLITE
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, detect_types=DETECT_TYPES)
+        apply_pragmas(self._connection)
+        self._closed = False
+
+    def cursor(self):
+        return SqliteCursor(self._connection.cursor())
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def is_connected(self):
+        return not self._closed
+
+    def close(self):
+        self._connection.close()
+        self._closed = True
+
+
+def connect(DB_CONFIG):
+    """按DB_CONFIG（init.load_db_config的结果）建立DBAPI连接"""
+    config = dict(DB_CONFIG)
+    backend = config.pop('backend', MYSQL)
+    sqlite_path = config.pop('sqlite_path', None)
+    if backend == SQLITE:
+        return SqliteConnection(sqlite_path)
+    return mysql.connector.connect(**config)
+
+
+def engine_url(DB_CONFIG):
+    """按DB_CONFIG生成DatabaseAPI.initialize使用的数据库URL"""
+    if DB_CONFIG.get('backend', MYSQL) == SQLITE:
+        return URL.create("sqlite", database=DB_CONFIG['sqlite_path'])
+    return URL.create(
+        "mysql+mysqlconnector",
+        username=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        host=DB_CONFIG['host'],
+        port=DB_CONFIG['port'],
+        database=DB_CONFIG['database']
+    )
+
+
+def _fts_statements(table, key, fts, columns=("name", "description")):
+    """表的FTS5外部内容索引，以及保持索引同步的触发器"""
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return (
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+        USING fts5({names}, content='{table}', content_rowid='{key}', tokenize='trigram')
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {names}) VALUES (new.{key}, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.{key}, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.{key}, {old_values});
+            INSERT INTO {fts} (rowid, {names}) VALUES (new.{key}, {new_values});
+        END
+        """,
+    )
+
+
+def tag_index_statements(tagtype):
+    """标签表的 (num, tag) 索引和标签名全文索引，已存在时跳过；旧数据库启动时补建"""
+    table = "RoleTag" if tagtype == 1 else "SourceTag"
+    return (
+        f"CREATE INDEX IF NOT EXISTS idx_{table.lower()}_num ON {table}(num, tag)",
+        *_fts_statements(table, "tag_id", TAG_FTS_TABLES[tagtype], columns=("tag",)),
+    )
+
+
+# 与init.py中MySQL建表语句对应的SQLite表结构
+# ENUM写成TEXT，BOOLEAN写成INTEGER，ngram全文索引由FTS5表代替
+SQLITE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS Website (
+        website_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        base_url TEXT NOT NULL,
+        description TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS spider (
+        spider_id INTEGER PRIMARY KEY,
+        website_id INTEGER NOT NULL DEFAULT 1 REFERENCES Website(website_id) ON DELETE CASCADE,
+        name TEXT NOT NULL UNIQUE,
+        download_to_local INTEGER DEFAULT 0,
+        request_id_para TEXT,
+        cookies TEXT,
+        status TEXT DEFAULT 'active'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Source (
+        source_id INTEGER PRIMARY KEY,
+        source_type TEXT NOT NULL DEFAULT 'animation',
+        name TEXT NOT NULL,
+        description TEXT,
+        author TEXT,
+        studio TEXT,
+        release_date DATE,
+        status TEXT,
+        UNIQUE (source_type, name)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_source_release_date ON Source(release_date)",
+    """
+    CREATE TABLE IF NOT EXISTS SourceWebpage (
+        webpage_id INTEGER PRIMARY KEY,
+        website_id INTEGER NOT NULL REFERENCES Website(website_id) ON DELETE CASCADE,
+        source_id INTEGER NOT NULL REFERENCES Source(source_id) ON DELETE CASCADE,
+        url TEXT NOT NULL UNIQUE,
+        http_status_code INTEGER NOT NULL,
+        crawl_time DATETIME NOT NULL,
+        last_modified DATETIME
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS SourceImage (
+        image_id INTEGER PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        format TEXT,
+        is_downloaded INTEGER DEFAULT 0,
+        local_path TEXT,
+        source_id INTEGER NOT NULL REFERENCES Source(source_id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_sourceimage_source ON SourceImage(source_id)",
+    """
+    CREATE TABLE IF NOT EXISTS SourceTag (
+        tag_id INTEGER PRIMARY KEY,
+        tag TEXT NOT NULL UNIQUE,
+        num INTEGER NOT NULL DEFAULT 1
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS SourceTagRelation (
+        tag_id INTEGER NOT NULL REFERENCES SourceTag(tag_id) ON DELETE CASCADE,
+        source_id INTEGER NOT NULL REFERENCES Source(source_id) ON DELETE CASCADE,
+        PRIMARY KEY (source_id, tag_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_sourcetagrelation_tag ON SourceTagRelation(tag_id, source_id)",
+    """
+    CREATE TABLE IF NOT EXISTS Role (
+        role_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        gender TEXT NOT NULL DEFAULT 'unknown',
+        description TEXT,
+        birthday DATE,
+        voice_actor TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS RoleWebpage (
+        webpage_id INTEGER PRIMARY KEY,
+        website_id INTEGER NOT NULL REFERENCES Website(website_id) ON DELETE CASCADE,
+        role_id INTEGER NOT NULL REFERENCES Role(role_id) ON DELETE CASCADE,
+        url TEXT NOT NULL UNIQUE,
+        http_status_code INTEGER NOT NULL,
+        crawl_time DATETIME NOT NULL,
+        last_modified DATETIME
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS RoleTag (
+        tag_id INTEGER PRIMARY KEY,
+        tag TEXT NOT NULL UNIQUE,
+        num INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS RoleTagRelation (
+        tag_id INTEGER NOT NULL REFERENCES RoleTag(tag_id) ON DELETE CASCADE,
+        role_id INTEGER NOT NULL REFERENCES Role(role_id) ON DELETE CASCADE,
+        PRIMARY KEY (role_id, tag_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_roletagrelation_tag ON RoleTagRelation(tag_id, role_id)",
+    """
+    CREATE TABLE IF NOT EXISTS RoleSourceRelation (
+        role_id INTEGER NOT NULL REFERENCES Role(role_id) ON DELETE CASCADE,
+        source_id INTEGER NOT NULL REFERENCES Source(source_id) ON DELETE CASCADE,
+        PRIMARY KEY (role_id, source_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_rolesourcerelation_source_role ON RoleSourceRelation(source_id, role_id)",
+    """
+    CREATE TABLE IF NOT EXISTS RoleImage (
+        image_id INTEGER PRIMARY KEY,
+        image_url TEXT NOT NULL UNIQUE,
+        format TEXT,
+        is_downloaded INTEGER DEFAULT 0,
+        local_path TEXT,
+        role_id INTEGER NOT NULL REFERENCES Role(role_id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_roleimage_role ON RoleImage(role_id)",
+    """
+    CREATE TABLE IF NOT EXISTS ExternalLinks (
+        link_id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        original_url TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS LinksOnPage (
+        source_id INTEGER NOT NULL REFERENCES Source(source_id) ON DELETE CASCADE,
+        link_id INTEGER NOT NULL REFERENCES ExternalLinks(link_id) ON DELETE CASCADE,
+        PRIMARY KEY (source_id, link_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_linksonpage_link ON LinksOnPage(link_id)",
+    *_fts_statements("Role", "role_id", FTS_TABLES[1]),
+    *_fts_statements("Source", "source_id", FTS_TABLES[2]),
+    *tag_index_statements(1),
+    *tag_index_statements(2),
+    """
+    INSERT OR IGNORE INTO Website (website_id, name, base_url, description)
+    VALUES
+    (1, 'Bangumi', 'https://bgm.tv', 'Bangumi 番组计划'),
+    (2, 'Moegirl', 'https://zh.moegirl.org.cn', '萌娘百科')
+    """,
+)
+
+
+def create_sqlite_tables(cursor):
+    """创建SQLite的全部基础表、全文索引和网站数据（已存在时跳过），投影表由create_card_tables创建"""
+    for statement in SQLITE_SCHEMA:
+        cursor.execute(statement)
+
+
+def rebuild_fts(cursor):
+    """按角色/作品表和标签表重新生成FTS5索引，批量导入后调用"""
+    for fts in (*FTS_TABLES.values(), *TAG_FTS_TABLES.values()):
+        cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+# mysqldump导出文件中的语句
+_DUMP_CREATE = re.compile(r"^CREATE TABLE `(\w+)`")
+_DUMP_COLUMN = re.compile(r"^\s*`(\w+)`")
+_DUMP_INSERT = re.compile(r"^INSERT INTO `(\w+)` VALUES ")
+_DUMP_STRING = re.compile(r"'((?:[^'\\]|\\.|'')*)'", re.S)
+_DUMP_LITERAL = re.compile(r"NULL|0x[0-9A-Fa-f]+|-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+_DUMP_ESCAPE = re.compile(r"\\(.)|''", re.S)
+_DUMP_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+
+
+def _unescape(match):
+    char = match.group(1)
+    if char is None:
+        return "'"
+    return _DUMP_ESCAPES.get(char, char)
+
+
+def _dump_literal(token):
+    if token == "NULL":
+        return None
+    if token.startswith("0x"):
+        return bytes.fromhex(token[2:])
+    if any(c in token for c in ".eE"):
+        return float(token)
+    return int(token)
+
+
+def parse_dump_values(values):
+    """解析mysqldump中INSERT语句VALUES之后的部分，逐行返回值元组"""
+    row = None
+    i = 0
+    n = len(values)
+    while i < n:
+        c = values[i]
+        if c == "'":
+            match = _DUMP_STRING.match(values, i)
+            row.append(_DUMP_ESCAPE.sub(_unescape, match.group(1)))
+            i = match.end()
+        elif c == "(":
+            row = []
+            i += 1
+        elif c == ")":
+            yield tuple(row)
+            row = None
+            i += 1
+        elif c in ", ;\r\n":
+            i += 1
+        else:
+            match = _DUMP_LITERAL.match(values, i)
+            if not match:
+                raise ValueError(f"无法解析的值: {values[i:i + 20]}")
+            row.append(_dump_literal(match.group(0)))
+            i = match.end()
+
+
+def import_mysql_dump(dump_path, sqlite_path):
+    """把mysqldump导出的文件（如resources/anime.sql）导入SQLite数据库文件
+    表结构使用SQLITE_SCHEMA，数据按导出文件中CREATE TABLE的列名写入，导入前清空同名表，可以重复执行
+    导入后重建全文索引和搜索投影表
+    返回 {表名: 行数}
+    """
+    from .searchprojection import create_card_tables, rebuild_cards
+
+    connection = sqlite3.connect(sqlite_path)
+    counts = {}
+    try:
+        apply_pragmas(connection)
+        # 与导出文件中的FOREIGN_KEY_CHECKS=0一样，导入期间不检查外键（表按名称顺序导出）
+        connection.execute("PRAGMA foreign_keys = OFF")
+        cursor = SqliteCursor(connection.cursor())
+        create_sqlite_tables(cursor)
+        create_card_tables(cursor)
+
+        dump_columns = {}
+        current_table = None
+        with open(dump_path, encoding='utf-8') as f:
+            for line in f:
+                match = _DUMP_CREATE.match(line)
+                if match:
+                    current_table = match.group(1)
+                    dump_columns[current_table] = []
+                    continue
+                if current_table:
+                    if line.startswith(")"):
+                        current_table = None
+                    else:
+                        match = _DUMP_COLUMN.match(line)
+                        if match:
+                            dump_columns[current_table].append(match.group(1))
+                    continue
+
+                match = _DUMP_INSERT.match(line)
+                if not match:
+                    continue
+                table = match.group(1)
+                existing = {row[1].lower() for row in connection.execute(f"PRAGMA table_info({table})")}
+                if not existing:
+                    print(f"跳过不存在的表: {table}")
+                    continue
+                columns = dump_columns[table]
+                keep = [i for i, column in enumerate(columns) if column.lower() in existing]
+                if len(keep) < len(columns):
+                    print(f"{table}: 忽略多余的列 {[c for c in columns if c.lower() not in existing]}")
+                if table not in counts:
+                    connection.execute(f"DELETE FROM {table}")
+                    counts[table] = 0
+                insert = (f"INSERT INTO {table} ({', '.join(columns[i] for i in keep)}) "
+                          f"VALUES ({', '.join('?' * len(keep))})")
+                rows = [tuple(row[i] for i in keep) for row in parse_dump_values(line[match.end():])]
+                connection.executemany(insert, rows)
+                counts[table] += len(rows)
+                print(f"导入{table}: {len(rows)}行")
+
+        rebuild_fts(cursor)
+        rebuild_cards(cursor)
+        connection.commit()
+
+        violations = connection.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            print(f"警告: {len(violations)}行不满足外键约束，例如 {violations[:5]}")
+        return counts
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def main():
+    import sys
+    from init import load_db_config
+
+    if len(sys.argv) < 2:
+        print("用法: python -m app.dialect <mysqldump导出文件>")
+        return
+    DB_CONFIG = load_db_config()
+    counts = import_mysql_dump(sys.argv[1], DB_CONFIG['sqlite_path'])
+    print(f"导入完成: {DB_CONFIG['sqlite_path']}, {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,171 +1,744 @@
-from PySide6.QtCore import Qt, QUrl, Signal, QObject, QTimer
-from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
-from PySide6.QtGui import QPixmap, QPixmapCache
-import weakref
+from PySide6.QtCore import (Qt, QUrl, Signal, QObject, QTimer, QBuffer, QIODevice, QSaveFile,
+                           QRunnable, QThread, QThreadPool)
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply, QNetworkDiskCache
+from PySide6.QtGui import QPixmap, QImage, QImageReader
+import shiboken6
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# 缩略图文件名：原图地址的sha1_宽x高（QSaveFile写入中的临时文件不匹配）
+_THUMBNAIL_NAME = re.compile(r'^[0-9a-f]{40}_\d+x\d+$')
+
+
+class ImageDiskCache(QNetworkDiskCache):
+    """图片的磁盘缓存，超过上限时先删除最久没有读取的文件（QNetworkDiskCache默认按写入时间删除）
+    缩略图目录（set_thumbnail_dir）中的文件也计入上限，和下载的图片一起按读取时间淘汰
+    """
+
+    def _files(self):
+        """已经写完的缓存文件（.d）和缩略图文件 [(最近读取时间, 字节数, 路径, 是否缩略图)]"""
+        entries = []
+        cache_dir = os.path.abspath(self.cacheDirectory())
+        roots = [(cache_dir, False)]
+        if _thumbnail_dir is not None:
+            roots.append((_thumbnail_dir, True))
+        for top, is_thumbnail in roots:
+            for root, dirs, files in os.walk(top):
+                if not is_thumbnail and _thumbnail_dir is not None:
+                    # 缩略图目录单独统计
+                    dirs[:] = [d for d in dirs if os.path.join(root, d) != _thumbnail_dir]
+                for name in files:
+                    # 不动正在写入的临时文件
+                    if not (_THUMBNAIL_NAME.match(name) if is_thumbnail else name.endswith('.d')):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path, is_thumbnail))
+        return entries
+
+    def usage(self):
+        """磁盘占用 (下载的图片, 缩略图)，单位字节"""
+        network = thumbnails = 0
+        for _, size, _, is_thumbnail in self._files():
+            if is_thumbnail:
+                thumbnails += size
+            else:
+                network += size
+        return network, thumbnails
+
+    def expire(self):
+        """删除最久没有读取的缓存文件和缩略图直到低于上限的90%，返回剩余大小（字节）"""
+        entries = self._files()
+        total = sum(size for _, size, _, _ in entries)
+        if total <= self.maximumCacheSize():
+            return total
+        target = self.maximumCacheSize() * 9 // 10
+        for _, size, path, _ in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        return total
+
 
 class SharedNetworkManager:
     """共享网络管理器单例"""
     _instance = None
     _manager = None
+    _hits = 0    # 从磁盘缓存读取的响应数（包括304重新验证）
+    _misses = 0  # 从网络下载的响应数
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._manager = QNetworkAccessManager()
-            # 可以在这里设置全局网络配置
+            cls._manager.finished.connect(cls._count_reply)
         return cls._instance
     
     @property
     def manager(self):
         return self._manager
 
+    def set_disk_cache(self, path, max_size_mb):
+        """启用磁盘缓存，配置来自init.load_image_cache_config()
+        缓存按HTTP头判断是否过期，过期后带ETag/Last-Modified重新验证，未修改时直接使用缓存
+        """
+        cache = ImageDiskCache(self._manager)
+        cache.setCacheDirectory(os.path.abspath(path))
+        cache.setMaximumCacheSize(max_size_mb * 1024 * 1024)
+        self._manager.setCache(cache)
+
+    @classmethod
+    def _count_reply(cls, reply):
+        if reply.error() != QNetworkReply.NoError:
+            return
+        if reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute):
+            cls._hits += 1
+        else:
+            cls._misses += 1
+
+    def expire_thumbnails(self):
+        """写入的缩略图超过上限的1/20时清理一次，在GUI线程中调用
+        本地图片的缩略图不经过网络缓存，不会触发QNetworkDiskCache自己的清理
+        """
+        global _thumbnail_written
+        cache = self._manager.cache()
+        if cache is None:
+            return
+        with _thumbnail_lock:
+            if _thumbnail_written < cache.maximumCacheSize() // 20:
+                return
+            _thumbnail_written = 0
+        cache.expire()
+
+    def cache_stats(self):
+        """磁盘缓存的统计：命中数、未命中数、命中率、缓存大小（其中缩略图的大小）和上限（字节），未启用时大小为0"""
+        cache = self._manager.cache()
+        requests = self._hits + self._misses
+        network, thumbnails = cache.usage() if cache else (0, 0)
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': self._hits / requests if requests else 0.0,
+            'size': network + thumbnails,
+            'thumbnail_size': thumbnails,
+            'max_size': cache.maximumCacheSize() if cache else 0
+        }
+
+    def print_cache_report(self):
+        stats = self.cache_stats()
+        print(f"[图片缓存] 命中 {stats['hits']} / {stats['hits'] + stats['misses']} "
+              f"({stats['hit_rate']:.1%})，磁盘占用 {stats['size'] / 1024 / 1024:.1f} MB"
+              f"（缩略图 {stats['thumbnail_size'] / 1024 / 1024:.1f} MB）"
+              f" / {stats['max_size'] / 1024 / 1024:.0f} MB")
+
+def normalize_url(url):
+    """补全协议头，数据库中的图片地址可能是//开头或者不带协议"""
+    if not url.startswith(('http://', 'https://')):
+        if url.startswith('//'):
+            url = 'https:' + url
+        else:
+            url = 'https://' + url
+    return url
+
+
+def image_request(url, priority=QNetworkRequest.NormalPriority):
+    request = QNetworkRequest(QUrl(url))
+    request.setRawHeader(b"User-Agent", b"Mozilla/5.0")
+    request.setRawHeader(b"Accept", b"image/*")
+    request.setPriority(priority)
+    return request
+
+
+class PixmapPool:
+    """按字节预算淘汰的QPixmap缓存（LRU），只在GUI线程中使用"""
+
+    def __init__(self, budget):
+        self.budget = budget  # 字节
+        self._entries = OrderedDict()  # 键 -> (QPixmap, 字节数)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def contains(self, key):
+        return key in self._entries
+
+    def insert(self, key, pixmap):
+        cost = pixmap.width() * pixmap.height() * pixmap.depth() // 8
+        self.remove(key)
+        if cost > self.budget:
+            # 比整个预算还大的图片不缓存
+            return
+        self._entries[key] = (pixmap, cost)
+        self.size += cost
+        self.shrink()
+
+    def remove(self, key):
+        """删除一项，返回释放的字节数"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return 0
+        self.size -= entry[1]
+        return entry[1]
+
+    def shrink(self):
+        while self.size > self.budget:
+            _, (_, cost) = self._entries.popitem(last=False)
+            self.size -= cost
+            self.evictions += 1
+
+    def set_budget(self, budget):
+        self.budget = budget
+        self.shrink()
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'size': self.size,
+            'budget': self.budget,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+            'evictions': self.evictions
+        }
+
+
+class ImageCache:
+    """图片的内存缓存，键为 (地址或本地路径, 尺寸)，尺寸为None表示原图
+    缩略图和原图各有自己的字节预算，大的原图不会把卡片上的缩略图挤出缓存
+    """
+
+    def __init__(self, thumbnail_budget=64 * 1024 * 1024, original_budget=128 * 1024 * 1024):
+        self.thumbnails = PixmapPool(thumbnail_budget)
+        self.originals = PixmapPool(original_budget)
+
+    @staticmethod
+    def key(source, size=None):
+        return (source, None if size is None else (size.width(), size.height()))
+
+    def pool(self, size):
+        return self.originals if size is None else self.thumbnails
+
+    def find(self, source, size=None):
+        """取缓存的图片，没有时返回None"""
+        return self.pool(size).get(self.key(source, size))
+
+    def contains(self, source, size=None):
+        """是否已缓存，不计入命中统计"""
+        return self.pool(size).contains(self.key(source, size))
+
+    def insert(self, source, size, pixmap):
+        self.pool(size).insert(self.key(source, size), pixmap)
+
+    def release(self, sources, sizes):
+        """释放这些图片在这些尺寸上的缓存（关闭详情页时调用），返回释放的字节数"""
+        freed = 0
+        for source in sources:
+            for size in sizes:
+                freed += self.pool(size).remove(self.key(source, size))
+        return freed
+
+    def set_budgets(self, thumbnail_mb, original_mb):
+        """设置两个缓存的预算（MB），配置来自init.load_image_cache_config()"""
+        self.thumbnails.set_budget(thumbnail_mb * 1024 * 1024)
+        self.originals.set_budget(original_mb * 1024 * 1024)
+
+    def stats(self):
+        return {'thumbnails': self.thumbnails.stats(), 'originals': self.originals.stats()}
+
+    def print_report(self):
+        for name, stats in (("缩略图", self.thumbnails.stats()), ("原图", self.originals.stats())):
+            print(f"[内存缓存] {name}: {stats['entries']} 张，{stats['size'] / 1024 / 1024:.1f} MB"
+                  f" / {stats['budget'] / 1024 / 1024:.0f} MB，命中率 {stats['hit_rate']:.1%}，"
+                  f"淘汰 {stats['evictions']} 次")
+
+
+# 解码后的图片都缓存在这里，只在GUI线程中使用
+image_cache = ImageCache()
+
+
+# 缩略图保存目录，为None时只缓存在内存中
+_thumbnail_dir = None
+# 上次清理后写入的缩略图字节数，工作线程中累加
+_thumbnail_written = 0
+_thumbnail_lock = threading.Lock()
+
+
+def set_thumbnail_dir(path):
+    """设置缩略图的保存目录，配置来自init.load_image_cache_config()
+    目录中的缩略图和磁盘缓存共用max_size_mb的上限
+    """
+    global _thumbnail_dir
+    os.makedirs(path, exist_ok=True)
+    _thumbnail_dir = os.path.abspath(path)
+
+
+def thumbnail_path(source, size):
+    """缩略图文件的路径，没有设置保存目录时为None"""
+    if _thumbnail_dir is None:
+        return None
+    digest = hashlib.sha1(source.encode('utf-8')).hexdigest()
+    return os.path.join(_thumbnail_dir, digest[:2], f"{digest}_{size.width()}x{size.height()}")
+
+
+def has_thumbnail(source, size):
+    if image_cache.contains(source, size):
+        return True
+    path = thumbnail_path(source, size)
+    return path is not None and os.path.exists(path)
+
+
+def find_thumbnail(source, size):
+    """从内存缓存中取缩略图，没有时返回None"""
+    return image_cache.find(source, size)
+
+
+def decode_image(data, size=None):
+    """把图片数据（bytes/QByteArray，或本地文件路径）解码成QImage，失败时返回空QImage
+    给出size时缩小到不超过size（只缩小不放大）；解码时就指定目标尺寸，JPEG可以直接按缩小的尺寸解码
+    只使用QImage，可以在工作线程中调用
+    """
+    if isinstance(data, str):
+        reader = QImageReader(data)
+    else:
+        buffer = QBuffer()
+        buffer.setData(data)
+        buffer.open(QIODevice.ReadOnly)
+        reader = QImageReader(buffer)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if size is not None and original.isValid() and \
+            (original.width() > size.width() or original.height() > size.height()):
+        reader.setScaledSize(original.scaled(size, Qt.KeepAspectRatio))
+    return reader.read()
+
+
+def load_thumbnail(source, size, data=None):
+    """生成或读取缩略图，在工作线程中执行，返回QImage（失败时为空）
+    data为下载的原图数据；为None时先读磁盘上的缩略图，没有时source为本地原图路径
+    """
+    global _thumbnail_written
+    path = thumbnail_path(source, size)
+    if data is None and path is not None and os.path.exists(path):
+        image = QImage(path)
+        if not image.isNull():
+            # 更新读取时间，磁盘缓存清理时按它淘汰（文件系统可能不记录读取时间）
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return image
+    image = decode_image(source if data is None else data, size)
+    if not image.isNull() and path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再替换，中途退出不会留下不完整的缩略图
+        file = QSaveFile(path)
+        # 有透明通道的保存为PNG，其余保存为JPG，读取时按内容识别格式
+        image_format = "PNG" if image.hasAlphaChannel() else "JPG"
+        if file.open(QIODevice.WriteOnly) and image.save(file, image_format, 90) and file.commit():
+            with _thumbnail_lock:
+                _thumbnail_written += os.path.getsize(path)
+        else:
+            file.cancelWriting()
+    return image
+
+
+def cache_thumbnail(source, image, size):
+    """缩略图转成QPixmap放入内存缓存，在GUI线程中调用"""
+    pixmap = QPixmap.fromImage(image)
+    image_cache.insert(source, size, pixmap)
+    SharedNetworkManager().expire_thumbnails()
+    return pixmap
+
+
+class _DecodeTask(QRunnable):
+    """在线程池中执行一次解码"""
+
+    def __init__(self, decoder, job, func, args):
+        super().__init__()
+        self.decoder = decoder
+        self.job = job
+        self.func = func
+        self.args = args
+
+    def run(self):
+        try:
+            image = self.func(*self.args)
+        except Exception as e:
+            print(f"[Decode] 图片解码失败: {str(e)}")
+            image = QImage()
+        self.decoder._finished.emit(self.job, image)
+
+
+class ImageDecoder(QObject):
+    """图片解码器（单例）
+    读取、解码、缩放都在线程池中对QImage进行，GUI线程只做最后的QPixmap转换
+    """
+    _instance = None
+    # 工作线程发出，排队到GUI线程处理：(任务序号, QImage)
+    _finished = Signal(int, object)
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = ImageDecoder()
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        # 给GUI线程留一个核心
+        self.pool.setMaxThreadCount(max(1, QThread.idealThreadCount() - 1))
+        self._next_job = 0
+        self._pending = {}  # 任务序号 -> (owner, 回调)
+        self._finished.connect(self._dispatch)
+
+    def submit(self, owner, func, *args, on_result=None, priority=0):
+        """在线程池中执行func(*args)（decode_image/load_thumbnail），返回QImage后在GUI线程调用on_result
+        owner销毁后不再调用回调；priority为线程池中的优先级，预取用负数
+        """
+        self._next_job += 1
+        self._pending[self._next_job] = (owner, on_result)
+        self.pool.start(_DecodeTask(self, self._next_job, func, args), priority)
+
+    def _dispatch(self, job, image):
+        owner, on_result = self._pending.pop(job, (None, None))
+        if owner is None or not shiboken6.isValid(owner):
+            return
+        if on_result:
+            on_result(image)
+
+
+# 图片下载的优先级，数值越大越先开始
+PRIORITY_PREFETCH = 0  # 预取
+PRIORITY_DETAIL = 1    # 详情页
+PRIORITY_VISIBLE = 2   # 结果网格中可见的卡片、用户点开的原图
+
+_NETWORK_PRIORITY = {
+    PRIORITY_PREFETCH: QNetworkRequest.LowPriority,
+    PRIORITY_DETAIL: QNetworkRequest.NormalPriority,
+    PRIORITY_VISIBLE: QNetworkRequest.HighPriority
+}
+
+
+class _FetchJob:
+    """同一地址的一次下载，等待它的所有请求共用"""
+
+    def __init__(self, url, seq):
+        self.url = url
+        self.host = QUrl(url).host()
+        self.seq = seq        # 提交顺序，同优先级时先提交的先开始
+        self.waiters = {}     # id(owner) -> (owner, 优先级, 回调)
+        self.reply = None     # 开始下载前为None
+        self.started = 0.0
+        self.timed_out = False
+
+    def priority(self):
+        return max(priority for _, priority, _ in self.waiters.values())
+
+
+class ImageFetchScheduler(QObject):
+    """图片下载调度器（单例）
+    - 同一地址同时只有一个请求，下载完成后分发给所有等待者
+    - 每个主机同时进行的请求不超过max_per_host，其余排队，按优先级（PRIORITY_*）和提交顺序开始
+    - 等待者取消或销毁后不再回调，没有等待者的请求被取消
+    - 所有请求共用一个超时检查计时器
+    """
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = ImageFetchScheduler()
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.network_manager = SharedNetworkManager().manager
+        self.max_per_host = 4
+        self.timeout_ms = 10000
+        self._jobs = {}       # 地址 -> _FetchJob
+        self._active = {}     # 主机 -> 进行中的请求数
+        self._seq = 0
+        self._owners = set()  # 已经连接了destroyed信号的owner
+
+        self.timeout_timer = QTimer(self)
+        self.timeout_timer.setInterval(1000)
+        self.timeout_timer.timeout.connect(self._check_timeouts)
+
+    def fetch(self, owner, url, priority, on_finished):
+        """下载url，完成后调用on_finished(数据, 错误信息)，成功时错误信息为None
+        同一owner对同一地址只保留最后一次的回调；url需要是补全后的地址（normalize_url）
+        """
+        job = self._jobs.get(url)
+        if job is None:
+            self._seq += 1
+            job = _FetchJob(url, self._seq)
+            self._jobs[url] = job
+        owner_id = id(owner)
+        job.waiters[owner_id] = (owner, priority, on_finished)
+        if owner_id not in self._owners:
+            self._owners.add(owner_id)
+            owner.destroyed.connect(lambda: self._forget_owner(owner_id))
+        if job.reply is None:
+            self._pump(job.host)
+
+    def cancel(self, owner, url=None):
+        """取消owner的请求，url为None时取消它的全部请求"""
+        owner_id = id(owner)
+        urls = [url] if url is not None else [url for url, job in self._jobs.items() if owner_id in job.waiters]
+        for url in urls:
+            self._remove_waiter(url, owner_id)
+
+    def stats(self):
+        """进行中和排队中的请求数"""
+        running = sum(self._active.values())
+        return {'running': running, 'queued': len(self._jobs) - running}
+
+    def _forget_owner(self, owner_id):
+        """owner已经销毁"""
+        self._owners.discard(owner_id)
+        for url in [url for url, job in self._jobs.items() if owner_id in job.waiters]:
+            self._remove_waiter(url, owner_id)
+
+    def _remove_waiter(self, url, owner_id):
+        job = self._jobs.get(url)
+        if job is None or job.waiters.pop(owner_id, None) is None or job.waiters:
+            return
+        # 没有等待者了
+        del self._jobs[url]
+        if job.reply is not None:
+            job.reply.abort()
+
+    def _pump(self, host):
+        """主机有空闲时，开始排队中优先级最高的请求"""
+        while self._active.get(host, 0) < self.max_per_host:
+            queued = [job for job in self._jobs.values() if job.host == host and job.reply is None]
+            if not queued:
+                return
+            self._start(max(queued, key=lambda job: (job.priority(), -job.seq)))
+
+    def _start(self, job):
+        self._active[job.host] = self._active.get(job.host, 0) + 1
+        job.reply = self.network_manager.get(image_request(job.url, _NETWORK_PRIORITY[job.priority()]))
+        job.started = time.monotonic()
+        job.reply.finished.connect(lambda job=job: self._on_finished(job))
+        if not self.timeout_timer.isActive():
+            self.timeout_timer.start()
+
+    def _on_finished(self, job):
+        reply = job.reply
+        self._active[job.host] -= 1
+        if self._jobs.get(job.url) is job:
+            del self._jobs[job.url]
+            if reply.error() == QNetworkReply.NoError:
+                data, error = reply.readAll(), None
+            elif job.timed_out:
+                data, error = None, f"图片加载超时({self.timeout_ms // 1000}秒)"
+            else:
+                data, error = None, reply.errorString()
+            for owner, _, on_finished in list(job.waiters.values()):
+                if shiboken6.isValid(owner):
+                    on_finished(data, error)
+        reply.deleteLater()
+        self._pump(job.host)
+
+    def _check_timeouts(self):
+        now = time.monotonic()
+        running = [job for job in self._jobs.values() if job.reply is not None]
+        if not running:
+            self.timeout_timer.stop()
+            return
+        for job in running:
+            if (now - job.started) * 1000 > self.timeout_ms:
+                print(f"[Timeout] 图片加载超时: {job.url}")
+                job.timed_out = True
+                job.reply.abort()
+
+
 class ImageLoader(QObject):
-    """网络图片加载器（使用共享网络管理器）"""
+    """原图加载器：下载由ImageFetchScheduler调度，解码在ImageDecoder的线程池中进行"""
     loaded = Signal(QPixmap)  # 加载成功信号
     error = Signal(str)       # 加载失败信号
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        # 使用共享的网络管理器
-        self.network_manager = SharedNetworkManager().manager
-        
-        # 设置QPixmapCache缓存大小为100MB (默认是10MB)
-        QPixmapCache.setCacheLimit(100 * 1024)  # 参数单位为KB
-        
         self.url = ''
-        self.current_reply = None
-        
-        # 超时计时器设置
-        self.timeout_timer = QTimer(self)
-        self.timeout_timer.setSingleShot(True)
-        self.timeout_timer.timeout.connect(self._handle_timeout)
-        self.timeout_seconds = 10  # 默认10秒超时
-
-    def set_timeout(self, seconds):
-        """设置超时时间(秒)"""
-        self.timeout_seconds = seconds
 
     def load(self, url):
         """加载图片（自动处理缓存）"""
-        
-        # URL标准化处理
-        if not url.startswith(('http://', 'https://')):
-            if url.startswith('//'):
-                url = 'https:' + url
-            else:
-                url = 'https://' + url
-        
-        self.url = url
-        
+        url = normalize_url(url)
         # 取消之前的请求
-        if self.current_reply:
-            print("[Cancel] 取消之前的请求")
-            self.current_reply.abort()
-            self.current_reply = None
+        ImageFetchScheduler.instance().cancel(self)
+        self.url = url
         
         # 检查缓存
-        pixmap = QPixmap()
-        if QPixmapCache.find(url, pixmap):
+        pixmap = image_cache.find(url)
+        if pixmap is not None:
             self.loaded.emit(pixmap)
             return
-            
-        # 无缓存则发起网络请求
-        request = QNetworkRequest(QUrl(url))
-        
-        # 关键修复1：设置用户代理和接受头
-        request.setRawHeader(b"User-Agent", b"Mozilla/5.0")
-        request.setRawHeader(b"Accept", b"image/*")
-        
-        reply = self.network_manager.get(request)
-        self.current_reply = reply
-        
-        # 添加详细的错误处理
-        def on_error(error):
-            print(f"[Network] 请求错误: {error} - {reply.errorString()}")
-            self.error.emit(reply.errorString())
-        
-        reply.errorOccurred.connect(on_error)
-        
-        # 添加SSL错误处理
-        def on_ssl_errors(errors):
-            print(f"[SSL] SSL错误: {errors}")
-            # 可以选择忽略错误（仅用于调试）
-            # reply.ignoreSslErrors()
-        reply.sslErrors.connect(on_ssl_errors)
-        
-        # 创建弱引用
-        weak_self = weakref.ref(self)
-        
-        def on_finished():
-            # 通过弱引用检查对象是否仍然存在
-            self_ref = weak_self()
-            if self_ref is None:
-                print("[Reference] ImageLoader实例已被销毁，忽略响应")
-                reply.deleteLater()
-                return
-                
-            # 处理响应
-            self_ref._handle_response(reply)
-        
-        # 连接完成信号
-        reply.finished.connect(on_finished)
-        
-        # 启动超时计时器
-        self.timeout_timer.start(self.timeout_seconds * 1000)
-        
-    def _handle_response(self, reply):
-        """处理网络响应"""
-        try:
-            # 检查对象是否有效
-            if not hasattr(self, 'timeout_timer') or not self.timeout_timer:
-                reply.deleteLater()
-                return
-            # 停止超时计时器
-            self.timeout_timer.stop()
-            
-            # 检查是否是当前活动的reply
-            if reply != self.current_reply:
-                print("[Response] 收到过期回复，忽略处理")
-                reply.deleteLater()
-                return
-                
-            # 清除当前reply引用
-            self.current_reply = None
-            
-            if reply.error() != QNetworkReply.NoError:
-                if reply.error() != QNetworkReply.OperationCanceledError:  # 忽略手动取消的错误
-                    error_msg = f"图片加载失败: {reply.errorString()}"
-                    print(f"[Error] {error_msg}")
-                    self.error.emit(error_msg)
-                else:
-                    print("[Cancel] 请求已被手动取消")
-                reply.deleteLater()
-                return
-                
-            # 读取数据
-            data = reply.readAll()
-            
-            # 加载图片
-            pixmap = QPixmap()
-            if pixmap.loadFromData(data):
-                # 存入缓存并发送加载信号
-                QPixmapCache.insert(self.url, pixmap)
-                self.loaded.emit(pixmap)
-            else:
-                error_msg = "错误：加载的图片数据无效"
-                print(f"[Error] {error_msg}")
-                self.error.emit(error_msg)
-            
-            reply.deleteLater()
-        except RuntimeError as e:
-            if "already deleted" in str(e):
-                return
 
-    def _handle_timeout(self):
-        """处理请求超时"""
-        if self.current_reply:
-            # 仅取消请求
-            self.current_reply.abort()
-            self.error.emit(f"错误：图片加载超时({self.timeout_seconds}秒)")
-            print("[Timeout] 请求已取消")
-            
\ No newline at end of file
+        # 原图是用户点开的，优先下载
+        ImageFetchScheduler.instance().fetch(self, url, PRIORITY_VISIBLE,
+                                             lambda data, error: self._on_fetched(url, data, error))
+
+    def load_file(self, path):
+        """加载本地图片，读取和解码在线程池中进行"""
+        ImageFetchScheduler.instance().cancel(self)
+        self.url = path
+        pixmap = image_cache.find(path)
+        if pixmap is not None:
+            self.loaded.emit(pixmap)
+            return
+        ImageDecoder.instance().submit(self, decode_image, path,
+                                       on_result=lambda image: self._on_decoded(path, image))
+
+    def _on_fetched(self, url, data, error):
+        if url != self.url:
+            return
+        if error is not None:
+            error_msg = f"图片加载失败: {error}"
+            print(f"[Error] {error_msg}")
+            self.error.emit(error_msg)
+            return
+        # 在线程池中解码
+        ImageDecoder.instance().submit(self, decode_image, data,
+                                       on_result=lambda image: self._on_decoded(url, image))
+
+    def _on_decoded(self, url, image):
+        """解码完成，回到GUI线程后转换成QPixmap"""
+        if url != self.url:
+            # 解码期间又开始加载别的图片
+            return
+        if image.isNull():
+            error_msg = "错误：加载的图片数据无效"
+            print(f"[Error] {error_msg}")
+            self.error.emit(error_msg)
+            return
+        pixmap = QPixmap.fromImage(image)
+        # 存入缓存并发送加载信号
+        image_cache.insert(url, None, pixmap)
+        self.loaded.emit(pixmap)
+
+
+class ThumbnailLoader(QObject):
+    """按固定尺寸加载缩略图：内存缓存 -> 磁盘上的缩略图 -> 下载/读取原图，缩小后保存
+    下载由ImageFetchScheduler按priority调度；读取和解码在ImageDecoder的线程池中进行，原图不进入内存缓存
+    """
+    loaded = Signal(str)  # 加载完成（成功或失败）：地址或本地路径
+    # 正在解码的缩略图键 -> 等待它的加载器，所有实例共用，同一张缩略图只解码一次
+    _decoding = {}
+
+    def __init__(self, size, parent=None, priority=PRIORITY_VISIBLE):
+        super().__init__(parent)
+        self.size = size
+        self.priority = priority
+        self.fetching = set()  # 正在下载的地址
+        self.decoding = set()  # 正在解码的地址/路径
+        self.failed = set()    # 加载失败的地址/路径，不再重试
+
+    def source(self, url, local_path=None):
+        """图片的来源：已下载时为本地路径，否则为补全后的地址"""
+        return local_path if local_path else normalize_url(url)
+
+    def thumbnail(self, source, is_local=False):
+        """已有缩略图时返回，否则开始生成并返回None，完成后发出loaded"""
+        pixmap = find_thumbnail(source, self.size)
+        if pixmap is not None or source in self.failed or source in self.decoding:
+            return pixmap
+        if is_local or has_thumbnail(source, self.size):
+            # 本地图片或磁盘上已有缩略图，不需要下载
+            self.decode(source)
+        elif source not in self.fetching:
+            self.fetching.add(source)
+            ImageFetchScheduler.instance().fetch(
+                self, source, self.priority,
+                lambda data, error, source=source: self._on_fetched(source, data, error)
+            )
+        return None
+
+    def has_failed(self, source):
+        return source in self.failed
+
+    def retain(self, sources):
+        """只保留这些地址的请求，其余（已经不需要的）取消"""
+        sources = set(sources)
+        for source in self.fetching - sources:
+            self.fetching.discard(source)
+            ImageFetchScheduler.instance().cancel(self, source)
+
+    def cancel(self):
+        self.retain(())
+        self.failed.clear()
+
+    def _on_fetched(self, source, data, error):
+        self.fetching.discard(source)
+        if error is None:
+            self.decode(source, data)
+            return
+        print(f"[Error] 图片加载失败: {error}")
+        self.failed.add(source)
+        self.loaded.emit(source)
+
+    def decode(self, source, data=None):
+        self.decoding.add(source)
+        key = ImageCache.key(source, self.size)
+        waiters = ThumbnailLoader._decoding.get(key)
+        if waiters is not None:
+            waiters.append(self)
+            return
+        ThumbnailLoader._decoding[key] = [self]
+        decoder = ImageDecoder.instance()
+        size = self.size
+        decoder.submit(decoder, load_thumbnail, source, size, data,
+                       on_result=lambda image: ThumbnailLoader._on_decoded(source, size, image),
+                       priority=self.priority)
+
+    @classmethod
+    def _on_decoded(cls, source, size, image):
+        if image.isNull():
+            print(f"[Error] 图片数据无效: {source}")
+        else:
+            cache_thumbnail(source, image, size)
+        for loader in cls._decoding.pop(ImageCache.key(source, size), []):
+            if shiboken6.isValid(loader):
+                loader._on_thumbnail_ready(source, not image.isNull())
+
+    def _on_thumbnail_ready(self, source, ok):
+        self.decoding.discard(source)
+        if not ok:
+            self.failed.add(source)
+        self.loaded.emit(source)
+
+
+class ImagePrefetcher(ThumbnailLoader):
+    """以最低优先级预先生成缩略图，之后ThumbnailLoader直接命中缓存"""
+
+    def __init__(self, size, parent=None):
+        super().__init__(size, parent, PRIORITY_PREFETCH)
+
+    def prefetch(self, urls):
+        """预取这些图片，已有缩略图或正在预取的跳过"""
+        for url in urls:
+            self.thumbnail(normalize_url(url))
@@ -0,0 +1,33 @@
+from PySide6.QtWidgets import QWidget, QVBoxLayout
+import time
+
+
+class LazyPage(QWidget):
+    """导航页的占位控件，第一次显示（或第一次用到）时才创建真正的页面
+    factory(parent)返回页面控件，创建后铺满占位控件
+    """
+
+    def __init__(self, factory, name, parent=None):
+        super().__init__(parent)
+        self.factory = factory
+        self.name = name
+        self._page = None
+        self.vBoxLayout = QVBoxLayout(self)
+        self.vBoxLayout.setContentsMargins(0, 0, 0, 0)
+
+    def is_built(self):
+        """页面是否已经创建"""
+        return self._page is not None
+
+    def page(self):
+        """返回页面，还没有创建时先创建"""
+        if self._page is None:
+            start = time.perf_counter()
+            self._page = self.factory(self)
+            self.vBoxLayout.addWidget(self._page)
+            print(f"[启动] 创建{self.name}页面: {(time.perf_counter() - start) * 1000:.1f} ms")
+        return self._page
+
+    def showEvent(self, event):
+        self.page()
+        super().showEvent(event)
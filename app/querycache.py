@@ -0,0 +1,171 @@
+import copy
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+
+def _freeze(value):
+    """把参数转换成可哈希的形式，用于拼接缓存键"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+
+class QueryCache:
+    """查询结果缓存（LRU + 过期时间）
+    每个缓存项记录它读取过的表，写操作按表淘汰相关的缓存项
+    每张表有一个版本号，淘汰时加一；读操作在查询前记下版本号，写入缓存时版本号已经改变则不写入，
+    避免与写操作并发的查询把旧结果写回缓存
+    """
+
+    def __init__(self, maxsize=512, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # 键 -> (值, 过期时间, 表名集合)
+        self._by_table = {}            # 表名 -> 键集合
+        self._generations = {}         # 表名 -> 版本号
+        self._generation = 0           # 清空全部缓存时的版本号
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(tables):
+        return frozenset(t.lower() for t in tables)
+
+    def get(self, key):
+        """查找缓存，返回 (是否命中, 值)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # 返回副本，避免调用方修改缓存中的对象
+            return True, copy.deepcopy(entry[0])
+
+    def generations(self, tables):
+        """取出这些表当前的版本号，查询前调用，传给set"""
+        tables = self._normalize(tables)
+        with self._lock:
+            return self._generation, tuple(sorted((t, self._generations.get(t, 0)) for t in tables))
+
+    def set(self, key, value, tables, ttl=None, generations=None):
+        """写入缓存，tables为该结果读取过的表
+        generations为查询前generations()的返回值，期间这些表被淘汰过时不写入，返回False
+        """
+        tables = self._normalize(tables)
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generations is not None and generations != self.generations(tables):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (copy.deepcopy(value), expires, tables)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, tables=None):
+        """淘汰读取过这些表的缓存项，tables为空时清空全部缓存"""
+        with self._lock:
+            if not tables:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._by_table.clear()
+                self._generation += 1
+            else:
+                keys = set()
+                for table in self._normalize(tables):
+                    keys |= self._by_table.get(table, set())
+                    self._generations[table] = self._generations.get(table, 0) + 1
+                for key in keys:
+                    self._remove(key)
+                removed = len(keys)
+            self.invalidations += removed
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for table in entry[2]:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def stats(self):
+        """缓存统计，用于评估缓存大小是否合适"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+def _resolve_tables(tables, func, args, kwargs):
+    """tables可以是表名元组，也可以是根据调用参数返回表名的函数"""
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    if callable(tables):
+        return bound, tables(**bound.arguments)
+    return bound, tables
+
+
+def cached(cache, tables):
+    """读方法的装饰器：以方法名和参数为键缓存返回值
+    返回None的结果（通常是查询出错）不缓存
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound, used_tables = _resolve_tables(tables, func, args, kwargs)
+            key = (func.__qualname__, _freeze(bound.arguments))
+            hit, value = cache.get(key)
+            if hit:
+                return value
+            generations = cache.generations(used_tables)
+            value = func(*args, **kwargs)
+            if value is not None:
+                cache.set(key, value, used_tables, generations=generations)
+            return value
+        return wrapper
+    return decorator
+
+
+def invalidates(cache, tables):
+    """写方法的装饰器：执行后淘汰读取过相关表的缓存项"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _, used_tables = _resolve_tables(tables, func, args, kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                cache.invalidate(used_tables)
+        return wrapper
+    return decorator
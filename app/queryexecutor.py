@@ -0,0 +1,116 @@
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+import shiboken6
+from .databaseapi import DatabaseAPI
+
+
+class QueryHandle:
+    """一次后台查询的句柄"""
+
+    def __init__(self, executor, slot, generation):
+        self._executor = executor
+        self._slot = slot
+        self._generation = generation
+
+    def is_current(self):
+        """是否仍是该位置上最新的请求（没有被新请求取代或取消）"""
+        return self._executor._generations.get(self._slot) == self._generation
+
+    def cancel(self):
+        """取消：结果返回后直接丢弃"""
+        if self.is_current():
+            self._executor._generations[self._slot] += 1
+
+
+class _QueryTask(QRunnable):
+    """在线程池中执行一次DatabaseAPI调用"""
+
+    def __init__(self, executor, slot, generation, func, args, kwargs, timeout_ms):
+        super().__init__()
+        self.executor = executor
+        self.slot = slot
+        self.generation = generation
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout_ms = timeout_ms
+
+    def run(self):
+        try:
+            with DatabaseAPI.statement_timeout(self.timeout_ms):
+                result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            print(f"[Query] 后台查询失败: {str(e)}")
+            self.executor._finished.emit(self.slot, self.generation, None, e)
+            return
+        self.executor._finished.emit(self.slot, self.generation, result, None)
+
+
+class QueryExecutor(QObject):
+    """后台查询执行器（单例）
+    DatabaseAPI调用在线程池中执行，结果回到GUI线程后再调用回调
+    同一个owner的同一个key上，新请求会取代旧请求，旧请求的结果被丢弃
+    """
+    _instance = None
+    # 工作线程发出，排队到GUI线程处理：(位置, 请求序号, 结果, 异常)
+    _finished = Signal(object, int, object, object)
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = QueryExecutor()
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        # 线程数不超过连接池常驻连接数，避免线程在连接池上排队
+        self.pool.setMaxThreadCount(4)
+        self.default_timeout_ms = 15000
+        self._generations = {}  # (id(owner), key) -> 最新请求序号
+        self._pending = {}      # (位置, 请求序号) -> (owner, on_result, on_error, 是否不做取代)
+        self._finished.connect(self._dispatch)
+
+    def submit(self, owner, key, func, *args, on_result=None, on_error=None, timeout_ms=None, priority=0, **kwargs):
+        """提交一次后台查询
+        参数：
+        - owner: 发起查询的控件，控件销毁后不再调用回调
+        - key: 同一owner上的请求位置，新请求会取代旧请求；为None时不做取代
+        - func: 要执行的DatabaseAPI方法，args/kwargs为其参数
+        - on_result: 成功时的回调，参数为返回值
+        - on_error: 失败时的回调，参数为异常
+        - timeout_ms: 单条SELECT的最长执行时间（毫秒），为None时使用默认值，0表示不限制
+        - priority: 线程池中的优先级，预取等后台请求用负数，排在用户操作的查询之后
+        返回QueryHandle
+        """
+        transient = key is None
+        slot = (id(owner), object() if transient else key)
+        generation = self._generations.get(slot, 0) + 1
+        self._generations[slot] = generation
+        self._pending[(slot, generation)] = (owner, on_result, on_error, transient)
+        if timeout_ms is None:
+            timeout_ms = self.default_timeout_ms
+        self.pool.start(_QueryTask(self, slot, generation, func, args, kwargs, timeout_ms), priority)
+        return QueryHandle(self, slot, generation)
+
+    def cancel(self, owner, key):
+        """取消owner在key上的请求"""
+        slot = (id(owner), key)
+        if slot in self._generations:
+            self._generations[slot] += 1
+
+    def _dispatch(self, slot, generation, result, error):
+        owner, on_result, on_error, transient = self._pending.pop((slot, generation), (None, None, None, True))
+        current = self._generations.get(slot) == generation
+        if transient:
+            # 不做取代的请求，用完即删
+            self._generations.pop(slot, None)
+        if not current:
+            print("[Query] 请求已被取代，丢弃结果")
+            return
+        if owner is None or not shiboken6.isValid(owner):
+            return
+        if error is not None:
+            if on_error:
+                on_error(error)
+        elif on_result:
+            on_result(result)
@@ -0,0 +1,376 @@
+from PySide6.QtCore import Qt, Signal, QAbstractListModel, QModelIndex, QRect, QSize, QTimer
+from PySide6.QtGui import QPainter, QColor, QFont, QFontMetrics, QPen, QPainterPath
+from PySide6.QtWidgets import QApplication, QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+from qfluentwidgets import SmoothScrollDelegate, isDarkTheme, themeColor, RoundMenu, Action, MenuAnimationType
+from qfluentwidgets import FluentIcon as FIF
+from .databaseapi import DatabaseAPI
+from .queryexecutor import QueryExecutor
+from .imageloader import ThumbnailLoader, ImagePrefetcher
+
+
+# 卡片上封面的尺寸，缩略图按这个尺寸生成
+CARD_IMAGE_SIZE = QSize(160, 200)
+
+
+class SearchResultModel(QAbstractListModel):
+    """搜索结果的稀疏模型：行数为结果总数，按块在后台查询，只保留视图附近的max_blocks块
+    fetch_call(page, cursor)返回 (DatabaseAPI方法, 参数)，每块对应per_page为block_size的一页；
+    相邻块已加载时用它的翻页令牌按keyset查询，否则按页码查询
+    """
+    RowRole = Qt.UserRole + 1
+    loaded = Signal(int)     # 重新搜索后第一块返回：结果总数
+    failed = Signal(object)  # 视图需要的块查询失败：异常
+
+    def __init__(self, block_size=60, max_blocks=12, parent=None):
+        super().__init__(parent)
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.fetch_call = None
+        self.total = 0
+        self.blocks = {}   # 块号 -> 行列表（RoleCardRow/SourceCardRow）
+        self.cursors = {}  # 块号 -> (prev_cursor, next_cursor)
+        self.pending = {}  # 块号 -> 是否为预取
+        self.last_block = 0  # 视图最近访问的块，淘汰时保留它附近的块
+        self.waiting_first = False
+        self.image_prefetcher = ImagePrefetcher(CARD_IMAGE_SIZE, self)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.total
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, self.RowRole):
+            return None
+        row = self.row_at(index.row())
+        if row is None:
+            return None
+        return row if role == self.RowRole else row.name
+
+    def row_at(self, row):
+        """第row行的数据，所在块还没有加载时发起查询并返回None"""
+        block, offset = divmod(row, self.block_size)
+        self.last_block = block
+        rows = self.blocks.get(block)
+        if rows is None:
+            self.fetch_block(block)
+            return None
+        return rows[offset] if offset < len(rows) else None
+
+    def loaded_rows(self, first, last):
+        """first到last行中已经加载的行，不发起查询"""
+        rows = []
+        for row in range(max(first, 0), min(last, self.total - 1) + 1):
+            block, offset = divmod(row, self.block_size)
+            block_rows = self.blocks.get(block)
+            if block_rows is not None and offset < len(block_rows):
+                rows.append(block_rows[offset])
+        return rows
+
+    def reset(self, fetch_call):
+        """按新的搜索条件重新查询，之前的查询和预取全部作废"""
+        self.clear()
+        self.fetch_call = fetch_call
+        self.waiting_first = True
+        self.fetch_block(0)
+
+    def clear(self):
+        for block in self.pending:
+            QueryExecutor.instance().cancel(self, ('block', block))
+        self.image_prefetcher.cancel()
+        self.beginResetModel()
+        self.fetch_call = None
+        self.total = 0
+        self.blocks = {}
+        self.cursors = {}
+        self.pending = {}
+        self.last_block = 0
+        self.waiting_first = False
+        self.endResetModel()
+
+    def fetch_block(self, block, prefetch=False):
+        if self.fetch_call is None or block in self.blocks or block in self.pending:
+            return
+        if block > 0 and block * self.block_size >= self.total:
+            return
+        cursor = None
+        if block - 1 in self.cursors:
+            cursor = self.cursors[block - 1][1]
+        elif block + 1 in self.cursors:
+            cursor = self.cursors[block + 1][0]
+        if not prefetch:
+            # 快速拖动滚动条时，已经离开视野的块不再需要
+            for other in [other for other in self.pending if abs(other - block) > 2]:
+                QueryExecutor.instance().cancel(self, ('block', other))
+                del self.pending[other]
+        func, kwargs = self.fetch_call(block + 1, cursor)
+        self.pending[block] = prefetch
+        QueryExecutor.instance().submit(
+            self, ('block', block), func, **kwargs,
+            on_result=lambda result: self.on_block_loaded(block, result),
+            on_error=lambda error: self.on_block_failed(block, error),
+            priority=-1 if prefetch else 0
+        )
+
+    def on_block_loaded(self, block, result):
+        prefetch = self.pending.pop(block, False)
+        total = result['total']
+        if total > self.total:
+            self.beginInsertRows(QModelIndex(), self.total, total - 1)
+            self.total = total
+            self.endInsertRows()
+        elif total < self.total:
+            self.beginRemoveRows(QModelIndex(), total, self.total - 1)
+            self.total = total
+            self.endRemoveRows()
+
+        rows = result['images']
+        self.blocks[block] = rows
+        self.cursors[block] = (result['prev_cursor'], result['next_cursor'])
+        if rows:
+            start = block * self.block_size
+            self.dataChanged.emit(self.index(start), self.index(min(start + len(rows), self.total) - 1))
+        self.evict()
+
+        if self.waiting_first:
+            self.waiting_first = False
+            self.loaded.emit(self.total)
+        if prefetch:
+            # 预取的块：以低优先级生成封面缩略图，用户滚动到这里时直接命中缓存
+            self.image_prefetcher.prefetch(row.url for row in rows if not row.is_downloaded)
+        else:
+            # 视图需要的块返回后，在后台查询前后两块
+            self.fetch_block(block + 1, prefetch=True)
+            if block > 0:
+                self.fetch_block(block - 1, prefetch=True)
+
+    def on_block_failed(self, block, error):
+        prefetch = self.pending.pop(block, False)
+        if not prefetch:
+            self.waiting_first = False
+            self.failed.emit(error)
+
+    def evict(self):
+        """只保留离视图最近的max_blocks块，内存不随结果数量增长"""
+        while len(self.blocks) > self.max_blocks:
+            farthest = max(self.blocks, key=lambda block: abs(block - self.last_block))
+            del self.blocks[farthest]
+            self.cursors.pop(farthest, None)
+
+
+class CardDelegate(QStyledItemDelegate):
+    """结果卡片的绘制：封面、名称、类型和简介，多选模式下在左上角画勾选框"""
+    CARD_SIZE = QSize(212, 330)
+    IMAGE_SIZE = CARD_IMAGE_SIZE
+
+    def __init__(self, view, imgtype, loader):
+        super().__init__(view)
+        self.imgtype = imgtype
+        self.loader = loader
+        self.selection_mode = False
+        self.is_selected = lambda entity_id: False
+
+    def sizeHint(self, option, index):
+        return self.CARD_SIZE
+
+    def cover(self, row):
+        """卡片大小的封面缩略图，还没有生成时返回None"""
+        return self.loader.thumbnail(self.source(row), row.is_downloaded)
+
+    def source(self, row):
+        return self.loader.source(row.url, row.local_path if row.is_downloaded else None)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHints(QPainter.Antialiasing | QPainter.SmoothPixmapTransform)
+        dark = isDarkTheme()
+        hover = bool(option.state & QStyle.State_MouseOver)
+        rect = option.rect.adjusted(6, 6, -6, -6)
+        if dark:
+            painter.setBrush(QColor(255, 255, 255, 21 if hover else 13))
+            painter.setPen(QColor(0, 0, 0, 48))
+        else:
+            painter.setBrush(QColor(255, 255, 255, 230 if hover else 170))
+            painter.setPen(QColor(0, 0, 0, 19))
+        painter.drawRoundedRect(rect, 8, 8)
+
+        image_rect = QRect(rect.x() + (rect.width() - self.IMAGE_SIZE.width()) // 2, rect.y() + 8,
+                           self.IMAGE_SIZE.width(), self.IMAGE_SIZE.height())
+        row = index.data(SearchResultModel.RowRole)
+        painter.setPen(QColor(128, 128, 128))
+        if row is None:
+            painter.drawText(image_rect, Qt.AlignCenter, "加载中")
+            painter.restore()
+            return
+
+        pixmap = self.cover(row)
+        if pixmap is None:
+            painter.drawText(image_rect, Qt.AlignCenter,
+                             "加载失败" if self.loader.has_failed(self.source(row)) else "加载中")
+        else:
+            # 缩略图不会超过卡片上的封面大小，比它小的原图在这里放大显示
+            size = pixmap.size().scaled(self.IMAGE_SIZE, Qt.KeepAspectRatio)
+            painter.drawPixmap(QRect(image_rect.x() + (image_rect.width() - size.width()) // 2,
+                                     image_rect.y() + (image_rect.height() - size.height()) // 2,
+                                     size.width(), size.height()), pixmap)
+
+        y = image_rect.bottom() + 8
+        painter.setPen(QColor(224, 224, 224))
+        painter.drawLine(rect.x() + 8, y, rect.right() - 8, y)
+
+        text_color = QColor(255, 255, 255) if dark else QColor(0, 0, 0)
+        width = rect.width() - 16
+        font = QFont(option.font)
+        font.setPixelSize(16)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(text_color)
+        title_rect = QRect(rect.x() + 8, y + 6, width, 22)
+        painter.drawText(title_rect, Qt.AlignCenter,
+                         QFontMetrics(font).elidedText(row.name, Qt.ElideRight, width))
+        y = title_rect.bottom() + 2
+
+        if self.imgtype == 2:
+            font = QFont(option.font)
+            font.setPixelSize(12)
+            font.setItalic(True)
+            painter.setFont(font)
+            painter.setPen(QColor(128, 128, 128))
+            type_rect = QRect(rect.x() + 8, y, width, 18)
+            painter.drawText(type_rect, Qt.AlignCenter, row.source_type)
+            y = type_rect.bottom() + 2
+
+        # 描述 (数据库中已截断)
+        font = QFont(option.font)
+        font.setPixelSize(10)
+        painter.setFont(font)
+        painter.setPen(text_color)
+        painter.drawText(QRect(rect.x() + 8, y, width, 40), Qt.AlignHCenter | Qt.AlignTop | Qt.TextWordWrap,
+                         row.snippet or "")
+
+        if self.selection_mode:
+            self.draw_check_box(painter, QRect(rect.x() + 10, rect.y() + 10, 20, 20), self.is_selected(row.id))
+        painter.restore()
+
+    def draw_check_box(self, painter, rect, checked):
+        if checked:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(themeColor())
+        else:
+            painter.setPen(QPen(QColor(255, 255, 255, 139) if isDarkTheme() else QColor(0, 0, 0, 110), 1))
+            painter.setBrush(QColor(0, 0, 0, 26) if isDarkTheme() else QColor(255, 255, 255, 230))
+        painter.drawRoundedRect(rect, 4, 4)
+        if checked:
+            path = QPainterPath()
+            path.moveTo(rect.x() + 5, rect.y() + 10)
+            path.lineTo(rect.x() + 9, rect.y() + 14)
+            path.lineTo(rect.x() + 15, rect.y() + 6)
+            painter.setPen(QPen(QColor(255, 255, 255), 2))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawPath(path)
+
+
+class ResultGridView(QListView):
+    """搜索结果网格：只绘制可见的卡片，滚动时按需查询结果块、加载封面"""
+    itemClicked = Signal(object)  # 左键点击卡片：该行数据
+
+    def __init__(self, imgtype, parent=None):
+        super().__init__(parent)
+        self.imgtype = imgtype
+        self.scrollDelegate = SmoothScrollDelegate(self)
+        self.loader = ThumbnailLoader(CARD_IMAGE_SIZE, self)
+        self.card_delegate = CardDelegate(self, imgtype, self.loader)
+        self.setItemDelegate(self.card_delegate)
+
+        self.setViewMode(QListView.IconMode)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setGridSize(CardDelegate.CARD_SIZE)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setMouseTracking(True)
+        self.setStyleSheet("QListView { background: transparent; border: none; }")
+
+        self.loader.loaded.connect(lambda url: self.viewport().update())
+        self.clicked.connect(self.on_clicked)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.on_context_menu)
+
+        # 停止滚动后，取消已经移出视野的封面请求
+        self.retain_timer = QTimer(self)
+        self.retain_timer.setSingleShot(True)
+        self.retain_timer.setInterval(200)
+        self.retain_timer.timeout.connect(self.retain_visible)
+        self.verticalScrollBar().valueChanged.connect(lambda: self.retain_timer.start())
+
+    def visible_range(self):
+        """可见的第一行和最后一行"""
+        grid = self.gridSize()
+        columns = max(1, self.viewport().width() // grid.width())
+        top = self.verticalScrollBar().value()
+        first = top // grid.height() * columns
+        last = ((top + self.viewport().height()) // grid.height() + 1) * columns - 1
+        return first, last
+
+    def visible_rows(self):
+        """可见且已经加载的行数据"""
+        model = self.model()
+        if model is None:
+            return []
+        return model.loaded_rows(*self.visible_range())
+
+    def retain_visible(self):
+        self.loader.retain(self.card_delegate.source(row) for row in self.visible_rows() if not row.is_downloaded)
+
+    def set_selection_mode(self, enabled, is_selected=None):
+        self.card_delegate.selection_mode = enabled
+        if is_selected is not None:
+            self.card_delegate.is_selected = is_selected
+        self.viewport().update()
+
+    def cover(self, row):
+        return self.card_delegate.cover(row)
+
+    def on_clicked(self, index):
+        row = index.data(SearchResultModel.RowRole)
+        if row is not None:
+            self.itemClicked.emit(row)
+
+    def on_context_menu(self, pos):
+        row = self.indexAt(pos).data(SearchResultModel.RowRole)
+        if row is None:
+            return
+        menu = RoundMenu(parent=self)
+
+        # 创建Copy主菜单项及其子菜单
+        copy_menu = RoundMenu("Copy", self)
+        copy_menu.setIcon(FIF.COPY)
+        copy_menu.addActions([
+            Action(FIF.PHOTO, 'Copy picture', triggered=lambda: self.copy_to_clipboard(row, "picture")),
+            Action(FIF.TAG, 'Copy name', triggered=lambda: self.copy_to_clipboard(row, "name")),
+            Action(FIF.DOCUMENT, 'Copy description', triggered=lambda: self.copy_to_clipboard(row, "description")),
+        ])
+        menu.addMenu(copy_menu)
+
+        # 显示菜单
+        menu.exec(self.viewport().mapToGlobal(pos), aniType=MenuAnimationType.DROP_DOWN)
+
+    def copy_to_clipboard(self, row, data_type):
+        """将指定类型的数据复制到剪贴板"""
+        clipboard = QApplication.clipboard()
+
+        if data_type == "picture":
+            pixmap = self.cover(row)
+            if pixmap is not None:
+                clipboard.setPixmap(pixmap)
+        elif data_type == "name":
+            clipboard.setText(row.name)
+        elif data_type == "description":
+            # 卡片上只有截断的简介，完整简介在后台从详情中读取
+            if self.imgtype == 1:
+                func = DatabaseAPI.get_image_details_role
+            else:
+                func = DatabaseAPI.get_image_details_source
+            QueryExecutor.instance().submit(
+                self, 'copy', func, row.id,
+                on_result=lambda details: clipboard.setText((details or {}).get('description') or "")
+            )
@@ -61,6 +61,11 @@ class SearchPage(QWidget):
         if widget:
             self.stackedWidget.setCurrentWidget(widget)
     
+    def set_ready(self, ready):
+        """投影表检查完成前为False，期间的搜索排队，变为True时执行"""
+        self.page_role.set_ready(ready)
+        self.page_source.set_ready(ready)
+
     def refresh(self):
         if self.page_role.current_name != '' or len(self.page_role.current_tags) != 0 or self.page_role.total_items != 0:
             self.page_role.do_search()
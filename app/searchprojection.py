@@ -0,0 +1,194 @@
+"""搜索卡片投影表：每张图片一行，预先拼好卡片需要的字段和排序键
+写入角色/作品或图片后调用refresh_cards，删除时随外键级联删除
+整表重建：python -m app.searchprojection
+游标为dialect.SqliteCursor时使用SQLite的建表语句和函数
+"""
+
+from collections import namedtuple
+from .dialect import MYSQL, SQLITE, backend_of
+
+# 卡片上显示的简介长度，超出部分用省略号代替
+SNIPPET_LENGTH = 30
+
+_SNIPPET = {
+    MYSQL: f"""CASE WHEN CHAR_LENGTH({{column}}) > {SNIPPET_LENGTH}
+                THEN CONCAT(LEFT({{column}}, {SNIPPET_LENGTH}), '...')
+                ELSE {{column}} END""",
+    SQLITE: f"""CASE WHEN LENGTH({{column}}) > {SNIPPET_LENGTH}
+                THEN SUBSTR({{column}}, 1, {SNIPPET_LENGTH}) || '...'
+                ELSE {{column}} END""",
+}
+
+# 每种imgtype（1表示角色，2表示作品）的投影表，key为基础表中的实体ID列
+# select中的{snippet}按后端替换成_SNIPPET中的表达式
+_CARD_TABLES = {
+    1: {
+        'table': "RoleCard",
+        'key': "ri.role_id",
+        'create': """
+            CREATE TABLE IF NOT EXISTS RoleCard (
+                role_id INT NOT NULL,
+                image_id INT NOT NULL,
+                name VARCHAR(30) NOT NULL,
+                snippet VARCHAR(40),
+                image_url VARCHAR(255) NOT NULL,
+                is_downloaded BOOLEAN DEFAULT FALSE,
+                local_path VARCHAR(255),
+                PRIMARY KEY (role_id, image_id),
+                UNIQUE KEY uk_rolecard_image (image_id),
+                FULLTEXT KEY idx_rolecard_name (name) WITH PARSER ngram,
+                FOREIGN KEY (image_id) REFERENCES RoleImage(image_id) ON DELETE CASCADE
+            ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+        """,
+        'sqlite_create': (
+            """
+            CREATE TABLE IF NOT EXISTS RoleCard (
+                role_id INTEGER NOT NULL,
+                image_id INTEGER NOT NULL UNIQUE REFERENCES RoleImage(image_id) ON DELETE CASCADE,
+                name TEXT NOT NULL,
+                snippet TEXT,
+                image_url TEXT NOT NULL,
+                is_downloaded INTEGER DEFAULT 0,
+                local_path TEXT,
+                PRIMARY KEY (role_id, image_id)
+            )
+            """,
+        ),
+        'select': """
+            SELECT ri.role_id, ri.image_id, r.name, {snippet},
+                   ri.image_url, ri.is_downloaded, ri.local_path
+            FROM RoleImage ri
+            JOIN Role r ON ri.role_id = r.role_id
+        """,
+        'snippet_column': "r.description",
+        'columns': "role_id, image_id, name, snippet, image_url, is_downloaded, local_path",
+    },
+    2: {
+        'table': "SourceCard",
+        'key': "si.source_id",
+        'create': """
+            CREATE TABLE IF NOT EXISTS SourceCard (
+                source_id INT NOT NULL,
+                image_id INT NOT NULL,
+                name VARCHAR(255) NOT NULL,
+                snippet VARCHAR(40),
+                source_type ENUM('animation', 'book', 'game') NOT NULL,
+                url VARCHAR(255) NOT NULL,
+                is_downloaded BOOLEAN DEFAULT FALSE,
+                local_path VARCHAR(255),
+                release_date DATE,
+                PRIMARY KEY (source_id, image_id),
+                UNIQUE KEY uk_sourcecard_image (image_id),
+                KEY idx_sourcecard_release_date (release_date, source_id, image_id),
+                FULLTEXT KEY idx_sourcecard_name (name) WITH PARSER ngram,
+                FOREIGN KEY (image_id) REFERENCES SourceImage(image_id) ON DELETE CASCADE
+            ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+        """,
+        'sqlite_create': (
+            """
+            CREATE TABLE IF NOT EXISTS SourceCard (
+                source_id INTEGER NOT NULL,
+                image_id INTEGER NOT NULL UNIQUE REFERENCES SourceImage(image_id) ON DELETE CASCADE,
+                name TEXT NOT NULL,
+                snippet TEXT,
+                source_type TEXT NOT NULL,
+                url TEXT NOT NULL,
+                is_downloaded INTEGER DEFAULT 0,
+                local_path TEXT,
+                release_date DATE,
+                PRIMARY KEY (source_id, image_id)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_sourcecard_release_date
+            ON SourceCard(release_date, source_id, image_id)
+            """,
+        ),
+        'select': """
+            SELECT si.source_id, si.image_id, s.name, {snippet},
+                   s.source_type, si.url, si.is_downloaded, si.local_path, s.release_date
+            FROM SourceImage si
+            JOIN Source s ON si.source_id = s.source_id
+        """,
+        'snippet_column': "s.description",
+        'columns': "source_id, image_id, name, snippet, source_type, url, is_downloaded, local_path, release_date",
+    },
+}
+
+CARD_TABLES = {imgtype: spec['table'] for imgtype, spec in _CARD_TABLES.items()}
+
+# 搜索结果中每张卡片的数据，只含卡片显示需要的字段；完整简介只在详情页读取
+RoleCardRow = namedtuple('RoleCardRow', ['id', 'url', 'name', 'snippet', 'is_downloaded', 'local_path'])
+SourceCardRow = namedtuple('SourceCardRow', ['id', 'url', 'name', 'snippet', 'source_type', 'is_downloaded', 'local_path'])
+CARD_ROWS = {1: RoleCardRow, 2: SourceCardRow}
+
+
+def _select(spec, backend):
+    """从基础表生成卡片行的SELECT"""
+    return spec['select'].format(snippet=_SNIPPET[backend].format(column=spec['snippet_column']))
+
+
+def create_card_tables(cursor):
+    """创建投影表（已存在时跳过）"""
+    for spec in _CARD_TABLES.values():
+        if backend_of(cursor) == SQLITE:
+            for statement in spec['sqlite_create']:
+                cursor.execute(statement)
+        else:
+            cursor.execute(spec['create'])
+
+
+def refresh_statements(imgtype, ids, backend=MYSQL):
+    """重新生成这些角色/作品卡片所需的语句，返回 [(sql, 参数)]"""
+    spec = _CARD_TABLES[imgtype]
+    ids = list(ids)
+    if not ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(ids))
+    column = spec['key'].split('.')[1]
+    return [
+        (f"DELETE FROM {spec['table']} WHERE {column} IN ({placeholders})", tuple(ids)),
+        (f"INSERT INTO {spec['table']} ({spec['columns']}) {_select(spec, backend)} WHERE {spec['key']} IN ({placeholders})",
+         tuple(ids)),
+    ]
+
+
+def refresh_cards(cursor, imgtype, ids):
+    """角色/作品或其图片写入、修改后调用，在调用方的事务中执行"""
+    for sql, params in refresh_statements(imgtype, ids, backend_of(cursor)):
+        cursor.execute(sql, params)
+
+
+def rebuild_cards(cursor, imgtype=None):
+    """从基础表重新生成整张投影表，imgtype为空时两种都重建
+    返回 {imgtype: 行数}
+    """
+    counts = {}
+    for t in ([imgtype] if imgtype else [1, 2]):
+        spec = _CARD_TABLES[t]
+        cursor.execute(f"DELETE FROM {spec['table']}")
+        cursor.execute(f"INSERT INTO {spec['table']} ({spec['columns']}) {_select(spec, backend_of(cursor))}")
+        counts[t] = cursor.rowcount
+        print(f"重建{spec['table']}完成: {counts[t]}行")
+    return counts
+
+
+def main():
+    from init import load_db_config
+    from .dialect import connect
+
+    DB_CONFIG = load_db_config()
+    DB_CONFIG['database'] = 'anime'
+    connection = connect(DB_CONFIG)
+    try:
+        cursor = connection.cursor()
+        create_card_tables(cursor)
+        rebuild_cards(cursor)
+        connection.commit()
+        cursor.close()
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ from qfluentwidgets import SegmentedWidget, TransparentToolButton
 from qfluentwidgets import FluentIcon as FIF, InfoBar, InfoBarPosition, ProgressBar
 from .allspider import SubSpiderPage
 from .addspider import SpiderConfigWidget
+from .databaseapi import DatabaseAPI
+from .queryexecutor import QueryExecutor
 
 class SettingPage(QWidget):
     def __init__(self, parent=None):
@@ -26,14 +28,21 @@ class SettingPage(QWidget):
         # 添加子界面
         self.addSubInterface(self.all_spider, 'all_spider', '所有爬虫')
         self.addSubInterface(self.add_spider, 'add_spider', '添加爬虫')
+
+        # 标签计数校正：扫描并改写所有标签表，只在需要时手动执行
+        self.reconcile_button = TransparentToolButton(FIF.BROOM, self)
+        self.reconcile_button.setToolTip('校正标签计数')
+        self.reconcile_button.clicked.connect(self.reconcile_tag_counts)
         
         # 添加到布局
         h_layout = QHBoxLayout()
         right_stretch = QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum)
         h_layout.addWidget(self.pivot)
         h_layout.addItem(right_stretch)
+        h_layout.addWidget(self.reconcile_button)
         h_layout.setStretch(0, 2)
-        h_layout.setStretch(1, 8)
+        h_layout.setStretch(1, 7)
+        h_layout.setStretch(2, 1)
         
         self.vBoxLayout.addLayout(h_layout)
         self.vBoxLayout.addWidget(self.stackedWidget)
@@ -60,6 +69,42 @@ class SettingPage(QWidget):
     def refresh(self):
         self.all_spider.refresh()
         self.add_spider.refresh()
+
+    def reconcile_tag_counts(self):
+        """在后台用关系表校正所有标签计数，执行期间不能再次点击"""
+        self.reconcile_button.setEnabled(False)
+        QueryExecutor.instance().submit(
+            self, 'reconcile', DatabaseAPI.reconcile_tag_counts,
+            on_result=self.on_reconciled,
+            on_error=lambda e: self.on_reconciled({}, e),
+            timeout_ms=0
+        )
+
+    def on_reconciled(self, report, error=None):
+        self.reconcile_button.setEnabled(True)
+        if error is not None or not report:
+            InfoBar.error(
+                title='校正失败',
+                content=f'标签计数校正失败: {error}' if error is not None else '标签计数校正失败',
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=3000,
+                parent=self
+            )
+            return
+        fixed = sum(r['fixed'] for r in report.values())
+        InfoBar.success(
+            title='校正完成',
+            content=f'检查了 {sum(r["checked"] for r in report.values())} 个标签，校正了 {fixed} 个',
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP_RIGHT,
+            duration=2000,
+            parent=self
+        )
+        if fixed:
+            self.window().refresh_tag_page()
     
     def add_import_task(self, name):
         """添加新导入任务到UI"""
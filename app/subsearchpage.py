@@ -1,27 +1,54 @@
-from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
-                               QGridLayout)
+from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit)
 from PySide6.QtCore import Qt, Signal, QPoint
-from PySide6.QtGui import QPixmap, QIntValidator
+from PySide6.QtGui import QPixmap
 from qfluentwidgets import (SearchLineEdit, PushButton, ScrollArea, 
                            PixmapLabel, BodyLabel, TitleLabel, LineEdit, 
                            Pivot, SegmentedWidget, ImageLabel, ComboBox, 
                            IndeterminateProgressRing, InfoBarIcon, InfoBar, InfoBarPosition, InfoBarManager, 
-                           SmoothScrollArea)
+                           SmoothScrollArea, TogglePushButton, PrimaryPushButton)
 from qfluentwidgets import FluentIcon as FIF
-from .imagecard import ImageCard
+from .resultgrid import ResultGridView, SearchResultModel
 from .tagselector import TagSelector
 from .databaseapi import DatabaseAPI
+from .queryexecutor import QueryExecutor
+from .bulktagmessagebox import BulkTagMessageBox
+from .deletemessagebox import DeleteConfirmMessageBox
+
+
+def apply_bulk_tags(imgtype, ids, query, add_tags, remove_tags):
+    """批量修改标签，在后台线程中执行
+    ids为None时按query（搜索条件）取整个搜索结果
+    """
+    if ids is None:
+        ids = DatabaseAPI.search_entity_ids(imgtype, **query)
+    removed = DatabaseAPI.delete_tags_by_ids(remove_tags, ids, imgtype) if remove_tags else 0
+    added = DatabaseAPI.add_tags_by_ids(add_tags, ids, imgtype) if add_tags else 0
+    return {'entities': len(ids), 'added': added, 'removed': removed}
+
+
+def delete_selected(imgtype, ids, query):
+    """批量删除，在后台线程中执行，返回实际删除的ID列表
+    ids为None时按query（搜索条件）取整个搜索结果
+    """
+    if ids is None:
+        ids = DatabaseAPI.search_entity_ids(imgtype, **query)
+    return DatabaseAPI.delete_by_ids(ids, imgtype)
+
 
 # 搜索结果页面
 class SubSearchPage(QWidget):
     def __init__(self, imgtype=1, parent=None):
         super().__init__(parent)
-        self.current_page = 1
-        self.per_page = 15  # 每页显示的数量
+        self.per_page = 60  # 每次查询的数量（结果网格中的一块）
         self.current_name = ""
         self.current_tags = []
         self.total_items = 0  # 总结果数
         self.imgtype = imgtype
+        self.selection_mode = False
+        self.selected_ids = set()  # 多选模式下选中的角色/作品ID，滚动后保留
+        self.select_all_query = None  # 选中整个搜索结果时记录的搜索条件
+        self.ready = True  # 投影表检查完成前为False，搜索排队等待
+        self.search_deferred = False
         
         self.setup_ui()
         
@@ -43,221 +70,436 @@ class SubSearchPage(QWidget):
         self.search_box.searchButton.clicked.connect(self.do_search)
         self.search_box.returnPressed.connect(self.do_search)
 
+        # 排序方式，与sort_combo中的选项一一对应
         if self.imgtype == 2:
-            # 添加ComboBox
-            self.sort_combo = ComboBox(self)
-            self.sort_combo.addItems(['默认', '按照时间'])
-            self.sort_combo.setCurrentIndex(0)
-            self.sort_combo.setFixedWidth(120)  # 设置一个合适的宽度
+            self.sort_orders = ['default', 'time', 'relevance']
+            sort_names = ['默认', '按照时间', '按照相关度']
+        else:
+            self.sort_orders = ['default', 'relevance']
+            sort_names = ['默认', '按照相关度']
+        # 添加ComboBox
+        self.sort_combo = ComboBox(self)
+        self.sort_combo.addItems(sort_names)
+        self.sort_combo.setCurrentIndex(0)
+        self.sort_combo.setFixedWidth(120)  # 设置一个合适的宽度
+
+        # 多个标签之间的关系
+        self.tag_modes = ['any', 'all']
+        self.tag_mode_combo = ComboBox(self)
+        self.tag_mode_combo.addItems(['任一标签', '全部标签'])
+        self.tag_mode_combo.setCurrentIndex(0)
+        self.tag_mode_combo.setFixedWidth(120)
+        self.tag_mode_combo.currentIndexChanged.connect(self.handle_tag_mode_changed)
         
-        # 标签选择
-        self.tags = DatabaseAPI.get_tags_list(self.imgtype)
-        self.tag_selector = TagSelector(self.tags, self)
+        # 标签选择，标签列表在后台加载
+        self.tag_selector = TagSelector(self.imgtype, self)
         self.tag_selector.signals.tags_changed.connect(self.handle_tags_changed)
 
+        # 多选模式，用于批量编辑标签
+        self.select_button = TogglePushButton(FIF.CHECKBOX, "多选", self)
+        self.select_button.toggled.connect(self.set_selection_mode)
+
         self.search_container_layout.addWidget(self.search_box, 0, Qt.AlignHCenter)
-        if self.imgtype == 2:
-            self.search_container_layout.addWidget(self.sort_combo, 0, Qt.AlignRight)
+        option_layout = QHBoxLayout()
+        option_layout.addWidget(self.select_button)
+        option_layout.addStretch()
+        option_layout.addWidget(self.tag_mode_combo)
+        option_layout.addWidget(self.sort_combo)
+        self.search_container_layout.addLayout(option_layout)
         self.search_container_layout.addWidget(self.tag_selector)
+
+        # 多选操作栏
+        self.selection_bar = QWidget(self)
+        selection_layout = QHBoxLayout(self.selection_bar)
+        selection_layout.setContentsMargins(0, 0, 0, 0)
+        self.selection_label = BodyLabel("已选择 0 项", self)
+        self.select_page_button = PushButton("选择可见项", self)
+        self.select_page_button.clicked.connect(self.select_visible)
+        self.select_all_button = PushButton("选择全部结果", self)
+        self.select_all_button.clicked.connect(self.select_all_results)
+        self.clear_selection_button = PushButton("清除选择", self)
+        self.clear_selection_button.clicked.connect(self.clear_selection)
+        self.bulk_tag_button = PrimaryPushButton(FIF.TAG, "编辑标签", self)
+        self.bulk_tag_button.clicked.connect(self.show_bulk_tag_dialog)
+        self.bulk_delete_button = PushButton(FIF.DELETE, "删除", self)
+        self.bulk_delete_button.clicked.connect(self.confirm_bulk_delete)
+        selection_layout.addWidget(self.selection_label)
+        selection_layout.addStretch()
+        selection_layout.addWidget(self.select_page_button)
+        selection_layout.addWidget(self.select_all_button)
+        selection_layout.addWidget(self.clear_selection_button)
+        selection_layout.addWidget(self.bulk_tag_button)
+        selection_layout.addWidget(self.bulk_delete_button)
+        self.selection_bar.setVisible(False)
+        self.search_container_layout.addWidget(self.selection_bar)
         
-        # 搜索结果区域
-        self.scroll_area = SmoothScrollArea(self)
-        self.scroll_area.setStyleSheet("background: transparent; border: none;")
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setAttribute(Qt.WA_StyledBackground)
-
-        self.scroll_content = QWidget()
-        self.scroll_layout = QGridLayout(self.scroll_content)
-        self.scroll_layout.setContentsMargins(0, 20, 0, 20)
-        self.scroll_layout.setSpacing(15)
-        self.scroll_layout.setAlignment(Qt.AlignTop)
-        
-        self.scroll_area.setWidget(self.scroll_content)
-        
-        # 分页控件
-        self.page_widget = QWidget()
-        page_layout = QHBoxLayout(self.page_widget)
-        page_layout.setContentsMargins(0, 5, 0, 5)
-        
-        self.prev_btn = PushButton("<", self)
-        self.prev_btn.setEnabled(False)
-        self.prev_btn.clicked.connect(self.prev_page)
-        
-        # 页码输入框
-        self.page_edit = LineEdit(self)
-        self.page_edit.setFixedWidth(60)
-        self.page_edit.setAlignment(Qt.AlignCenter)
-        self.page_edit.setValidator(QIntValidator(1, 9999))  # 只允许输入数字
-        self.page_edit.returnPressed.connect(self.jump_to_page)
-        
-        # 总页数标签
-        self.total_label = BodyLabel("/ 1", self)
-        self.total_pages = 1
-        self.current_page = 1
-
-        self.next_btn = PushButton(">", self)
-        self.next_btn.setEnabled(False)
-        self.next_btn.clicked.connect(self.next_page)
-        
-        page_layout.addStretch()
-        page_layout.addWidget(self.prev_btn)
-        page_layout.addWidget(self.page_edit)
-        page_layout.addWidget(self.total_label)
-        page_layout.addWidget(self.next_btn)
-        page_layout.addStretch()
+        # 搜索结果区域：按块查询结果，只绘制可见的卡片
+        self.model = SearchResultModel(block_size=self.per_page, parent=self)
+        self.model.loaded.connect(self.on_search_finished)
+        self.model.failed.connect(self.on_search_failed)
+        self.grid = ResultGridView(self.imgtype, self)
+        self.grid.setModel(self.model)
+        self.grid.itemClicked.connect(self.on_item_clicked)
+
+        # 结果数量
+        self.status_widget = QWidget()
+        status_layout = QHBoxLayout(self.status_widget)
+        status_layout.setContentsMargins(0, 5, 0, 5)
+        self.total_label = BodyLabel("", self)
+
+        # 加载状态
+        self.loading_ring = IndeterminateProgressRing(self)
+        self.loading_ring.setFixedSize(24, 24)
+        self.loading_ring.setStrokeWidth(3)
+        self.loading_ring.setVisible(False)
+        status_layout.addStretch()
+        status_layout.addWidget(self.total_label)
+        status_layout.addWidget(self.loading_ring)
+        status_layout.addStretch()
         
         layout.addWidget(self.search_container)
-        layout.addWidget(self.scroll_area)
-        layout.addWidget(self.page_widget)
+        layout.addWidget(self.grid)
+        layout.addWidget(self.status_widget)
         
     def do_search(self):
+        self.select_all_query = None
         self.current_name = self.search_box.text()
-        self.current_page = 1
         self.search_results()
         
     def search_results(self, clear=False):
-        """执行搜索并加载第一页结果"""
+        """执行搜索，结果由网格按块在后台查询"""
         if clear:
             self.current_name = ""
-            if self.imgtype == 2:
-                self.sort_combo.setCurrentIndex(0)
+            self.sort_combo.setCurrentIndex(0)
+            self.tag_mode_combo.blockSignals(True)
+            self.tag_mode_combo.setCurrentIndex(0)
+            self.tag_mode_combo.blockSignals(False)
             self.current_tags = []
             self.search_box.setText("")
             self.tag_selector.clear()
-            self.current_page = 1
             self.total_items = 0
-            self.total_pages = 1
-            self.update_page_controls()
-            for i in reversed(range(self.scroll_layout.count())): 
-                self.scroll_layout.itemAt(i).widget().setParent(None)
+            self.search_deferred = False
+            self.select_button.setChecked(False)
+            self.model.clear()
+            self.grid.loader.cancel()
+            self.set_loading(False)
+            self.total_label.setText("")
             return 
-        # 从数据库获取结果（只获取当前页）
-        if self.imgtype == 2 and self.sort_combo.currentIndex() == 1:
-                if self.current_name == "" and len(self.current_tags) == 0:
-                    result = DatabaseAPI.fetch_all_images_order_by_time(
-                        page=self.current_page, 
-                        per_page=self.per_page
-                    )
-                elif self.current_name != "" and len(self.current_tags) == 0:
-                    result = DatabaseAPI.search_images_by_name_order_by_time(
-                        name=self.current_name,
-                        page=self.current_page,
-                        per_page=self.per_page
-                    )
-                elif self.current_name == "" and len(self.current_tags) != 0:
-                    result = DatabaseAPI.search_images_by_tags_order_by_time(
-                        tagli=self.current_tags,
-                        page=self.current_page,
-                        per_page=self.per_page
-                    )
-                else:
-                    result = DatabaseAPI.search_images_by_name_and_tags_order_by_time(
-                        name=self.current_name,
-                        tagli=self.current_tags,
-                        page=self.current_page,
-                        per_page=self.per_page
-                    )
-        else:
+        self.set_loading(True)
+        if not self.ready:
+            # 投影表可能还不存在或者正在生成，检查完成后再查询
+            self.search_deferred = True
+            return
+        self.model.reset(lambda page, cursor: self.search_call(cursor, page))
+        self.grid.scrollToTop()
+
+    def set_ready(self, ready):
+        """投影表检查完成时设为True，执行期间排队的搜索"""
+        self.ready = ready
+        if ready and self.search_deferred:
+            self.search_deferred = False
+            self.search_results()
+
+    def search_call(self, cursor=None, page=None):
+        """根据当前的搜索条件选出要调用的DatabaseAPI方法，返回 (方法, 参数)"""
+        if page is None:
+            page = 1
+        order = self.sort_orders[self.sort_combo.currentIndex()]
+        mode = self.tag_modes[self.tag_mode_combo.currentIndex()]
+        if order == 'time':
             if self.current_name == "" and len(self.current_tags) == 0:
-                result = DatabaseAPI.fetch_all_images(
-                    page=self.current_page, 
+                func = DatabaseAPI.fetch_all_images_order_by_time
+                kwargs = dict(
+                    page=page, 
                     per_page=self.per_page,
-                    imgtype=self.imgtype
+                    cursor=cursor
                 )
             elif self.current_name != "" and len(self.current_tags) == 0:
-                result = DatabaseAPI.search_images_by_name(
+                func = DatabaseAPI.search_images_by_name_order_by_time
+                kwargs = dict(
                     name=self.current_name,
-                    page=self.current_page,
+                    page=page,
                     per_page=self.per_page,
-                    imgtype=self.imgtype
+                    cursor=cursor
                 )
             elif self.current_name == "" and len(self.current_tags) != 0:
-                result = DatabaseAPI.search_images_by_tags(
+                func = DatabaseAPI.search_images_by_tags_order_by_time
+                kwargs = dict(
                     tagli=self.current_tags,
-                    page=self.current_page,
+                    page=page,
                     per_page=self.per_page,
-                    imgtype=self.imgtype
+                    cursor=cursor,
+                    mode=mode
                 )
             else:
-                result = DatabaseAPI.search_images_by_name_and_tags(
+                func = DatabaseAPI.search_images_by_name_and_tags_order_by_time
+                kwargs = dict(
                     name=self.current_name,
                     tagli=self.current_tags,
-                    page=self.current_page,
+                    page=page,
                     per_page=self.per_page,
+                    cursor=cursor,
+                    mode=mode
+                )
+        else:
+            if self.current_name == "" and len(self.current_tags) == 0:
+                func = DatabaseAPI.fetch_all_images
+                kwargs = dict(
+                    page=page, 
+                    per_page=self.per_page,
+                    cursor=cursor,
                     imgtype=self.imgtype
                 )
-        
-        self.total_items = result['total']
-        self.total_pages = (self.total_items + self.per_page - 1) // self.per_page
-        
-        # 加载当前页结果
-        self.load_results(result['images'])
-        
-    def load_results(self, images):
-        """加载搜索结果到界面"""
-        # 清空现有结果
-        for i in reversed(range(self.scroll_layout.count())): 
-            self.scroll_layout.itemAt(i).widget().setParent(None)
-        
-        # 显示结果 (3行5列)
-        for i, image_data in enumerate(images):
-            row = i // 5
-            col = i % 5
-            card = ImageCard(image_data, self.imgtype, self.scroll_content)
-            main_window = self.window()  # 获取最顶层的窗口
-            if self.imgtype == 1:
-                card.clicked.connect(main_window.show_image_detail_role)
+            elif self.current_name != "" and len(self.current_tags) == 0:
+                func = DatabaseAPI.search_images_by_name
+                kwargs = dict(
+                    name=self.current_name,
+                    page=page,
+                    per_page=self.per_page,
+                    cursor=cursor,
+                    imgtype=self.imgtype,
+                    order=order
+                )
+            elif self.current_name == "" and len(self.current_tags) != 0:
+                func = DatabaseAPI.search_images_by_tags
+                kwargs = dict(
+                    tagli=self.current_tags,
+                    page=page,
+                    per_page=self.per_page,
+                    cursor=cursor,
+                    imgtype=self.imgtype,
+                    mode=mode
+                )
             else:
-                card.clicked.connect(main_window.show_image_detail_source)
-            self.scroll_layout.addWidget(card, row, col, Qt.AlignCenter)
-        
-        # 更新分页状态
-        self.update_page_controls()
-        
-    def prev_page(self):
-        if self.current_page > 1:
-            self.current_page -= 1
-            self.search_results()
-            
-    def next_page(self):
-        if self.current_page < self.total_pages:
-            self.current_page += 1
-            self.search_results()
+                func = DatabaseAPI.search_images_by_name_and_tags
+                kwargs = dict(
+                    name=self.current_name,
+                    tagli=self.current_tags,
+                    page=page,
+                    per_page=self.per_page,
+                    cursor=cursor,
+                    imgtype=self.imgtype,
+                    mode=mode,
+                    order=order
+                )
+        return func, kwargs
 
-    def jump_to_page(self):
-        """跳转到指定页码"""
-        page_text = self.page_edit.text()
-        if not page_text:
-            return
-            
-        page = int(page_text)
-        if 1 <= page <= self.total_pages:
-            self.current_page = page
-            self.search_results()
-        else:
-            # 显示错误提示
-            self.createErrorInfoBar()
-
-    def update_page_controls(self):
-        """更新分页控件状态"""
-        self.page_edit.setText(str(self.current_page))
-        self.total_label.setText(f"/ {self.total_pages}")
-        self.prev_btn.setEnabled(self.current_page > 1)
-        self.next_btn.setEnabled(self.current_page < self.total_pages)
-    
-    def createErrorInfoBar(self):
+    def on_search_finished(self, total):
+        """后台搜索完成（第一块结果返回）"""
+        self.set_loading(False)
+        self.total_items = total
+        self.total_label.setText(f"共 {total} 张图片")
+        self.update_selection()
+
+    def on_search_failed(self, error):
+        """后台搜索失败（包括查询超时）"""
+        self.set_loading(False)
         InfoBar.error(
             title='Error',
-            content="Page not found",
+            content=f"搜索失败: {error}",
             orient=Qt.Horizontal,
             isClosable=True,
             position=InfoBarPosition.BOTTOM_RIGHT,
-            duration=-1,    # won't disappear automatically
+            duration=3000,
             parent=self
         )
 
+    def set_loading(self, loading):
+        """切换加载状态：显示进度环"""
+        self.loading_ring.setVisible(loading)
+
+    def on_item_clicked(self, row):
+        """点击卡片：多选模式下切换选中状态，否则打开详情"""
+        if self.selection_mode:
+            self.on_card_selection_changed(row.id, not self.is_selected(row.id))
+            return
+        main_window = self.window()  # 获取最顶层的窗口
+        if self.imgtype == 1:
+            main_window.show_image_detail_role(row.id)
+        else:
+            main_window.show_image_detail_source(row.id)
+
+    def handle_tag_mode_changed(self, index):
+        """切换"任一标签/全部标签"后重新搜索"""
+        if self.current_tags:
+            self.select_all_query = None
+            self.search_results()
+
     def handle_tags_changed(self, tagli):
         """处理标签变化的槽函数"""
         self.current_tags = tagli
-        self.current_page = 1
-        self.search_results()
\ No newline at end of file
+        self.select_all_query = None
+        self.search_results()
+
+    def visible_ids(self):
+        """网格中可见的角色/作品ID"""
+        return {row.id for row in self.grid.visible_rows()}
+
+    def is_selected(self, entity_id):
+        return self.select_all_query is not None or entity_id in self.selected_ids
+
+    def set_selection_mode(self, enabled):
+        """进入或退出多选模式"""
+        self.selection_mode = enabled
+        self.selection_bar.setVisible(enabled)
+        if not enabled:
+            self.selected_ids = set()
+            self.select_all_query = None
+        self.grid.set_selection_mode(enabled, self.is_selected)
+        self.update_selection()
+
+    def on_card_selection_changed(self, entity_id, selected):
+        """卡片的选中状态变化，entity_id为角色/作品ID，同一角色/作品的所有图片一起选中"""
+        if self.select_all_query is not None:
+            # 从全部结果中去掉一项，退回到只选中可见项
+            self.select_all_query = None
+            self.selected_ids = self.visible_ids()
+        if selected:
+            self.selected_ids.add(entity_id)
+        else:
+            self.selected_ids.discard(entity_id)
+        self.update_selection()
+
+    def select_visible(self):
+        self.selected_ids |= self.visible_ids()
+        self.update_selection()
+
+    def select_all_results(self):
+        """选中整个搜索结果（不只是已加载的块）"""
+        self.select_all_query = {
+            'name': self.current_name or None,
+            'tagli': list(self.current_tags),
+            'mode': self.tag_modes[self.tag_mode_combo.currentIndex()]
+        }
+        self.update_selection()
+
+    def clear_selection(self):
+        self.selected_ids = set()
+        self.select_all_query = None
+        self.update_selection()
+
+    def update_selection(self):
+        """同步卡片的选中状态和操作栏的文字"""
+        self.grid.viewport().update()
+        self.selection_label.setText(f"已选择{self.selection_text()}")
+
+    def selection_text(self):
+        if self.select_all_query is not None:
+            return f"全部搜索结果（{self.total_items} 张图片）"
+        return f" {len(self.selected_ids)} 项"
+
+    def check_selection(self):
+        """没有选中任何项目时给出提示"""
+        if self.select_all_query is None and not self.selected_ids:
+            InfoBar.warning(
+                title='提示',
+                content="请先选择要编辑的项目",
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.BOTTOM_RIGHT,
+                duration=2000,
+                parent=self
+            )
+            return False
+        return True
+
+    def selection_target(self):
+        """返回 (ID列表, 搜索条件)，选中整个搜索结果时ID列表为None"""
+        if self.select_all_query is not None:
+            return None, dict(self.select_all_query)
+        return sorted(self.selected_ids), None
+
+    def show_bulk_tag_dialog(self):
+        """对选中的角色/作品批量编辑标签"""
+        if not self.check_selection():
+            return
+        dialog = BulkTagMessageBox(self.imgtype, self.selection_label.text(), self.window())
+        dialog.yesSignal.connect(self.apply_bulk_tags)
+        dialog.show()
+
+    def apply_bulk_tags(self, add_tags, remove_tags):
+        """在后台执行批量修改"""
+        if not add_tags and not remove_tags:
+            return
+        ids, query = self.selection_target()
+        self.bulk_tag_button.setEnabled(False)
+        QueryExecutor.instance().submit(
+            self, 'bulk_tags', apply_bulk_tags, self.imgtype, ids, query, add_tags, remove_tags,
+            on_result=self.on_bulk_tags_finished,
+            on_error=self.on_bulk_tags_failed,
+            timeout_ms=0
+        )
+
+    def on_bulk_tags_finished(self, result):
+        self.bulk_tag_button.setEnabled(True)
+        InfoBar.success(
+            title='完成',
+            content=f"{result['entities']} 项：添加 {result['added']} 个标签，删除 {result['removed']} 个标签",
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.BOTTOM_RIGHT,
+            duration=3000,
+            parent=self
+        )
+        self.clear_selection()
+        self.window().refresh()
+
+    def on_bulk_tags_failed(self, error):
+        self.bulk_tag_button.setEnabled(True)
+        InfoBar.error(
+            title='Error',
+            content=f"批量编辑标签失败: {error}",
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.BOTTOM_RIGHT,
+            duration=3000,
+            parent=self
+        )
+
+    def confirm_bulk_delete(self):
+        """删除选中的角色/作品前确认"""
+        if not self.check_selection():
+            return
+        content = f"确定要删除{self.selection_text()}的{'角色' if self.imgtype == 1 else '来源'}吗？此操作不可撤销！"
+        msg_box = DeleteConfirmMessageBox("确认删除", content, self.window())
+        msg_box.yesSignal.connect(self.execute_bulk_delete)
+        msg_box.show()
+
+    def execute_bulk_delete(self):
+        """在后台执行批量删除"""
+        ids, query = self.selection_target()
+        self.bulk_delete_button.setEnabled(False)
+        QueryExecutor.instance().submit(
+            self, 'bulk_delete', delete_selected, self.imgtype, ids, query,
+            on_result=self.on_bulk_delete_finished,
+            on_error=self.on_bulk_delete_failed,
+            timeout_ms=0
+        )
+
+    def on_bulk_delete_finished(self, removed):
+        self.bulk_delete_button.setEnabled(True)
+        InfoBar.success(
+            title='完成',
+            content=f"已删除 {len(removed)} 项",
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.BOTTOM_RIGHT,
+            duration=3000,
+            parent=self
+        )
+        self.clear_selection()
+        main_window = self.window()
+        main_window.close_detail_tabs(self.imgtype, removed)
+        main_window.refresh()
+
+    def on_bulk_delete_failed(self, error):
+        self.bulk_delete_button.setEnabled(True)
+        InfoBar.error(
+            title='Error',
+            content=f"批量删除失败: {error}",
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.BOTTOM_RIGHT,
+            duration=3000,
+            parent=self
+        )
\ No newline at end of file
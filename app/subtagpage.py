@@ -3,8 +3,9 @@ from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QIntValidator
 from qfluentwidgets import (SmoothScrollArea, FlowLayout, PushButton, SearchLineEdit, PrimaryToolButton,
                             PushButton, LineEdit, BodyLabel, InfoBar, InfoBarPosition, MessageBoxBase, 
-                            RoundMenu, Action, MenuAnimationType)
+                            RoundMenu, Action, MenuAnimationType, IndeterminateProgressRing)
 from .databaseapi import DatabaseAPI
+from .queryexecutor import QueryExecutor
 from qfluentwidgets import FluentIcon as FIF
 from .deletemessagebox import *
 import re
@@ -75,11 +76,12 @@ class SubTagPage(QWidget):
         self.setObjectName("SubTagPage")
         self.imgtype = imgtype
         self.per_page = 60
-        self.tags_num_total = DatabaseAPI.get_all_tags_and_num(self.imgtype, 1, self.per_page)
-        self.total_items = self.tags_num_total['total']
-        self.tags_num = self.tags_num_total['tags_and_nums']
-        self.tags = [tags['tag'] for tags in self.tags_num]
+        self.total_items = 0
+        self.tags_num = []
+        self.tags = []
         self.current_text = ""
+        self.next_cursor = None  # 相邻页的翻页令牌，用于keyset翻页
+        self.prev_cursor = None
         
         # 主布局
         self.main_layout = QVBoxLayout(self)
@@ -137,49 +139,82 @@ class SubTagPage(QWidget):
         self.page_edit.returnPressed.connect(self.jump_to_page)
         
         # 总页数标签
-        self.total_pages = (self.total_items + self.per_page - 1) // self.per_page
+        self.total_pages = 1
         self.total_label = BodyLabel(f"/ {self.total_pages}", self)
         self.current_page = 1
         self.page_edit.setText(str(self.current_page))
 
         self.next_btn = PushButton(">", self)
-        if self.current_page == self.total_pages:
-            self.next_btn.setEnabled(False)
+        self.next_btn.setEnabled(False)
         self.next_btn.clicked.connect(self.next_page)
+
+        # 加载状态
+        self.loading_ring = IndeterminateProgressRing(self)
+        self.loading_ring.setFixedSize(24, 24)
+        self.loading_ring.setStrokeWidth(3)
+        self.loading_ring.setVisible(False)
         
         page_layout.addStretch()
         page_layout.addWidget(self.prev_btn)
         page_layout.addWidget(self.page_edit)
         page_layout.addWidget(self.total_label)
         page_layout.addWidget(self.next_btn)
+        page_layout.addWidget(self.loading_ring)
         page_layout.addStretch()
         
         self.main_layout.addWidget(self.page_widget)
         
         self.tag_buttons = []
-        for tag in self.tags_num:
-            tag_text = tag['tag']
-            n = tag['num']
-            text = f'{tag_text} | {n}'
-            btn = TagPushButton(text)
-            btn.delete_signal.connect(self.delete_tag)
-            self.flow_layout.addWidget(btn)
-            self.tag_buttons.append(btn)
+        self.search_results()
     
     def do_search(self):
         self.current_text = self.search_box.text()
         self.current_page = 1
         self.search_results()
 
-    def search_results(self):
-        """处理搜索事件"""
+    def search_results(self, cursor=None):
+        """处理搜索事件，查询在后台执行
+        cursor为相邻页的翻页令牌，给出时按keyset翻页，否则按页码跳转
+        """
+        self.loading_ring.setVisible(True)
+        self.prev_btn.setEnabled(False)
+        self.next_btn.setEnabled(False)
         if self.current_text != "":
-            self.tags_num_total = DatabaseAPI.get_all_tags_and_num_by_name(self.imgtype, self.current_text, self.current_page, self.per_page)
+            QueryExecutor.instance().submit(
+                self, 'search', DatabaseAPI.get_all_tags_and_num_by_name,
+                self.imgtype, self.current_text, self.current_page, self.per_page, cursor=cursor,
+                on_result=self.on_search_finished, on_error=self.on_search_failed
+            )
         else:
-            self.tags_num_total = DatabaseAPI.get_all_tags_and_num(self.imgtype, self.current_page, self.per_page)
+            QueryExecutor.instance().submit(
+                self, 'search', DatabaseAPI.get_all_tags_and_num,
+                self.imgtype, self.current_page, self.per_page, cursor=cursor,
+                on_result=self.on_search_finished, on_error=self.on_search_failed
+            )
+
+    def on_search_failed(self, error):
+        """后台查询失败"""
+        self.loading_ring.setVisible(False)
+        self.update_page_controls()
+        InfoBar.error(
+            title='Error',
+            content=f"查询失败: {error}",
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.BOTTOM_RIGHT,
+            duration=3000,
+            parent=self
+        )
+
+    def on_search_finished(self, tags_num_total):
+        """后台查询完成，刷新标签按钮"""
+        self.loading_ring.setVisible(False)
+        self.tags_num_total = tags_num_total
         self.tags_num = self.tags_num_total['tags_and_nums']
         self.tags = [tags['tag'] for tags in self.tags_num]
         self.total_items = self.tags_num_total['total']
+        self.next_cursor = self.tags_num_total['next_cursor']
+        self.prev_cursor = self.tags_num_total['prev_cursor']
         self.total_pages = (self.total_items + self.per_page - 1) // self.per_page
         self.update_page_controls()
         self.tag_buttons.clear()
@@ -196,12 +231,12 @@ class SubTagPage(QWidget):
     def prev_page(self):
         if self.current_page > 1:
             self.current_page -= 1
-            self.search_results()
+            self.search_results(cursor=self.prev_cursor)
             
     def next_page(self):
         if self.current_page < self.total_pages:
             self.current_page += 1
-            self.search_results()
+            self.search_results(cursor=self.next_cursor)
 
     def jump_to_page(self):
         """跳转到指定页码"""
@@ -0,0 +1,70 @@
+from PySide6.QtCore import Qt, QStringListModel, QTimer
+from PySide6.QtWidgets import QCompleter
+from qfluentwidgets.components.widgets.line_edit import CompleterMenu
+from .databaseapi import DatabaseAPI, TAG_COMPLETION_LIMIT
+from .queryexecutor import QueryExecutor
+
+# 下拉列表中显示的常用标签数量
+POPULAR_TAG_LIMIT = 50
+
+
+class TagCompleter(QCompleter):
+    """标签自动补全
+    输入停顿后在后台按关键字取前limit个标签（DatabaseAPI.complete_tags），模型中只保存这些标签
+    """
+
+    def __init__(self, tagtype, lineedit, limit=TAG_COMPLETION_LIMIT, delay=150):
+        super().__init__(lineedit)
+        self.tagtype = tagtype
+        self.lineedit = lineedit
+        self.limit = limit
+        self.completer_model = QStringListModel(self)
+        self.setModel(self.completer_model)
+        self.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        # 新结果返回前，先按当前输入过滤上一次的结果来显示
+        self.setFilterMode(Qt.MatchFlag.MatchContains)
+
+        # 防抖：停止输入delay毫秒后才查询
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(delay)
+        self.debounce_timer.timeout.connect(self.query)
+        lineedit.textEdited.connect(self.on_text_edited)
+
+        # qfluentwidgets的输入框用自己的补全菜单显示QCompleter的结果，QCompleter本身不绑定控件
+        lineedit.setCompleter(self)
+        self.menu = CompleterMenu(lineedit)
+        lineedit.setCompleterMenu(self.menu)
+
+    def on_text_edited(self, text):
+        if text.strip():
+            self.debounce_timer.start()
+        else:
+            self.debounce_timer.stop()
+
+    def query(self):
+        keyword = self.lineedit.text().strip()
+        QueryExecutor.instance().submit(
+            self, 'complete', DatabaseAPI.complete_tags, self.tagtype, keyword, self.limit,
+            on_result=lambda tags: self.on_completed(keyword, tags)
+        )
+
+    def on_completed(self, keyword, tags):
+        # 结果返回前输入已经改变，等下一次查询
+        if keyword != self.lineedit.text().strip():
+            return
+        self.completer_model.setStringList(tags)
+        if self.lineedit.hasFocus():
+            # 结果是异步返回的，重新弹出补全菜单
+            self.complete()
+
+    def complete(self, rect=None):
+        """在输入框的补全菜单中显示当前结果
+        QCompleter没有绑定控件，不能调用QCompleter.complete()
+        """
+        if not self.lineedit.text():
+            return
+        self.setCompletionPrefix(self.lineedit.text())
+        if self.menu.setCompletion(self.completionModel(), self.completionColumn()):
+            self.menu.setMaxVisibleItems(self.maxVisibleItems())
+            self.menu.popup()
@@ -0,0 +1,235 @@
+import heapq
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+
+class TagIndex:
+    """标签倒排索引：标签 -> 有序的实体ID数组
+    只收录至少有一张图片的实体，搜索结果以图片为行，没有图片的实体不会出现
+    """
+
+    def __init__(self):
+        self._postings = {}      # 标签 -> array('i')，升序且无重复
+        self._image_counts = {}  # 实体ID -> 图片数量
+        self._lock = threading.RLock()
+        self.ready = False
+
+    def build(self, tag_pairs, image_counts):
+        """用 (实体ID, 标签) 和 (实体ID, 图片数量) 两组数据重建索引"""
+        counts = {entity_id: num for entity_id, num in image_counts if num}
+        grouped = {}
+        for entity_id, tag in tag_pairs:
+            if entity_id in counts:
+                grouped.setdefault(tag, set()).add(entity_id)
+        postings = {tag: array('i', sorted(ids)) for tag, ids in grouped.items()}
+        with self._lock:
+            self._postings = postings
+            self._image_counts = counts
+            self.ready = True
+
+    def query(self, tags=None, mode='any', exclude_tags=None):
+        """计算满足标签条件的实体ID，返回升序的array('i')
+        - tags: 标签列表，为空表示不限制
+        - mode: 'any'表示包含任一标签，'all'表示包含全部标签
+        - exclude_tags: 不能包含的标签
+        """
+        with self._lock:
+            if tags:
+                lists = [self._postings.get(tag, ()) for tag in set(tags)]
+                if mode == 'all':
+                    # 从最短的列表开始求交集
+                    lists.sort(key=len)
+                    result = set(lists[0])
+                    for ids in lists[1:]:
+                        if not result:
+                            break
+                        result.intersection_update(ids)
+                else:
+                    result = set()
+                    for ids in lists:
+                        result.update(ids)
+            else:
+                result = set(self._image_counts)
+            for tag in exclude_tags or ():
+                result.difference_update(self._postings.get(tag, ()))
+            return array('i', sorted(result))
+
+    def count_images(self, ids):
+        """这些实体一共有多少张图片"""
+        with self._lock:
+            counts = self._image_counts
+            return sum(counts.get(entity_id, 0) for entity_id in ids)
+
+    def page_window(self, ids, per_page, page=1, cursor_id=None, direction='next'):
+        """找出覆盖目标页所需的最少实体ID，只把这些ID交给数据库取详情
+        ids须按实体ID升序（默认排序）
+        返回 (实体ID列表, 在窗口内还需跳过的图片数)
+        """
+        with self._lock:
+            counts = self._image_counts
+            n = len(ids)
+            if cursor_id is None:
+                skip = (page - 1) * per_page
+                i = 0
+                while i < n and skip >= counts.get(ids[i], 0):
+                    skip -= counts.get(ids[i], 0)
+                    i += 1
+                start, need, rows = i, skip + per_page, 0
+                while i < n and rows < need:
+                    rows += counts.get(ids[i], 0)
+                    i += 1
+                return list(ids[start:i]), skip
+            if direction == 'next':
+                # 令牌所在实体可能还剩一部分图片，需要多取它的图片数
+                i = start = bisect_left(ids, cursor_id)
+                need, rows = per_page, 0
+                if i < n and ids[i] == cursor_id:
+                    need += counts.get(cursor_id, 0)
+                while i < n and rows < need:
+                    rows += counts.get(ids[i], 0)
+                    i += 1
+                return list(ids[start:i]), 0
+            j = end = bisect_right(ids, cursor_id)
+            need, rows = per_page, 0
+            if j > 0 and ids[j - 1] == cursor_id:
+                need += counts.get(cursor_id, 0)
+            while j > 0 and rows < need:
+                j -= 1
+                rows += counts.get(ids[j], 0)
+            return list(ids[j:end]), 0
+
+    def add_tags(self, entity_id, tags):
+        """给实体增加标签（增量更新）"""
+        with self._lock:
+            if not self.ready or entity_id not in self._image_counts:
+                return
+            for tag in tags:
+                ids = self._postings.setdefault(tag, array('i'))
+                pos = bisect_left(ids, entity_id)
+                if pos == len(ids) or ids[pos] != entity_id:
+                    insort(ids, entity_id)
+
+    def remove_tags(self, entity_id, tags):
+        """删除实体的标签（增量更新）"""
+        with self._lock:
+            for tag in tags:
+                ids = self._postings.get(tag)
+                if ids is None:
+                    continue
+                pos = bisect_left(ids, entity_id)
+                if pos < len(ids) and ids[pos] == entity_id:
+                    del ids[pos]
+
+    def remove_entity(self, entity_id):
+        """实体被删除时从所有标签中移除"""
+        with self._lock:
+            if self._image_counts.pop(entity_id, None) is None:
+                return
+            self.remove_tags(entity_id, list(self._postings))
+
+    def drop_tag(self, tag):
+        """标签被删除"""
+        with self._lock:
+            self._postings.pop(tag, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'tags': len(self._postings),
+                'entities': len(self._image_counts),
+                'postings': sum(len(ids) for ids in self._postings.values())
+            }
+
+
+class TagNameIndex:
+    """标签名补全索引：n-gram（单字和相邻两字，不区分大小写）-> 标签集合
+    按关键字查包含它的标签，完全相同的排最前，其次是以关键字开头的，再按使用次数从多到少
+    """
+
+    def __init__(self):
+        self._nums = {}   # 标签 -> 使用次数
+        self._grams = {}  # n-gram -> 标签集合
+        self._lock = threading.RLock()
+        self.ready = False
+
+    @staticmethod
+    def _ngrams(text):
+        text = text.casefold()
+        grams = set(text)
+        grams.update(text[i:i + 2] for i in range(len(text) - 1))
+        return grams
+
+    def build(self, rows):
+        """用 (标签, 使用次数) 重建索引"""
+        nums = {}
+        grams = {}
+        for tag, num in rows:
+            nums[tag] = num
+            for gram in self._ngrams(tag):
+                grams.setdefault(gram, set()).add(tag)
+        with self._lock:
+            self._nums = nums
+            self._grams = grams
+            self.ready = True
+
+    def complete(self, text, limit=20):
+        """返回包含text的前limit个标签，text为空时返回使用次数最多的标签"""
+        key = text.strip().casefold()
+        with self._lock:
+            nums = self._nums
+            if not key:
+                return heapq.nsmallest(limit, nums, key=lambda tag: (-nums[tag], tag))
+            grams = {key[i:i + 2] for i in range(len(key) - 1)} or {key}
+            postings = [self._grams.get(gram) for gram in grams]
+            if not all(postings):
+                return []
+            # 从最短的集合开始过滤，n-gram都命中不代表连续出现，最后再确认一次
+            postings.sort(key=len)
+            candidates = [tag for tag in postings[0]
+                          if all(tag in tags for tags in postings[1:]) and key in tag.casefold()]
+            return heapq.nsmallest(limit, candidates, key=lambda tag: (
+                tag.casefold() != key, not tag.casefold().startswith(key), -nums[tag], tag))
+
+    def add(self, tag, num=0):
+        """新增标签（增量更新）"""
+        with self._lock:
+            if not self.ready or tag in self._nums:
+                return
+            self._nums[tag] = num
+            for gram in self._ngrams(tag):
+                self._grams.setdefault(gram, set()).add(tag)
+
+    def adjust(self, tag, delta):
+        """标签使用次数加上delta（增量更新）"""
+        with self._lock:
+            if tag in self._nums:
+                self._nums[tag] += delta
+
+    def set_nums(self, rows):
+        """用 (标签, 使用次数) 更新这些标签的使用次数，用于重新计数之后"""
+        with self._lock:
+            for tag, num in rows:
+                if tag in self._nums:
+                    self._nums[tag] = num
+
+    def remove(self, tag):
+        """删除标签（增量更新）"""
+        with self._lock:
+            if self._nums.pop(tag, None) is None:
+                return
+            for gram in self._ngrams(tag):
+                tags = self._grams.get(gram)
+                if tags is not None:
+                    tags.discard(tag)
+                    if not tags:
+                        del self._grams[gram]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'tags': len(self._nums),
+                'grams': len(self._grams)
+            }
@@ -1,12 +1,16 @@
-from PySide6.QtWidgets import QWidget, QHBoxLayout, QCompleter
-from PySide6.QtCore import Qt, QStringListModel, QTimer, Signal, QObject
+from PySide6.QtWidgets import QWidget, QHBoxLayout
+from PySide6.QtCore import Qt, QTimer, Signal, QObject
 from qfluentwidgets import EditableComboBox, FlowLayout, PillPushButton, StrongBodyLabel, FlyoutView, Flyout
 
+from .databaseapi import DatabaseAPI
+from .queryexecutor import QueryExecutor
+from .tagcompleter import TagCompleter, POPULAR_TAG_LIMIT
+
 class TagSignals(QObject):
     tags_changed = Signal(list)
 
 class TagSelector(QWidget):
-    def __init__(self, tagsli=[], parent=None):
+    def __init__(self, tagtype, parent=None):
         super().__init__(parent)
         # 主布局
         self.mainLayout = QHBoxLayout(self)
@@ -14,7 +18,7 @@ class TagSelector(QWidget):
         self.mainLayout.setSpacing(15)
         
         # 初始化标签数据
-        self.all_tags = tagsli
+        self.tagtype = tagtype
         self.selected_tags = {}  # 改为字典存储，键为tag，值为索引
         self.signals = TagSignals()
         
@@ -22,16 +26,13 @@ class TagSelector(QWidget):
         self.combo = EditableComboBox(self)
         self.combo.setClearButtonEnabled(True)
         self.combo.setPlaceholderText("选择或搜索标签，单击标签删除")
-        self.combo.addItems(self.all_tags)
         self.combo.setMaxVisibleItems(8)
         self.combo.setCurrentIndex(-1)
         
-        # 设置自动补全
-        self.completer_model = QStringListModel(self.all_tags)
-        self.completer = QCompleter(self.completer_model, self)
-        self.completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
-        self.completer.setFilterMode(Qt.MatchFlag.MatchContains)
+        # 设置自动补全，下拉列表只放常用标签，其余标签靠输入补全
+        self.completer = TagCompleter(self.tagtype, self.combo)
         self.combo.setCompleter(self.completer)
+        self.load_tags()
         
         # 连接信号
         self.combo.activated.connect(self.on_tag_selected)
@@ -56,6 +57,19 @@ class TagSelector(QWidget):
         self.mainLayout.setStretch(1, 1)
         self.mainLayout.setStretch(2, 14)
     
+    def load_tags(self):
+        """在后台加载下拉列表中的常用标签"""
+        QueryExecutor.instance().submit(
+            self, 'tags', DatabaseAPI.complete_tags, self.tagtype, '', POPULAR_TAG_LIMIT,
+            on_result=self.set_tags
+        )
+
+    def set_tags(self, tagsli):
+        """替换下拉列表中的标签"""
+        self.combo.clear()
+        self.combo.addItems(tagsli)
+        self.combo.setCurrentIndex(-1)
+
     def on_tag_selected(self, index):
         """当从组合框的下拉列表中选择标签时调用"""
         if index >= 0:  # 确保是有效的索引
@@ -1,6 +1,6 @@
-import mysql.connector  # MySQL数据库连接
-from mysql.connector import Error
 import configparser
+from app.searchprojection import create_card_tables
+from app.dialect import Error, SQLITE, backend_of, connect, create_sqlite_tables
 
 def load_db_config(config_file='config.ini'):
     """
@@ -10,7 +10,7 @@ def load_db_config(config_file='config.ini'):
         config_file (str): 配置文件路径，默认为'config.ini'
         
     返回:
-        dict: 包含数据库配置的字典
+        dict: 包含数据库配置的字典，backend为mysql或sqlite，sqlite时使用sqlite_path指定的文件
     """
     # 初始化配置解析器
     config = configparser.ConfigParser()
@@ -24,25 +24,109 @@ def load_db_config(config_file='config.ini'):
         'user': config.get('DATABASE', 'user', fallback='user'),
         'password': config.get('DATABASE', 'password', fallback='password'),
         'database': config.get('DATABASE', 'database', fallback=None),
-        'port': config.getint('DATABASE', 'port', fallback=3306)
+        'port': config.getint('DATABASE', 'port', fallback=3306),
+        'backend': config.get('DATABASE', 'backend', fallback='mysql'),
+        'sqlite_path': config.get('DATABASE', 'sqlite_path', fallback='anime.db')
     }
     
     return DB_CONFIG
 
 
+def load_pool_config(config_file='config.ini'):
+    """
+    从配置文件中读取连接池配置（[POOL]节，缺省时使用默认值）
+    
+    参数:
+        config_file (str): 配置文件路径，默认为'config.ini'
+        
+    返回:
+        dict: 可直接传给DatabaseAPI.initialize的连接池参数
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    
+    POOL_CONFIG = {
+        'pool_size': config.getint('POOL', 'pool_size', fallback=5),
+        'max_overflow': config.getint('POOL', 'max_overflow', fallback=10),
+        'pool_timeout': config.getint('POOL', 'pool_timeout', fallback=30),
+        'pool_recycle': config.getint('POOL', 'pool_recycle', fallback=3600),
+        'pre_ping': config.getboolean('POOL', 'pre_ping', fallback=True),
+        'connect_timeout': config.getint('POOL', 'connect_timeout', fallback=10),
+        'read_timeout': config.getint('POOL', 'read_timeout', fallback=0)
+    }
+    
+    return POOL_CONFIG
+
+
+def load_image_cache_config(config_file='config.ini'):
+    """
+    从配置文件中读取图片磁盘缓存配置（[IMAGE_CACHE]节，缺省时使用默认值）
+    
+    参数:
+        config_file (str): 配置文件路径，默认为'config.ini'
+        
+    返回:
+        dict: enabled为是否启用磁盘缓存，path为缓存目录，max_size_mb为磁盘缓存上限（MB），
+              memory_thumbnail_mb/memory_original_mb为缩略图/原图内存缓存的上限（MB）
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    
+    IMAGE_CACHE_CONFIG = {
+        'enabled': config.getboolean('IMAGE_CACHE', 'enabled', fallback=True),
+        'path': config.get('IMAGE_CACHE', 'path', fallback='image_cache'),
+        'max_size_mb': config.getint('IMAGE_CACHE', 'max_size_mb', fallback=500),
+        'memory_thumbnail_mb': config.getint('IMAGE_CACHE', 'memory_thumbnail_mb', fallback=64),
+        'memory_original_mb': config.getint('IMAGE_CACHE', 'memory_original_mb', fallback=128)
+    }
+    
+    return IMAGE_CACHE_CONFIG
+
+
+def load_download_config(config_file='config.ini'):
+    """
+    从配置文件中读取图片下载配置（[DOWNLOAD]节，缺省时使用默认值），用于download_to_local为真的爬虫
+    
+    参数:
+        config_file (str): 配置文件路径，默认为'config.ini'
+        
+    返回:
+        dict: 可直接传给kirakiradokidoki.download_images.download_to_local的参数
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    
+    DOWNLOAD_CONFIG = {
+        'image_dir': config.get('DOWNLOAD', 'image_dir', fallback='images'),
+        'workers': config.getint('DOWNLOAD', 'workers', fallback=8),
+        'per_host': config.getint('DOWNLOAD', 'per_host', fallback=4),
+        'timeout': config.getint('DOWNLOAD', 'timeout', fallback=30)
+    }
+    
+    return DOWNLOAD_CONFIG
+
+
 def create_database_connection():
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        connection = connect(DB_CONFIG)
         if connection.is_connected():
-            print("Successfully connected to MySQL database")
+            print(f"Successfully connected to {DB_CONFIG['backend']} database")
             return connection
     except Error as e:
-        print(f"Error connecting to MySQL database: {e}")
+        print(f"Error connecting to database: {e}")
         return None
 
 def create_database_and_tables(connection):
     try:
         cursor = connection.cursor()
+        if backend_of(connection) == SQLITE:
+            # SQLite文件本身就是数据库，建表语句见app/dialect.py
+            create_sqlite_tables(cursor)
+            create_card_tables(cursor)
+            connection.commit()
+            print("Tables created successfully")
+            return
+
         # 创建数据库
         cursor.execute("CREATE DATABASE if not exists anime")
         cursor.execute("USE anime")
@@ -110,6 +194,8 @@ def create_database_and_tables(connection):
             ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
         """)
         cursor.execute("CREATE INDEX idx_sourcetag_tag ON SourceTag(tag)")
+        cursor.execute("CREATE INDEX idx_sourcetag_num ON SourceTag(num, tag)")
+        cursor.execute("CREATE FULLTEXT INDEX idx_sourcetag_tag_ft ON SourceTag(tag) WITH PARSER ngram")
         
         # 创建SourceTagRelation表
         cursor.execute("""
@@ -144,6 +230,8 @@ def create_database_and_tables(connection):
             )CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
         """)
         cursor.execute("CREATE INDEX idx_roletag_tag ON RoleTag(tag)")
+        cursor.execute("CREATE INDEX idx_roletag_num ON RoleTag(num, tag)")
+        cursor.execute("CREATE FULLTEXT INDEX idx_roletag_tag_ft ON RoleTag(tag) WITH PARSER ngram")
 
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS RoleTagRelation(
@@ -201,6 +289,9 @@ def create_database_and_tables(connection):
         """)
         cursor.execute("CREATE INDEX idx_linksonpage_source_link ON LinksOnPage(source_id, link_id)")
 
+        # 搜索卡片投影表
+        create_card_tables(cursor)
+
         # 插入网站数据
         cursor.execute("""
             INSERT IGNORE INTO Website (website_id, name, base_url, description) 
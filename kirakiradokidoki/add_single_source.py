@@ -1,19 +1,22 @@
 # -*- codeing = utf-8 -*-
 from bs4 import BeautifulSoup  # 网页解析，获取数据
 import re  # 正则表达式，进行文字匹配`
-from mysql.connector import Error
+from app.dialect import Error
 import kirakiradokidoki.add_main_character_name as add_main_character_name
 from datetime import datetime
 import kirakiradokidoki.get_anime_list_into_mydb as get_anime_list_into_mydb
 import kirakiradokidoki.fetch_source_tag_and_link as fetch_source_tag_and_link
+from app.searchprojection import refresh_cards
 
 def add_single_source(urls, DB_CONFIG):
     # 创建数据库连接
     connection = get_anime_list_into_mydb.create_database_connection(DB_CONFIG)
     if not connection:
         print("Failed to connect to database. Exiting...")
-        return
+        return {"error": "无法连接数据库"}
     
+    # 导入成功的作品ID，供之后的图片下载使用
+    source_ids = []
     if urls:
         for url in urls:
             try:
@@ -118,29 +121,24 @@ def add_single_source(urls, DB_CONFIG):
                     tags, links = fetch_source_tag_and_link.fetch_source_tag_and_link(source_url)
                     if tags:
                         for tag in tags:
-                            # 插入或更新标签
+                            # 标签不存在时插入，计数在关系真正插入后再增加
                             cursor.execute("""
                                 INSERT INTO SourceTag (tag, num)
-                                VALUES (%s, 1)
-                                ON DUPLICATE KEY UPDATE num = num + 1
+                                VALUES (%s, 0)
+                                ON DUPLICATE KEY UPDATE num = num
                             """, (tag,))
                             
                             # 直接查询获取正确的 tag_id（避免 LAST_INSERT_ID() 的问题）
                             cursor.execute("SELECT tag_id FROM SourceTag WHERE tag = %s", (tag,))
                             tag_id = cursor.fetchone()[0]
                             
-                            # 插入关系前先检查是否存在
+                            # 关系已存在时不插入，也不增加计数
                             cursor.execute("""
-                                SELECT COUNT(*) FROM SourceTagRelation 
-                                WHERE source_id = %s AND tag_id = %s
+                                INSERT IGNORE INTO SourceTagRelation (source_id, tag_id)
+                                VALUES (%s, %s)
                             """, (source_id, tag_id))
-                            
-                            if cursor.fetchone()[0] == 0:
-                                # 不存在才插入
-                                cursor.execute("""
-                                    INSERT INTO SourceTagRelation (source_id, tag_id)
-                                    VALUES (%s, %s)
-                                """, (source_id, tag_id))
+                            if cursor.rowcount == 1:
+                                cursor.execute("UPDATE SourceTag SET num = num + 1 WHERE tag_id = %s", (tag_id,))
                     
                     if links:
                         for link in links:
@@ -183,6 +181,7 @@ def add_single_source(urls, DB_CONFIG):
                                 url, source_id
                             ) VALUES (%s, %s)
                         """, (cover_url, source_id))
+                        refresh_cards(cursor, 2, [source_id])
 
                 # 获取并处理角色数据
                 print("Main characters:", main_characters)  # Debug print
@@ -219,6 +218,7 @@ def add_single_source(urls, DB_CONFIG):
                                     INSERT INTO RoleImage (image_url, format, role_id)
                                     VALUES (%s, %s, %s)
                                 """, (role_image_url,'jpg',role_id))
+                                refresh_cards(cursor, 1, [role_id])
                                 print(role_image_url)
 
                                 # 插入tag
@@ -234,26 +234,20 @@ def add_single_source(urls, DB_CONFIG):
                                             result = cursor.fetchone()
                                             
                                             if result:
-                                                # 标签已存在，直接获取 ID 并更新计数
+                                                # 标签已存在，直接获取 ID
                                                 tag_id = result[0]
-                                                cursor.execute("UPDATE RoleTag SET num = num + 1 WHERE tag_id = %s", (tag_id,))
                                             else:
-                                                # 标签不存在，插入新记录
-                                                cursor.execute("INSERT INTO RoleTag (tag, num) VALUES (%s, 1)", (tag,))
+                                                # 标签不存在，插入新记录，计数在关系真正插入后再增加
+                                                cursor.execute("INSERT INTO RoleTag (tag, num) VALUES (%s, 0)", (tag,))
                                                 tag_id = cursor.lastrowid  # 直接获取插入后的自增 ID
                                             
-                                            # 插入关系前检查是否存在
+                                            # 关系已存在时不插入，也不增加计数
                                             cursor.execute("""
-                                                SELECT COUNT(*) FROM RoleTagRelation 
-                                                WHERE role_id = %s AND tag_id = %s
-                                            """, (role_id, tag_id))
-                                            
-                                            if cursor.fetchone()[0] == 0:
-                                                cursor.execute("""
-                                                    INSERT INTO RoleTagRelation (role_id, tag_id)
-                                                    VALUES (%s, %s)
-                                    
+                                                INSERT IGNORE INTO RoleTagRelation (role_id, tag_id)
+                                                VALUES (%s, %s)
                                             """, (role_id, tag_id))
+                                            if cursor.rowcount == 1:
+                                                cursor.execute("UPDATE RoleTag SET num = num + 1 WHERE tag_id = %s", (tag_id,))
                                     
                                     except Exception as e:
                                         # 发生错误时回滚
@@ -281,8 +275,10 @@ def add_single_source(urls, DB_CONFIG):
 
 
                 connection.commit()
+                source_ids.append(source_id)
             except Error as e:
                 print(f"Error saving data: {e}")
                 connection.rollback()
             finally:
-                cursor.close()
\ No newline at end of file
+                cursor.close()
+    return {'source_ids': source_ids}
\ No newline at end of file
@@ -0,0 +1,197 @@
+# -*- codeing = utf-8 -*-
+"""把作品封面和角色图片下载到本地（spider.download_to_local为真时，导入完成后执行）
+图片按内容的SHA-256保存（目录/前两位/哈希.格式），相同的图片只保存一份；
+只处理is_downloaded为假的图片，可以重复执行来补全已有的数据：
+    python -m kirakiradokidoki.download_images          # 补全所有图片
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+import requests
+from app.dialect import Error
+from app.searchprojection import refresh_cards
+import kirakiradokidoki.get_anime_list_into_mydb as get_anime_list_into_mydb
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'image/*'
+}
+
+# 文件头 -> 格式
+_SIGNATURES = [
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'BM', 'bmp'),
+]
+
+# 两种图片表：类型 -> (表, 地址列, 所属ID列)
+_IMAGE_TABLES = {
+    1: ('RoleImage', 'image_url', 'role_id'),
+    2: ('SourceImage', 'url', 'source_id'),
+}
+
+
+def normalize_url(url):
+    """补全协议头，数据库中的图片地址可能是//开头或者不带协议"""
+    if not url.startswith(('http://', 'https://')):
+        if url.startswith('//'):
+            url = 'https:' + url
+        else:
+            url = 'https://' + url
+    return url
+
+
+def image_format(data):
+    """按文件头识别图片格式，不是图片时返回None"""
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    for signature, fmt in _SIGNATURES:
+        if data.startswith(signature):
+            return fmt
+    return None
+
+
+def store_image(data, image_dir):
+    """按内容保存图片，返回 (本地路径, 格式)；已经存在相同内容的文件时直接返回它的路径"""
+    fmt = image_format(data)
+    if fmt is None:
+        raise ValueError("下载的内容不是图片")
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join(os.path.abspath(image_dir), digest[:2], f"{digest}.{fmt}")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再改名，中途退出不会留下不完整的图片
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return path, fmt
+
+
+def pending_images(cursor, source_ids=None):
+    """取出还没有下载的图片 [(类型, 地址, 所属ID)]
+    source_ids给出时只取这些作品的封面和它们角色的图片，否则取全部
+    """
+    images = []
+    if source_ids is None:
+        cursor.execute("SELECT url, source_id FROM SourceImage WHERE is_downloaded = 0")
+        images += [(2, url, owner_id) for url, owner_id in cursor.fetchall()]
+        cursor.execute("SELECT image_url, role_id FROM RoleImage WHERE is_downloaded = 0")
+        images += [(1, url, owner_id) for url, owner_id in cursor.fetchall()]
+        return images
+    for source_id in source_ids:
+        cursor.execute("SELECT url, source_id FROM SourceImage WHERE is_downloaded = 0 AND source_id = %s",
+                       (source_id,))
+        images += [(2, url, owner_id) for url, owner_id in cursor.fetchall()]
+        cursor.execute("""
+            SELECT ri.image_url, ri.role_id
+            FROM RoleImage ri
+            JOIN RoleSourceRelation rs ON rs.role_id = ri.role_id
+            WHERE ri.is_downloaded = 0 AND rs.source_id = %s
+        """, (source_id,))
+        images += [(1, url, owner_id) for url, owner_id in cursor.fetchall()]
+    # 同一角色可能属于多个作品
+    return list(dict.fromkeys(images))
+
+
+class HostLimiter:
+    """每个主机同时进行的下载数不超过per_host"""
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def __call__(self, url):
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+
+def fetch_image(session, url, limiter, timeout):
+    """在工作线程中下载一张图片，返回图片数据"""
+    url = normalize_url(url)
+    with limiter(url):
+        response = session.get(url, headers=HEADERS, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+
+def download_to_local(source_ids, DB_CONFIG, image_dir='images', workers=8, per_host=4, timeout=30,
+                      should_stop=None):
+    """下载图片并记录到数据库（is_downloaded、local_path、format），同时刷新搜索卡片
+    参数：
+    - source_ids: 作品ID列表，为None时补全所有还没有下载的图片
+    - image_dir: 图片保存目录
+    - workers/per_host: 同时下载的总数和每个主机的上限
+    - should_stop: 返回True时停止，已下载的图片仍然会记录
+    返回：{'downloaded': 成功数, 'failed': 失败数}
+    """
+    connection = get_anime_list_into_mydb.create_database_connection(DB_CONFIG)
+    if not connection:
+        print("Failed to connect to database. Exiting...")
+        return {"error": "无法连接数据库"}
+
+    downloaded = failed = 0
+    try:
+        cursor = connection.cursor()
+        images = pending_images(cursor, source_ids)
+        print(f"需要下载的图片: {len(images)}")
+        if not images:
+            return {'downloaded': 0, 'failed': 0}
+
+        limiter = HostLimiter(per_host)
+        session = requests.Session()
+        # 下载在线程池中进行，写数据库都在当前线程
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(fetch_image, session, url, limiter, timeout): (imgtype, url, owner_id)
+                       for imgtype, url, owner_id in images}
+            for future in as_completed(futures):
+                imgtype, url, owner_id = futures[future]
+                if should_stop is not None and should_stop():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                try:
+                    local_path, fmt = store_image(future.result(), image_dir)
+                except Exception as e:
+                    print(f"下载图片失败: {url} {e}")
+                    failed += 1
+                    continue
+                table, url_column, owner_column = _IMAGE_TABLES[imgtype]
+                try:
+                    cursor.execute(f"""
+                        UPDATE {table}
+                        SET is_downloaded = 1, local_path = %s, format = %s
+                        WHERE {url_column} = %s
+                    """, (local_path, fmt, url))
+                    refresh_cards(cursor, imgtype, [owner_id])
+                    connection.commit()
+                    downloaded += 1
+                except Error as e:
+                    print(f"Error saving data: {e}")
+                    connection.rollback()
+                    failed += 1
+        print(f"图片下载完成: 成功 {downloaded}，失败 {failed}")
+        cursor.close()
+        return {'downloaded': downloaded, 'failed': failed}
+    finally:
+        connection.close()
+
+
+def main():
+    from init import load_db_config, load_download_config
+
+    DB_CONFIG = load_db_config()
+    DB_CONFIG['database'] = 'anime'
+    download_to_local(None, DB_CONFIG, **load_download_config())
+
+
+if __name__ == "__main__":
+    main()
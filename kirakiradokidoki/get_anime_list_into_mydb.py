@@ -2,8 +2,7 @@
 from bs4 import BeautifulSoup  # 网页解析，获取数据
 import re  # 正则表达式，进行文字匹配`
 import urllib.request, urllib.error  # 制定URL，获取网页数据
-import mysql.connector  # MySQL数据库连接
-from mysql.connector import Error
+from app.dialect import Error, SQLITE, backend_of, connect, create_sqlite_tables
 import time
 import random, os
 from http.client import IncompleteRead, RemoteDisconnected
@@ -13,6 +12,7 @@ from urllib.parse import quote
 from datetime import datetime
 import kirakiradokidoki.fetch_tags as fetch_tags
 import kirakiradokidoki.fetch_source_tag_and_link as fetch_source_tag_and_link
+from app.searchprojection import create_card_tables, refresh_cards
 
 # 正则表达式模式
 findTitle = re.compile(r'<a class="l" href=.*>(.*?)</a>')  # 匹配标题
@@ -243,17 +243,24 @@ def getYearData(year, baseurl, search_page_num):
     
 def create_database_connection(DB_CONFIG):
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        connection = connect(DB_CONFIG)
         if connection.is_connected():
-            print("Successfully connected to MySQL database")
+            print(f"Successfully connected to {DB_CONFIG.get('backend', 'mysql')} database")
             return connection
     except Error as e:
-        print(f"Error connecting to MySQL database: {e}")
+        print(f"Error connecting to database: {e}")
         return None
 
 def create_tables(connection):
     try:
         cursor = connection.cursor()
+        if backend_of(connection) == SQLITE:
+            # SQLite的建表语句见app/dialect.py
+            create_sqlite_tables(cursor)
+            create_card_tables(cursor)
+            connection.commit()
+            print("Tables created successfully")
+            return
         
         # 创建Website表
         cursor.execute("""
@@ -418,6 +425,9 @@ def create_tables(connection):
             ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
         """)
 
+        # 搜索卡片投影表
+        create_card_tables(cursor)
+
         # 插入网站数据
         cursor.execute("""
             INSERT IGNORE INTO Website (website_id, name, base_url, description) 
@@ -596,29 +606,24 @@ def saveData(datalist, connection, year):
                 tags, links = fetch_source_tag_and_link.fetch_source_tag_and_link(bangumi_url)
                 if tags:
                     for tag in tags:
-                        # 插入或更新标签
+                        # 标签不存在时插入，计数在关系真正插入后再增加
                         cursor.execute("""
                             INSERT INTO SourceTag (tag, num)
-                            VALUES (%s, 1)
-                            ON DUPLICATE KEY UPDATE num = num + 1
+                            VALUES (%s, 0)
+                            ON DUPLICATE KEY UPDATE num = num
                         """, (tag,))
                         
                         # 直接查询获取正确的 tag_id（避免 LAST_INSERT_ID() 的问题）
                         cursor.execute("SELECT tag_id FROM SourceTag WHERE tag = %s", (tag,))
                         tag_id = cursor.fetchone()[0]
                         
-                        # 插入关系前先检查是否存在
+                        # 关系已存在时不插入，也不增加计数
                         cursor.execute("""
-                            SELECT COUNT(*) FROM SourceTagRelation 
-                            WHERE source_id = %s AND tag_id = %s
+                            INSERT IGNORE INTO SourceTagRelation (source_id, tag_id)
+                            VALUES (%s, %s)
                         """, (source_id, tag_id))
-                        
-                        if cursor.fetchone()[0] == 0:
-                            # 不存在才插入
-                            cursor.execute("""
-                                INSERT INTO SourceTagRelation (source_id, tag_id)
-                                VALUES (%s, %s)
-                            """, (source_id, tag_id))
+                        if cursor.rowcount == 1:
+                            cursor.execute("UPDATE SourceTag SET num = num + 1 WHERE tag_id = %s", (tag_id,))
                 
                 if links:
                     for link in links:
@@ -665,6 +670,7 @@ def saveData(datalist, connection, year):
                             url, source_id
                         ) VALUES (%s, %s)
                     """, (cover_url, source_id))
+                    refresh_cards(cursor, 2, [source_id])
                 
                 # 处理角色数据
                 if main_characters:
@@ -686,6 +692,7 @@ def saveData(datalist, connection, year):
                                 INSERT INTO RoleImage (image_url, format, role_id)
                                 VALUES (%s, %s, %s)
                             """, (role_image_url,'jpg',role_id))
+                            refresh_cards(cursor, 1, [role_id])
                             print(role_image_url)
 
                             # 插入tag
@@ -700,25 +707,20 @@ def saveData(datalist, connection, year):
                                         result = cursor.fetchone()
                                         
                                         if result:
-                                            # 标签已存在，直接获取 ID 并更新计数
+                                            # 标签已存在，直接获取 ID
                                             tag_id = result[0]
-                                            cursor.execute("UPDATE RoleTag SET num = num + 1 WHERE tag_id = %s", (tag_id,))
                                         else:
-                                            # 标签不存在，插入新记录
-                                            cursor.execute("INSERT INTO RoleTag (tag, num) VALUES (%s, 1)", (tag,))
+                                            # 标签不存在，插入新记录，计数在关系真正插入后再增加
+                                            cursor.execute("INSERT INTO RoleTag (tag, num) VALUES (%s, 0)", (tag,))
                                             tag_id = cursor.lastrowid  # 直接获取插入后的自增 ID
                                         
-                                        # 插入关系前检查是否存在
+                                        # 关系已存在时不插入，也不增加计数
                                         cursor.execute("""
-                                            SELECT COUNT(*) FROM RoleTagRelation 
-                                            WHERE role_id = %s AND tag_id = %s
+                                            INSERT IGNORE INTO RoleTagRelation (role_id, tag_id)
+                                            VALUES (%s, %s)
                                         """, (role_id, tag_id))
-                                        
-                                        if cursor.fetchone()[0] == 0:
-                                            cursor.execute("""
-                                                INSERT INTO RoleTagRelation (role_id, tag_id)
-                                                VALUES (%s, %s)
-                                            """, (role_id, tag_id))
+                                        if cursor.rowcount == 1:
+                                            cursor.execute("UPDATE RoleTag SET num = num + 1 WHERE tag_id = %s", (tag_id,))
                                     
                                     # 提交事务
                                     connection.commit()